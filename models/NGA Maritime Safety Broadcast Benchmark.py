@@ -0,0 +1,429 @@
+################################################################################
+################################################################################
+## NGA Maritime Safety Broadcast - Recorded Corpus Benchmark
+##
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; replays a recorded corpus of NGA feed
+##              snapshots through the NGA Maritime Safety Broadcast Python
+##              Script offline and reports throughput, malformed reports and
+##              per-function time; regression mode diffs extracted output and
+##              timings against a saved baseline
+##
+################################################################################
+################################################################################
+## USAGE
+##
+## Record a snapshot of the live feeds into the corpus:
+##     python "NGA Maritime Safety Broadcast Benchmark.py" CORPUS --record
+##
+## Replay the corpus and save a baseline:
+##     python "NGA Maritime Safety Broadcast Benchmark.py" CORPUS \
+##         --save-baseline baseline.json
+##
+## Replay the corpus and diff against the baseline:
+##     python "NGA Maritime Safety Broadcast Benchmark.py" CORPUS \
+##         --baseline baseline.json
+##
+## Measure parallel parse scaling (per-function time is not collected):
+##     python "NGA Maritime Safety Broadcast Benchmark.py" CORPUS --workers 4
+##
+## The corpus is a directory of snapshot directories named by their UTC
+## retrieval time (YYYY-MM-DDTHHMMZ), each holding one <NAV Region>.txt file
+## per feed in the script's urls dictionary. Snapshots are replayed in order
+## against the same working directory, so the spatial index and warning store
+## see the corpus as consecutive runs.
+##
+################################################################################
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+
+import requests
+
+from datetime import datetime
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Split the model script at its BODY banner; the definitions (functions and
+## model data) are executed first so functions can be wrapped for profiling
+## before the body runs. The body is padded so tracebacks keep the script
+## line numbers
+##------------------------------------------------------------------------------
+def load_script(filename):
+
+    global body_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    idx = source.index(body_banner)
+
+    definitions = source[:idx]
+    body = '\n' * definitions.count('\n') + source[idx:]
+
+    return definitions,body
+
+##------------------------------------------------------------------------------
+## Replayed response with the subset of the requests.Response API used by the
+## model script
+##------------------------------------------------------------------------------
+class ReplayResponse(object):
+
+    def __init__(self,text):
+
+        self.text = text
+        self.status_code = 200
+        self.encoding = 'utf-8'
+        self.headers = dict()
+
+    def iter_content(self,chunk_size = 1,decode_unicode = False):
+
+        for i in range(0,len(self.text),chunk_size):
+            yield self.text[i:i + chunk_size]
+
+    def close(self):
+        pass
+
+##------------------------------------------------------------------------------
+## Stub brewlytics module providing the inputs/outputs objects the model
+## script imports
+##------------------------------------------------------------------------------
+def install_brewlytics_stub():
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace(tables = list())
+    module.outputs = types.SimpleNamespace(tables = list())
+    module.__all__ = ['inputs','outputs']
+
+    sys.modules['brewlytics'] = module
+
+    return module
+
+##------------------------------------------------------------------------------
+## Wrap the named functions in the script namespace to accumulate call counts
+## and elapsed time; functions are looked up through the namespace at call
+## time so the wrappers are used by the body and by the other functions
+##------------------------------------------------------------------------------
+def wrap_functions(namespace,names,timings):
+
+    def wrap(name,function):
+
+        def wrapper(*args,**kwargs):
+
+            start = time.perf_counter()
+            try:
+                return function(*args,**kwargs)
+            finally:
+                timing = timings.setdefault(name,[0,0.0])
+                timing[0] += 1
+                timing[1] += time.perf_counter() - start
+
+        return wrapper
+
+    for name in names:
+        if name in namespace:
+            namespace[name] = wrap(name,namespace[name])
+
+##------------------------------------------------------------------------------
+## Normalise a record to JSON-compatible values for diffing
+##------------------------------------------------------------------------------
+def normalise(record):
+
+    return json.loads(json.dumps(record, default = str, sort_keys = True))
+
+##------------------------------------------------------------------------------
+## Replay one snapshot through the model script
+##------------------------------------------------------------------------------
+def replay_snapshot(snapshot_dir,definitions,body,workers):
+
+    global profiled_functions,snapshot_format
+
+    brewlytics = install_brewlytics_stub()
+
+    namespace = {'__name__': '__nga_benchmark__'}
+    exec(compile(definitions,script_filename,'exec'),namespace)
+
+    ## Replay the snapshot time so DTG year imputation and expiry are
+    ## deterministic
+    namespace['now'] = datetime.strptime(os.path.basename(snapshot_dir),
+                                         snapshot_format)
+
+    if workers:
+        namespace['parallel_min_reports'] = 0
+        namespace['parallel_max_workers'] = workers
+    else:
+        namespace['parallel_min_reports'] = float('inf')
+
+    ## Stub the network with the recorded feeds
+    feeds = {url: os.path.join(snapshot_dir,'%s.txt' % url_key)
+             for url_key,url in namespace['urls'].items()}
+
+    def replay_get(url,*args,**kwargs):
+        with open(feeds[url], encoding = 'utf-8') as f:
+            return ReplayResponse(f.read())
+
+    timings = dict()
+    if not workers:
+        wrap_functions(namespace,profiled_functions,timings)
+
+    get = requests.get
+    requests.get = replay_get
+
+    try:
+
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+
+            start = time.perf_counter()
+            exec(compile(body,script_filename,'exec'),namespace)
+            elapsed = time.perf_counter() - start
+
+    finally:
+
+        requests.get = get
+
+    return {'Reports': len(namespace['output']),
+            'Malformed Reports': len(namespace['malformed_reports']),
+            'Seconds': elapsed,
+            'Reports/sec': len(namespace['output']) / elapsed if elapsed else 0.0,
+            'Functions': {name: {'Calls': calls, 'Seconds': seconds}
+                          for name,(calls,seconds) in timings.items()},
+            'Delta': len(brewlytics.outputs.tables[0]),
+            'Records': [normalise(record) for record in namespace['formatted']]}
+
+##------------------------------------------------------------------------------
+## Replay all snapshots of the corpus in order in a scratch working directory
+##------------------------------------------------------------------------------
+def replay_corpus(corpus_dir,definitions,body,workers):
+
+    corpus_dir = os.path.abspath(corpus_dir)
+    snapshots = sorted(d for d in os.listdir(corpus_dir)
+                       if os.path.isdir(os.path.join(corpus_dir,d)))
+
+    results = dict()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+
+        os.chdir(scratch)
+        try:
+            for snapshot in snapshots:
+
+                results[snapshot] = replay_snapshot(os.path.join(corpus_dir,snapshot),
+                                                    definitions,body,workers)
+        finally:
+            os.chdir(cwd)
+
+    return results
+
+##------------------------------------------------------------------------------
+## Record the live feeds into a new snapshot directory
+##------------------------------------------------------------------------------
+def record_snapshot(corpus_dir,definitions):
+
+    global snapshot_format
+
+    install_brewlytics_stub()
+
+    namespace = {'__name__': '__nga_benchmark__'}
+    exec(compile(definitions,script_filename,'exec'),namespace)
+
+    snapshot_dir = os.path.join(corpus_dir,datetime.utcnow().strftime(snapshot_format))
+    os.makedirs(snapshot_dir)
+
+    for url_key,url in namespace['urls'].items():
+
+        print('Recording %s...' % url_key)
+
+        r = requests.get(url)
+        r.raise_for_status()
+
+        with open(os.path.join(snapshot_dir,'%s.txt' % url_key),'w',
+                  encoding = 'utf-8') as f:
+            f.write(r.text)
+
+    return snapshot_dir
+
+##------------------------------------------------------------------------------
+## Print the throughput and profile of each snapshot and the corpus totals
+##------------------------------------------------------------------------------
+def print_summary(results):
+
+    print()
+    print('%-20s %8s %10s %10s %12s' % ('Snapshot','Reports','Malformed',
+                                       'Seconds','Reports/sec'))
+
+    totals = {'Reports': 0,'Malformed Reports': 0,'Seconds': 0.0}
+    functions = dict()
+    for snapshot,result in results.items():
+
+        print('%-20s %8d %10d %10.3f %12.1f' % (snapshot,result['Reports'],
+                                               result['Malformed Reports'],
+                                               result['Seconds'],
+                                               result['Reports/sec']))
+
+        for key in totals:
+            totals[key] += result[key]
+
+        for name,timing in result['Functions'].items():
+            function = functions.setdefault(name,{'Calls': 0,'Seconds': 0.0})
+            function['Calls'] += timing['Calls']
+            function['Seconds'] += timing['Seconds']
+
+    print('%-20s %8d %10d %10.3f %12.1f' % ('TOTAL',totals['Reports'],
+                                           totals['Malformed Reports'],
+                                           totals['Seconds'],
+                                           totals['Reports'] / totals['Seconds']
+                                           if totals['Seconds'] else 0.0))
+
+    if functions:
+
+        print()
+        print('%-24s %10s %10s %8s' % ('Function','Calls','Seconds','% Run'))
+
+        for name,timing in sorted(functions.items(),
+                                  key = lambda item: -item[1]['Seconds']):
+            print('%-24s %10d %10.3f %7.1f%%' % (name,timing['Calls'],
+                                                timing['Seconds'],
+                                                100.0 * timing['Seconds'] / totals['Seconds']))
+
+##------------------------------------------------------------------------------
+## Diff extracted output and timings against a baseline; returns the number of
+## snapshots with output differences
+##------------------------------------------------------------------------------
+def compare_to_baseline(results,baseline,tolerance):
+
+    print()
+    print('Regression against baseline (timing tolerance %d%%)' % (100 * tolerance))
+
+    failures = 0
+    for snapshot,result in results.items():
+
+        if snapshot not in baseline:
+            print('- %s: not in baseline' % snapshot)
+            continue
+
+        expected = baseline[snapshot]
+
+        ## Output differences by record position and field
+        diffs = list()
+        if len(result['Records']) != len(expected['Records']):
+            diffs.append('record count %d != %d' % (len(result['Records']),
+                                                    len(expected['Records'])))
+
+        for idx,(new,old) in enumerate(zip(result['Records'],expected['Records'])):
+            for field in sorted(set(new) | set(old)):
+                if new.get(field) != old.get(field):
+                    diffs.append('record %d (%s) %s' % (idx,new.get('NAV Area'),field))
+
+        if diffs:
+
+            failures += 1
+
+            print('- %s: %d output differences' % (snapshot,len(diffs)))
+            for diff in diffs[:20]:
+                print('    %s' % diff)
+
+        ## Timing changes beyond the tolerance
+        ratio = result['Seconds'] / expected['Seconds'] if expected['Seconds'] else 1.0
+        status = 'SLOWER' if ratio > 1 + tolerance else 'FASTER' if ratio < 1 - tolerance else 'same'
+
+        print('- %s: %.3fs vs %.3fs (x%.2f, %s)' % (snapshot,result['Seconds'],
+                                                   expected['Seconds'],ratio,status))
+
+        for name,timing in sorted(result['Functions'].items()):
+
+            old = expected['Functions'].get(name)
+
+            if old and old['Seconds']:
+
+                ratio = timing['Seconds'] / old['Seconds']
+
+                if abs(ratio - 1) > tolerance:
+                    print('    %-24s %.3fs vs %.3fs (x%.2f)' % (name,timing['Seconds'],
+                                                            old['Seconds'],ratio))
+
+    return failures
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+## Banner separating the model script definitions from its body
+body_banner = '''################################################################################
+## BODY
+################################################################################'''
+
+## Snapshot directory name format (UTC retrieval time)
+snapshot_format = '%Y-%m-%dT%H%MZ'
+
+## Default model script; alongside this benchmark
+script_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'NGA Maritime Safety Broadcast.py')
+
+## Functions profiled during replay
+profiled_functions = ['build_report_record','get_region','extract_geometries',
+                      'find_vessels','get_country','get_charts','extract_dtg',
+                      'get_cancellation_date','format_geometries',
+                      'update_spatial_index','update_warning_store']
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Replay a recorded NGA feed corpus through the NGA Maritime Safety Broadcast script')
+    parser.add_argument('corpus', help = 'corpus directory of feed snapshots')
+    parser.add_argument('--script', default = script_filename,
+                        help = 'model script to replay')
+    parser.add_argument('--record', action = 'store_true',
+                        help = 'record a snapshot of the live feeds into the corpus')
+    parser.add_argument('--workers', type = int, default = 0,
+                        help = 'parse with this many worker processes (disables profiling)')
+    parser.add_argument('--save-baseline', help = 'save the results as a baseline')
+    parser.add_argument('--baseline', help = 'diff the results against a baseline')
+    parser.add_argument('--tolerance', type = float, default = 0.2,
+                        help = 'relative timing change reported by the regression')
+    args = parser.parse_args()
+
+    script_filename = args.script
+    definitions,body = load_script(script_filename)
+
+    if args.record:
+
+        print('Recorded %s' % record_snapshot(args.corpus,definitions))
+        sys.exit(0)
+
+    results = replay_corpus(args.corpus,definitions,body,args.workers)
+    print_summary(results)
+
+    if args.save_baseline:
+
+        with open(args.save_baseline,'w') as f:
+            json.dump(results,f)
+
+        print()
+        print('Baseline saved to %s' % args.save_baseline)
+
+    if args.baseline:
+
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        sys.exit(1 if compare_to_baseline(results,baseline,args.tolerance) else 0)
@@ -0,0 +1,276 @@
+################################################################################
+################################################################################
+## NGA Maritime Safety Broadcast - Spatial Index Query Benchmark
+##
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; indexes thousands of synthetic warnings
+##              (points, tracklines and areas clustered in shipping regions)
+##              with the NGA Maritime Safety Broadcast Python Script spatial
+##              index and reports query_bbox, query_radius and query_corridor
+##              latency against a scan of every warning
+##
+################################################################################
+################################################################################
+## USAGE
+##
+## Benchmark 1,000, 5,000 and 20,000 warnings on a 1 degree grid:
+##     python "NGA Maritime Safety Broadcast Spatial Benchmark.py"
+##
+## Benchmark 50,000 warnings on a half degree grid with 500 queries per type:
+##     python "NGA Maritime Safety Broadcast Spatial Benchmark.py" \
+##         --warnings 50000 --cell-size 0.5 --queries 500
+##
+################################################################################
+
+import argparse
+import os
+import random
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Execute the model script definitions (everything before the BODY banner)
+## with a stub brewlytics module
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global body_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(body_banner)]
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace(tables = list())
+    module.outputs = types.SimpleNamespace(tables = list())
+    module.__all__ = ['inputs','outputs']
+    sys.modules['brewlytics'] = module
+
+    namespace = {'__name__': '__nga_spatial_benchmark__'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic warnings: a point, trackline or area geometry (sometimes two)
+## around a shipping region, as extracted from the broadcast; returns
+## {warning id: [points,tracklines,polygons]}
+##------------------------------------------------------------------------------
+def synthetic_warnings(namespace,n,seed = 1):
+
+    global regions
+
+    rng = random.Random(seed)
+    make_geometry = namespace['make_geometry']
+
+    def around(lon,lat,spread,count):
+        return [(round(lon + rng.uniform(-spread,spread),4),
+                 round(lat + rng.uniform(-spread,spread),4)) for _ in range(count)]
+
+    warnings = dict()
+    for i in range(n):
+
+        lon,lat,spread = rng.choice(regions)
+        lon,lat = lon + rng.gauss(0,spread),max(min(lat + rng.gauss(0,spread),85.0),-85.0)
+
+        geometries = [None,None,None]
+        for _ in range(rng.choice([1,1,1,2])):
+
+            kind = rng.random()
+            if kind < 0.45:
+                geometries[0] = make_geometry('MULTIPOINT',[[point] for point
+                                                            in around(lon,lat,0.2,rng.randint(1,4))])
+            elif kind < 0.70:
+                geometries[1] = make_geometry('MULTILINESTRING',[around(lon,lat,1.0,rng.randint(2,6))])
+            else:
+                ring = sorted(around(lon,lat,0.5,rng.randint(3,7)),
+                              key = lambda p: np.arctan2(p[1] - lat,p[0] - lon))
+                geometries[2] = make_geometry('MULTIPOLYGON',[ring + ring[:1]])
+
+        warnings['NAVAREA IV %d/26' % i] = geometries
+
+    return warnings
+
+##------------------------------------------------------------------------------
+## Random queries of each type around the shipping regions: bounding boxes of
+## 2-10 degrees, 10-100 NM radii and vessel tracks of 5-20 legs in 5-50 NM
+## corridors
+##------------------------------------------------------------------------------
+def synthetic_queries(n,seed = 2):
+
+    global regions
+
+    rng = random.Random(seed)
+
+    queries = {'query_bbox': list(),'query_radius': list(),'query_corridor': list()}
+    for _ in range(n):
+
+        lon,lat,spread = rng.choice(regions)
+        lon,lat = lon + rng.gauss(0,spread),lat + rng.gauss(0,spread)
+
+        width,height = rng.uniform(2,10),rng.uniform(2,10)
+        queries['query_bbox'].append((lon - width / 2,lat - height / 2,
+                                      lon + width / 2,lat + height / 2))
+
+        queries['query_radius'].append((lon,lat,rng.uniform(10,100)))
+
+        track = [(lon,lat)]
+        heading = rng.uniform(0,2 * np.pi)
+        for _ in range(rng.randint(5,20)):
+            heading += rng.gauss(0,0.3)
+            track.append((track[-1][0] + 0.5 * np.cos(heading),
+                          max(min(track[-1][1] + 0.5 * np.sin(heading),85.0),-85.0)))
+        queries['query_corridor'].append((track,rng.uniform(5,50)))
+
+    return queries
+
+##------------------------------------------------------------------------------
+## Scan of every warning with the same refinement as the index queries
+##------------------------------------------------------------------------------
+def scan_bbox(namespace,index,min_lon,min_lat,max_lon,max_lat):
+
+    bbox = [min_lon,min_lat,max_lon,max_lat]
+    bboxes_intersect = namespace['bboxes_intersect']
+
+    return sorted(warning_id for warning_id,entry in index['warnings'].items()
+                  if any(bboxes_intersect(bbox,part_bbox) for _,_,part_bbox in entry['parts']))
+
+def scan_radius(namespace,index,lon,lat,radius_nm):
+
+    return scan_corridor(namespace,index,[(lon,lat),(lon,lat)],radius_nm)
+
+def scan_corridor(namespace,index,polyline,width_nm):
+
+    bboxes_intersect = namespace['bboxes_intersect']
+    part_distance_nm = namespace['part_distance_nm']
+
+    found = set()
+    for a,b in zip(polyline[:-1],polyline[1:]):
+
+        bbox = namespace['buffer_bbox'](namespace['part_bbox']([a,b]),width_nm)
+
+        for warning_id,entry in index['warnings'].items():
+            if warning_id not in found:
+                for geometry_type,part,bbox_ in entry['parts']:
+
+                    if bboxes_intersect(bbox,bbox_) and \
+                       (part_distance_nm(a,b,geometry_type,part) <= width_nm):
+
+                        found.add(warning_id)
+
+                        break
+
+    return sorted(found)
+
+## Latency (ms) of each query; the results are returned for comparison
+def timed_queries(function,queries):
+
+    results = list()
+    times = list()
+    for query in queries:
+
+        start = time.perf_counter()
+        results.append(function(*query))
+        times.append(time.perf_counter() - start)
+
+    return results,np.array(times) * 1000
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+## Banner separating the model script definitions from its body
+body_banner = '''################################################################################
+## BODY
+################################################################################'''
+
+## Default model script; alongside this benchmark
+script_filename = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'NGA Maritime Safety Broadcast.py')
+
+## Shipping regions: longitude, latitude and spread (degrees)
+regions = [(-90.0,26.0,3.0),      ## Gulf of Mexico
+           (-75.0,37.0,4.0),      ## US East Coast
+           (-5.0,50.0,3.0),       ## English Channel / Bay of Biscay
+           (18.0,37.0,5.0),       ## Mediterranean
+           (40.0,15.0,3.0),       ## Red Sea / Gulf of Aden
+           (52.0,26.0,2.0),       ## Persian Gulf
+           (100.0,3.0,3.0),       ## Strait of Malacca
+           (114.0,15.0,5.0),      ## South China Sea
+           (130.0,33.0,4.0),      ## Japan / Korea
+           (-122.0,37.0,3.0)]     ## US West Coast
+
+scanners = {'query_bbox': scan_bbox,
+            'query_radius': scan_radius,
+            'query_corridor': scan_corridor}
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark NGA spatial index bounding box, radius and corridor queries')
+    parser.add_argument('--script', default = script_filename,
+                        help = 'model script to benchmark')
+    parser.add_argument('--warnings', type = int, nargs = '+', default = [1000,5000,20000],
+                        help = 'synthetic warnings indexed')
+    parser.add_argument('--cell-size', type = float, default = None,
+                        help = 'grid cell size (degrees); defaults to the script setting')
+    parser.add_argument('--queries', type = int, default = 200,
+                        help = 'queries of each type')
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+    cell_size = args.cell_size or namespace['spatial_index_cell_size']
+
+    queries = synthetic_queries(args.queries)
+
+    results = list()
+    for n in args.warnings:
+
+        warnings = synthetic_warnings(namespace,n)
+
+        start = time.perf_counter()
+        index = namespace['new_spatial_index'](cell_size)
+        for warning_id,geometries in warnings.items():
+            namespace['index_add'](index,warning_id,geometries)
+        build = time.perf_counter() - start
+
+        print('%d warnings indexed in %.1f ms (%d grid cells)' %
+              (n,build * 1000,len(index['cells'])))
+
+        for name,scanner in scanners.items():
+
+            query = namespace[name]
+            indexed,index_ms = timed_queries(lambda *q: query(index,*q),queries[name])
+            scanned,scan_ms = timed_queries(lambda *q: scanner(namespace,index,*q),queries[name])
+
+            if indexed != scanned:
+                raise AssertionError('%s differs from a scan of every warning' % name)
+
+            results.append({'Warnings': n,
+                            'Query': name,
+                            'Mean Matches': round(np.mean([len(r) for r in indexed]),1),
+                            'Scan p50 (ms)': round(np.median(scan_ms),3),
+                            'Index p50 (ms)': round(np.median(index_ms),3),
+                            'Index p95 (ms)': round(np.percentile(index_ms,95),3),
+                            'Speedup': round(np.median(scan_ms) / np.median(index_ms),1)})
+
+    print()
+    print(pd.DataFrame(results).to_string(index = False))
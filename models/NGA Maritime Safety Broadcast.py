@@ -4,7 +4,7 @@
 ##
 ## Author: outsideKen
 ## Created: 11 December 2020
-## Updated: 07 May 2022
+## Updated: 19 October 2026
 ##
 ################################################################################
 ################################################################################
@@ -27,32 +27,166 @@
 ##              current year if missing from the In Force DTG; added additional
 ##              handling if the In Force DTG regex pattern does not return
 ##              an expected string
+## 2026-10-19 - Split report parsing into a separate parse stage run after all
+##              feeds are downloaded; large inputs are parsed in batches across
+##              a process pool, small inputs are parsed serially
+## 2026-10-19 - Geometries are extracted as coordinate arrays with bounding
+##              boxes; added GeoArrow and WKB table output, WKT is only 
+##              formatted for the WKT table output
+## 2026-10-19 - Added a persisted grid spatial index of active warnings with
+##              bounding box, point-radius and corridor queries
+## 2026-10-19 - Replaced whole-text segmentation with a streaming line-by-line
+##              segmenter that splits joined reports on message DTGs and builds
+##              each report record (header DTG, nav id, region line, body
+##              sections, cancel line) once for the extractors
+## 2026-10-19 - Added a persisted SQLite warning store keyed by NAV Area; 
+##              outputs are now the delta of added, changed, cancelled and 
+##              expired warnings and the currently active warnings
+## 2026-10-19 - Malformed report notifications go through the shared 
+##              notification aggregator (notifications.py); each malformed 
+##              report is a notification deduplicated across runs and sent in
+##              one digest per addressee with a rate limit
 ##
 ################################################################################
 ################################################################################
 
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
 import pandas as pd
+import pickle
+import queue
 import re
 import requests
+import sqlite3
+import struct
+import time
 
 from brewlytics import *
-from datetime import datetime
+from datetime import datetime,timedelta
+
+## Shared notification aggregator; without it all malformed reports are sent
+## in one email on every run
+try:
+    from notifications import NotificationAggregator, email_columns
+except ImportError:
+    NotificationAggregator = None
+    email_columns = ['To','CC','Subject','Body']
 
 ################################################################################
 ## FUNCTIONS
 ################################################################################
 
-## Reports are not consistently separated with a separating sub-string; using 
-## the report DTG patten to separate joined reports
-def check_for_multiple_reports(rpt):
+##------------------------------------------------------------------------------
+## STREAMING SEGMENTER
+##------------------------------------------------------------------------------
+
+## Read a streamed response line by line without holding the full text; 
+## carriage returns are removed
+def iter_response_lines(response,chunk_size = 65536):
+    
+    if response.encoding is None:
+        response.encoding = 'utf-8'
+        
+    pending = ''
+    for chunk in response.iter_content(chunk_size = chunk_size, 
+                                       decode_unicode = True):
+        
+        lines = (pending + chunk).split('\n')
+        pending = lines.pop()
+        
+        for line in lines:
+            yield line.replace('\r','')
+            
+    if pending:
+        yield pending.replace('\r','')
+
+## Segment feed lines into report texts; reports are separated by blank lines.
+## Reports are not consistently separated with a blank line, so a message DTG
+## line followed by a NAVAREA/HYDRO line also starts a new report. A trailing
+## space at the end of a line is replaced with a period
+def segment_reports(lines):
     
     global message_dtg_regex
     
-    dtgs = re.findall(message_dtg_regex,rpt)
-    messages = [m.strip() for m in re.split(message_dtg_regex,rpt)
-                if m != '']
-
-    return ['%s%s' % tuple(z) for z in zip(dtgs,messages)]
+    block = list()
+    for line in lines:
+        
+        if (len(line) > 1) and line.endswith(' '):
+            line = line[:-2] + '.'
+            
+        if line == '':
+            
+            if block:
+                yield '\n'.join(block)
+                
+            block = list()
+            
+        elif ((len(block) > 1) and re.match(message_dtg_regex,block[-1]) and
+              (('NAVAREA' in line) or ('HYDRO' in line))):
+            
+            yield '\n'.join(block[:-1])
+            
+            block = [block[-1],line]
+            
+        else:
+            
+            block.append(line)
+            
+    if block:
+        yield '\n'.join(block)
+        
+## Build a structured report record from a report text; corrections are 
+## applied once and the report is split into its header DTG, nav id, region
+## line, body sections and cancel line so the extractors do not re-split the
+## raw text. The body is the report after the header DTG split at numbered and
+## lettered paragraphs; the text before the first paragraph (nav id, region,
+## locality and chart lines) is the first section
+def build_report_record(report):
+    
+    global corrections,message_dtg_regex,paragraph_regex
+    
+    ## Scrub text for corrections to enable clean regex extraction
+    for key,val in corrections.items():
+        report = report.replace(key,val)
+        
+    lines = report.split('\n')
+    
+    ## Header DTG
+    if re.match(message_dtg_regex,lines[0]):
+        header_dtg = lines[0]
+    else:
+        header_dtg = None
+        
+    ## Region line; the sentence following the nav id
+    sentences = report[:-3].split('.\n')
+    if len(sentences) > 2:
+        region_line = re.sub(r'\n',' ',sentences[1])
+    else:
+        region_line = None
+        
+    ## Body sections
+    if header_dtg is None:
+        body = re.split(paragraph_regex,report)
+    else:
+        body = re.split(paragraph_regex,'\n'.join(lines[1:]))
+            
+    ## Cancel line
+    cancel_line = None
+    for line in lines:
+        if 'CANCEL THIS MSG' in line:
+            cancel_line = line
+            break
+        
+    return {'Report': report,
+            'Header DTG': header_dtg,
+            'NAV Id': get_nav_id(lines),
+            'Region Line': region_line,
+            'Body': body,
+            'Cancel Line': cancel_line}
 
 def get_latlons(report):
     
@@ -80,18 +214,23 @@ def convert2dd(ll):
         
     return dd
 
-def get_nav_id(rpt):
+## Nav id from the first report line matching the NAVAREA pattern, otherwise
+## the HYDRO pattern
+def get_nav_id(lines):
     
     global navarea_regex,hydro_regex
     
-    if 'NAVAREA' in rpt:
-        nav_id = re.findall(navarea_regex,rpt)[0]
-    elif 'HYDRO' in rpt:
-        nav_id = re.findall(hydro_regex,rpt)[0]
-    else:
-        nav_id = '---'
+    for keyword,regex in [('NAVAREA',navarea_regex),('HYDRO',hydro_regex)]:
+        for line in lines:
+            
+            if keyword in line:
+                
+                nav_id = re.findall(regex,line)
+                
+                if nav_id:
+                    return nav_id[0]
     
-    return nav_id
+    return '---'
 
 def get_charts(report):
     
@@ -153,6 +292,15 @@ def get_cancellation_date(report):
         
     return cancel_dtg[0]
 
+## Convert a DDHHMMZ MON YY DTG string to a datetime; returns None if the DTG 
+## cannot be parsed
+def parse_dtg(dtg):
+    
+    try:
+        return datetime.strptime(dtg.title(),'%d%H%MZ %b %y')
+    except (AttributeError,TypeError,ValueError):
+        return None
+
 def find_vessels(rpt):
     
     ## Find M/V names in reports based on M/V tag
@@ -170,22 +318,45 @@ def find_vessels(rpt):
         
     return vessels
 
-def extract_geometries(report):
+## Build a geometry from a list of parts, each part a list of (lon,lat) pairs;
+## coordinates are stored as a flat interleaved [x0,y0,x1,y1,...] array with
+## an offsets array marking the first coordinate of each part (GeoArrow-style)
+## and a precomputed [min lon,min lat,max lon,max lat] bounding box
+def make_geometry(geometry_type,parts):
+    
+    coords = list()
+    offsets = [0]
+    for part in parts:
+        for lon,lat in part:
+            coords += [lon,lat]
+        offsets.append(len(coords) // 2)
+        
+    if coords:
+        bbox = [min(coords[0::2]),min(coords[1::2]),
+                max(coords[0::2]),max(coords[1::2])]
+    else:
+        bbox = None
+        
+    return {'type': geometry_type,
+            'coords': coords,
+            'offsets': offsets,
+            'bbox': bbox}
+
+## Extract Points, Tracklines and Areas Bound from the body sections of a
+## report record; a geometry type not present in the report is returned as 
+## None
+def extract_geometries(body):
     
     global lat_pat,lon_pat
 
     ## Set valid null geometries
-    multipoint = 'MULTIPOINT EMPTY'
-    multilinestring = 'MULTILINESTRING EMPTY'
-    multipolygon = 'MULTIPOLYGON EMPTY'
+    multipoint = None
+    multilinestring = None
+    multipolygon = None
         
-    ## Format report to a single line by removing all whitespace characters
+    ## Format body to a single line by removing all whitespace characters
     ## and multiple consecutive spaces
-    single_line = re.sub(r'\s+',' ',report)
-    
-    ## Segment single-line report by numbered paragraphs and 
-    ## lettered-sub-paragraphs
-    segmented_paragraphs = re.split(r' [1-9A-Z]{1}[.]{1} ',single_line)
+    single_line = re.sub(r'\s+',' ',' '.join(body))
 
     ## Extract Points as MULTIPOINTs
     if ('TRACKLINE' not in single_line) and ('BOUND B' not in single_line) and ('(NAIS)' not in single_line):    
@@ -196,11 +367,9 @@ def extract_geometries(report):
         ## Check for paired coordinate extraction
         if (lats) and len(lats) == len(lons):
             
-            ## Add coordinates to a list of points
-            points = ['(%f %f)' % tuple(z) for z in zip(lons,lats)]
-            
-            ## Create a valid MULTIPOINT geometry
-            multipoint = 'MULTIPOINT(%s)' % (','.join(points))
+            ## Each point is a single-coordinate part
+            multipoint = make_geometry('MULTIPOINT',
+                                       [[z] for z in zip(lons,lats)])
      
     ## Extract Tracklines as MULTILINESTRINGS
     if 'TRACKLINE' in single_line:
@@ -208,8 +377,8 @@ def extract_geometries(report):
         ## Check for multiple linestrings
         linestrings = list()
         
-        ## Segment into numbered and lettered paragraphs and sub-paragraphs
-        for paragraph in segmented_paragraphs:
+        ## Numbered and lettered paragraphs and sub-paragraphs
+        for paragraph in body:
 
             ## Use regex to extract patterns matching latitude and longitude
             lats,lons = get_latlons(paragraph)
@@ -217,21 +386,19 @@ def extract_geometries(report):
             ## Test for valid linestring geometry
             if (lats) and (lons) and (len(lats) >= 2):
                 
-                points = ['%f %f' % tuple(z) for z in zip(lons,lats)]
-                
-                linestrings.append('(%s)' % ','.join(points))
+                linestrings.append(list(zip(lons,lats)))
 
-        multilinestring = 'MULTILINESTRING(%s)' % ','.join(linestrings)
+        multilinestring = make_geometry('MULTILINESTRING',linestrings)
 
     ## Extract Areas Bound as MULTIPOLYGONS
     ## Check for keyword identified polygon data in report
     if re.findall(r'BOUND B[Y]?',single_line):
         
-        ## Check for multiple polygons 
+        ## Check for multiple polygons; each polygon has a single ring
         polygons = list()
 
-        ## Segment into numbered and lettered paragraphs and sub-paragraphs
-        for paragraph in segmented_paragraphs:
+        ## Numbered and lettered paragraphs and sub-paragraphs
+        for paragraph in body:
 
             ## Use regex to extract patterns matching latitude and longitude
             lats,lons = get_latlons(paragraph)
@@ -243,19 +410,740 @@ def extract_geometries(report):
                 lats += [lats[0]]
                 lons += [lons[0]]
                                    
-                points = ['%f %f' % tuple(z) for z in zip(lons,lats)]
-
-                polygons.append('((%s))' % ','.join(points))
+                polygons.append(list(zip(lons,lats)))
 
-        multipolygon = 'MULTIPOLYGON(%s)' % ','.join(polygons)
+        multipolygon = make_geometry('MULTIPOLYGON',polygons)
 
     return multipoint,multilinestring,multipolygon
 
+## Format a geometry as WKT; only used for the WKT table output
+def geometry_to_wkt(geometry_type,geometry):
+    
+    if geometry is None:
+        return '%s EMPTY' % geometry_type
+    
+    coords,offsets = geometry['coords'],geometry['offsets']
+    
+    parts = list()
+    for start,end in zip(offsets[:-1],offsets[1:]):
+        parts.append(','.join(['%f %f' % (coords[2*i],coords[2*i + 1])
+                               for i in range(start,end)]))
+        
+    wrap = {'MULTIPOINT': '(%s)',
+            'MULTILINESTRING': '(%s)',
+            'MULTIPOLYGON': '((%s))'}[geometry_type]
+    
+    return '%s(%s)' % (geometry_type,','.join([wrap % p for p in parts]))
+
+## Encode a geometry as little-endian WKB; geometries not present in the
+## report are encoded as empty multi-geometries
+def geometry_to_wkb(geometry_type,geometry):
+    
+    global wkb_types
+    
+    multi_type,part_type = wkb_types[geometry_type]
+    
+    if geometry is None:
+        return struct.pack('<BII',1,multi_type,0)
+    
+    coords,offsets = geometry['coords'],geometry['offsets']
+    
+    wkb = [struct.pack('<BII',1,multi_type,len(offsets) - 1)]
+    for start,end in zip(offsets[:-1],offsets[1:]):
+        
+        part = coords[2*start:2*end]
+        
+        if geometry_type == 'MULTIPOINT':
+            wkb.append(struct.pack('<BI',1,part_type))
+        elif geometry_type == 'MULTILINESTRING':
+            wkb.append(struct.pack('<BII',1,part_type,end - start))
+        else:
+            wkb.append(struct.pack('<BIII',1,part_type,1,end - start))
+            
+        wkb.append(struct.pack('<%dd' % len(part),*part))
+        
+    return b''.join(wkb)
+
+## Convert the geometries of a parsed record to the table geometry_format
+## - WKT: WKT strings in the Points, Tracklines and Polygons columns
+## - GeoArrow: flat coordinate and offset arrays with a bounding box for each
+##   geometry
+## - WKB: hex-encoded WKB with a bounding box for each geometry
+def format_geometries(record):
+    
+    global geometry_columns,geometry_format
+    
+    formatted = record.copy()
+    for column,geometry_type in geometry_columns.items():
+        
+        geometry = formatted.pop(column)
+        
+        if geometry_format == 'WKT':
+            
+            formatted[column] = geometry_to_wkt(geometry_type,geometry)
+            
+        elif geometry_format == 'GeoArrow':
+            
+            if geometry is None:
+                geometry = make_geometry(geometry_type,[])
+                
+            formatted['%s Coordinates' % column] = geometry['coords']
+            formatted['%s Offsets' % column] = geometry['offsets']
+            formatted['%s BBox' % column] = geometry['bbox']
+            
+        elif geometry_format == 'WKB':
+            
+            formatted[column] = geometry_to_wkb(geometry_type,geometry).hex()
+            formatted['%s BBox' % column] = geometry['bbox'] if geometry else None
+            
+        else:
+            
+            raise ValueError('Unknown geometry format: %s' % geometry_format)
+            
+    return formatted
+
+## Extract Non-Regional (Exception Reports) and Regions from reports; a report
+## without a region line is flagged as malformed
+def get_region(record):
+    
+    global exceptions
+    
+    report,region_line = record['Report'],record['Region Line']
+    
+    region = '----'
+    regions = set()
+    malformed = False
+    
+    for exception in exceptions:
+        
+        if exception in report:
+            
+            region = exception
+            
+            print('- Exception Found: %s' % exception)
+            
+            break
+            
+        elif (region_line is not None) and ('WARNINGS IN FORCE' not in report):
+            
+            region = region_line
+            
+            ## Set of regions found in the data
+            regions.add(region)
+            
+        else:
+            
+            malformed = True
+            
+    return region,regions,malformed
+
+def parse_report(url_key,record):
+    
+    report = record['Report']
+    
+    ## Body sections joined by line breaks; the vessel, country and chart 
+    ## patterns do not match across paragraphs
+    body = '\n'.join(record['Body'])
+    
+    ## Find M/V names in reports based on M/V tag
+    vessels = find_vessels(body)
+    
+    ## Extract Non-Regional (Exception Reports) and Regions from reports
+    region,regions,malformed = get_region(record)
+    
+    ## Extract geometries from safety reports
+    points,tracklines,polygons = extract_geometries(record['Body'])
+    
+    record = {'NAV Region': url_key,
+              'NAV Area': record['NAV Id'],
+              'Message DTG': extract_dtg(record['Header DTG'] or report),
+              'Cancellation DTG': get_cancellation_date(record['Cancel Line'] or ''),
+              'Region': region,
+              'Country': ','.join(get_country(body)),
+              'Chart': ','.join(get_charts(body)),
+              'Raw Report': report.strip(),
+              'Vessels': '; '.join(vessels),
+              'Points': points,
+              'Tracklines': tracklines,
+              'Polygons': polygons
+              }
+    
+    return record,regions,malformed,report
+
+## Parse a batch of (url_key,report record) pairs; returns the parsed records in batch
+## order with the malformed reports and regions found in the batch
+def parse_batch(batch):
+    
+    records = list()
+    malformed_reports = set()
+    regions_found = set()
+    for url_key,report_record in batch:
+        
+        record,regions,malformed,report = parse_report(url_key,report_record)
+        
+        records.append(record)
+        regions_found |= regions
+        
+        if malformed:
+            malformed_reports.add(report)
+            
+    return records,malformed_reports,regions_found
+
+## Worker process for the parallel parse stage; batches are inherited from the
+## parent process and only batch indices and parsed results are passed between
+## processes
+def parse_worker(batches,task_queue,result_queue):
+    
+    for idx in iter(task_queue.get,None):
+        result_queue.put((idx,parse_batch(batches[idx])))
+
+## Parse all reports; inputs smaller than parallel_min_reports are parsed
+## serially, larger inputs are split into batches and spread across a pool of
+## worker processes. Batch results are merged in batch order so the output 
+## keeps the original feed order. The pool relies on the 'fork' start method so
+## workers inherit the model data; if it is unavailable, a worker fails, the
+## workers exit without posting every batch or the results are not all in by
+## parallel_timeout seconds the reports are parsed serially
+def parse_reports(tagged_reports):
+    
+    global parallel_min_reports,parallel_batch_size,parallel_max_workers,parallel_timeout
+    
+    use_pool = ((len(tagged_reports) >= parallel_min_reports) and 
+                ('fork' in multiprocessing.get_all_start_methods()))
+    
+    if use_pool:
+        
+        batches = [tagged_reports[i:i + parallel_batch_size] 
+                   for i in range(0,len(tagged_reports),parallel_batch_size)]
+        
+        workers = min(parallel_max_workers or os.cpu_count() or 1,len(batches))
+        
+        print('Parsing %d reports in %d batches across %d processes...' % 
+              (len(tagged_reports),len(batches),workers))
+        
+        context = multiprocessing.get_context('fork')
+        task_queue = context.Queue()
+        result_queue = context.Queue()
+        
+        processes = [context.Process(target = parse_worker,
+                                     args = (batches,task_queue,result_queue),
+                                     daemon = True)
+                     for _ in range(workers)]
+        
+        try:
+            
+            for process in processes:
+                process.start()
+                
+            for idx in range(len(batches)):
+                task_queue.put(idx)
+            for process in processes:
+                task_queue.put(None)
+                
+            ## Workers that have all exited before an empty wait cannot post
+            ## the missing batches; a hung worker is bounded by the deadline
+            parsed = dict()
+            deadline = time.monotonic() + parallel_timeout
+            while len(parsed) < len(batches):
+                
+                exited = all(p.exitcode is not None for p in processes)
+                
+                try:
+                    idx,result = result_queue.get(timeout = 1)
+                    parsed[idx] = result
+                    
+                except queue.Empty:
+                    if any(p.exitcode not in [None,0] for p in processes):
+                        raise RuntimeError('parse worker exited unexpectedly')
+                    if exited:
+                        raise RuntimeError('parse workers exited with %d batches missing' % 
+                                           (len(batches) - len(parsed)))
+                    
+                if time.monotonic() > deadline:
+                    raise RuntimeError('parse timed out after %d seconds with %d batches missing' % 
+                                       (parallel_timeout,len(batches) - len(parsed)))
+                    
+            results = [parsed[idx] for idx in range(len(batches))]
+            
+        except Exception as e:
+            
+            print('Parallel parse failed (%s); parsing serially...' % e)
+            
+            use_pool = False
+            
+        finally:
+            
+            for process in [p for p in processes if p.pid is not None]:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+            
+    if not use_pool:
+        
+        results = [parse_batch(tagged_reports)]
+        
+    output = list()
+    malformed_reports = set()
+    regions_found = set()
+    for records,malformed,regions in results:
+        
+        output += records
+        malformed_reports |= malformed
+        regions_found |= regions
+        
+    return output,malformed_reports,regions_found
+
+##------------------------------------------------------------------------------
+## SPATIAL INDEX
+##------------------------------------------------------------------------------
+## Uniform grid spatial index over the extracted warning geometries; each grid
+## cell holds the set of warning ids (NAV Area) with a geometry part whose
+## bounding box touches the cell. Candidates from the grid are refined against
+## the part geometries using a local flat-earth approximation in nautical
+## miles, which is adequate for the corridor and radius sizes used for
+## warnings. Longitudes are not wrapped at the antimeridian.
+
+def new_spatial_index(cell_size):
+    
+    return {'cell_size': cell_size,
+            'cells': dict(),
+            'warnings': dict()}
+
+## Split a geometry into its parts, each part a list of (lon,lat) pairs
+def geometry_parts(geometry):
+    
+    coords,offsets = geometry['coords'],geometry['offsets']
+    
+    return [[(coords[2*i],coords[2*i + 1]) for i in range(start,end)]
+            for start,end in zip(offsets[:-1],offsets[1:])]
+
+def part_bbox(part):
+    
+    lons = [lon for lon,lat in part]
+    lats = [lat for lon,lat in part]
+    
+    return [min(lons),min(lats),max(lons),max(lats)]
+
+def bbox_cells(bbox,cell_size):
+    
+    min_lon,min_lat,max_lon,max_lat = bbox
+    
+    return {(i,j) 
+            for i in range(math.floor(min_lon / cell_size),
+                           math.floor(max_lon / cell_size) + 1)
+            for j in range(math.floor(min_lat / cell_size),
+                           math.floor(max_lat / cell_size) + 1)}
+
+def bboxes_intersect(a,b):
+    
+    return (a[0] <= b[2]) and (b[0] <= a[2]) and (a[1] <= b[3]) and (b[1] <= a[3])
+
+## Add or replace a warning in the spatial index; warnings without geometries
+## are tracked but not added to any grid cell
+def index_add(index,warning_id,geometries):
+    
+    index_remove(index,warning_id)
+    
+    parts = list()
+    for geometry in geometries:
+        if geometry is not None:
+            for part in geometry_parts(geometry):
+                if part:
+                    parts.append((geometry['type'],part,part_bbox(part)))
+    
+    cells = set()
+    for geometry_type,part,bbox in parts:
+        cells |= bbox_cells(bbox,index['cell_size'])
+        
+    for cell in cells:
+        index['cells'].setdefault(cell,set()).add(warning_id)
+        
+    index['warnings'][warning_id] = {'geometries': geometries,
+                                     'parts': parts,
+                                     'cells': cells}
+    
+def index_remove(index,warning_id):
+    
+    entry = index['warnings'].pop(warning_id,None)
+    
+    if entry:
+        for cell in entry['cells']:
+            
+            index['cells'][cell].discard(warning_id)
+            
+            if not index['cells'][cell]:
+                del index['cells'][cell]
+                
+def index_candidates(index,bbox):
+    
+    candidates = set()
+    for cell in bbox_cells(bbox,index['cell_size']):
+        candidates |= index['cells'].get(cell,set())
+        
+    return candidates
+
+## Project (lon,lat) to a local plane in nautical miles around an origin
+def project_nm(lon,lat,origin):
+    
+    lon0,lat0 = origin
+    
+    return ((lon - lon0) * 60.0 * math.cos(math.radians(lat0)),
+            (lat - lat0) * 60.0)
+
+def point_segment_distance(p,a,b):
+    
+    dx,dy = b[0] - a[0],b[1] - a[1]
+    
+    if (dx == 0) and (dy == 0):
+        t = 0.0
+    else:
+        t = ((p[0] - a[0])*dx + (p[1] - a[1])*dy) / (dx*dx + dy*dy)
+        t = max(0.0,min(1.0,t))
+        
+    return math.hypot(p[0] - (a[0] + t*dx),p[1] - (a[1] + t*dy))
+
+def segments_intersect(a,b,c,d):
+    
+    def orientation(p,q,r):
+        return (q[0] - p[0])*(r[1] - p[1]) - (q[1] - p[1])*(r[0] - p[0])
+    
+    d1,d2 = orientation(c,d,a),orientation(c,d,b)
+    d3,d4 = orientation(a,b,c),orientation(a,b,d)
+    
+    return (d1*d2 < 0) and (d3*d4 < 0)
+
+def segment_distance(a,b,c,d):
+    
+    if segments_intersect(a,b,c,d):
+        return 0.0
+    
+    return min(point_segment_distance(a,c,d),point_segment_distance(b,c,d),
+               point_segment_distance(c,a,b),point_segment_distance(d,a,b))
+
+def point_in_ring(p,ring):
+    
+    inside = False
+    for (x1,y1),(x2,y2) in zip(ring[:-1],ring[1:]):
+        if ((y1 > p[1]) != (y2 > p[1])) and \
+           (p[0] < (x2 - x1)*(p[1] - y1) / (y2 - y1) + x1):
+            inside = not inside
+            
+    return inside
+
+## Distance in nautical miles between the segment a-b and a geometry part; a
+## single-point query is passed as a == b
+def part_distance_nm(a,b,geometry_type,part):
+    
+    origin = ((a[0] + b[0]) / 2.0,(a[1] + b[1]) / 2.0)
+    
+    pa,pb = project_nm(a[0],a[1],origin),project_nm(b[0],b[1],origin)
+    projected = [project_nm(lon,lat,origin) for lon,lat in part]
+    
+    if (geometry_type == 'MULTIPOLYGON') and \
+       (point_in_ring(pa,projected) or point_in_ring(pb,projected)):
+        return 0.0
+    
+    if len(projected) == 1:
+        return point_segment_distance(projected[0],pa,pb)
+    
+    return min(segment_distance(pa,pb,c,d) 
+               for c,d in zip(projected[:-1],projected[1:]))
+
+## Expand a bounding box by a distance in nautical miles
+def buffer_bbox(bbox,distance_nm):
+    
+    dlat = distance_nm / 60.0
+    cos_lat = max(math.cos(math.radians(max(abs(bbox[1]),abs(bbox[3])) + dlat)),0.01)
+    dlon = distance_nm / (60.0 * cos_lat)
+    
+    return [bbox[0] - dlon,max(bbox[1] - dlat,-90.0),
+            bbox[2] + dlon,min(bbox[3] + dlat,90.0)]
+
+## QUERY API: returns a sorted list of warning ids
+
+## Warnings with a geometry part touching the bounding box
+def query_bbox(index,min_lon,min_lat,max_lon,max_lat):
+    
+    bbox = [min_lon,min_lat,max_lon,max_lat]
+    
+    return sorted(warning_id 
+                  for warning_id in index_candidates(index,bbox)
+                  if any(bboxes_intersect(bbox,part_bbox) 
+                         for _,_,part_bbox in index['warnings'][warning_id]['parts']))
+
+## Warnings within radius_nm nautical miles of a point
+def query_radius(index,lon,lat,radius_nm):
+    
+    return query_corridor(index,[(lon,lat),(lon,lat)],radius_nm)
+
+## Warnings within width_nm nautical miles of a polyline of (lon,lat) pairs,
+## e.g. a vessel track
+def query_corridor(index,polyline,width_nm):
+    
+    found = set()
+    for a,b in zip(polyline[:-1],polyline[1:]):
+        
+        bbox = buffer_bbox(part_bbox([a,b]),width_nm)
+        
+        for warning_id in index_candidates(index,bbox) - found:
+            for geometry_type,part,bbox_ in index['warnings'][warning_id]['parts']:
+                
+                if bboxes_intersect(bbox,bbox_) and \
+                   (part_distance_nm(a,b,geometry_type,part) <= width_nm):
+                    
+                    found.add(warning_id)
+                    
+                    break
+                
+    return sorted(found)
+
+## Update the spatial index from the parsed reports; warnings no longer in the
+## broadcast or past their cancellation DTG are removed, new warnings are added
+## and warnings with changed geometries are re-indexed
+def update_spatial_index(index,records):
+    
+    global geometry_columns,now
+    
+    current = dict()
+    for record in records:
+        
+        cancel_dtg = parse_dtg(record['Cancellation DTG'])
+        
+        if (record['NAV Area'] != '---') and \
+           ((cancel_dtg is None) or (cancel_dtg > now)):
+            current[record['NAV Area']] = [record[column] 
+                                           for column in geometry_columns]
+            
+    counts = {'Added': 0, 'Updated': 0, 'Removed': 0}
+    for warning_id in [w for w in index['warnings'] if w not in current]:
+        
+        index_remove(index,warning_id)
+        counts['Removed'] += 1
+        
+    for warning_id,geometries in current.items():
+        
+        entry = index['warnings'].get(warning_id)
+        
+        if entry is None:
+            counts['Added'] += 1
+        elif entry['geometries'] != geometries:
+            counts['Updated'] += 1
+        else:
+            continue
+        
+        index_add(index,warning_id,geometries)
+        
+    return counts
+
+def load_spatial_index(filename,cell_size):
+    
+    if os.path.exists(filename):
+        
+        with open(filename,'rb') as f:
+            index = pickle.load(f)
+            
+        if index['cell_size'] == cell_size:
+            return index
+        
+    return new_spatial_index(cell_size)
+
+def save_spatial_index(index,filename):
+    
+    with open(filename,'wb') as f:
+        pickle.dump(index,f)
+
+##------------------------------------------------------------------------------
+## WARNING STORE
+##------------------------------------------------------------------------------
+## SQLite store of warnings keyed by NAV Area id. Each warning keeps its table
+## record as JSON, a content hash to detect changes, a status (Active, 
+## Cancelled or Expired) and the parsed message and cancellation times. The
+## active_warnings view is served from the (status,message_time) index so 
+## time-window queries on active warnings do not scan the full store.
+
+warning_store_schema = """
+CREATE TABLE IF NOT EXISTS warnings (
+    nav_area TEXT PRIMARY KEY,
+    nav_region TEXT,
+    message_time TEXT,
+    cancellation_time TEXT,
+    status TEXT,
+    content_hash TEXT,
+    record TEXT,
+    first_seen TEXT,
+    last_seen TEXT,
+    last_changed TEXT);
+CREATE INDEX IF NOT EXISTS idx_warnings_status_time 
+    ON warnings (status,message_time);
+CREATE INDEX IF NOT EXISTS idx_warnings_status_region 
+    ON warnings (status,nav_region);
+CREATE VIEW IF NOT EXISTS active_warnings AS
+    SELECT * FROM warnings WHERE status = 'Active';
+"""
+
+def open_warning_store(filename):
+    
+    global warning_store_schema
+    
+    conn = sqlite3.connect(filename)
+    conn.executescript(warning_store_schema)
+    
+    return conn
+
+def dtg_to_iso(dtg):
+    
+    global sql_datetime
+    
+    dt = parse_dtg(dtg)
+    
+    return dt.strftime(sql_datetime) if dt else None
+
+## Status of a warning from its parsed cancellation and message times
+def warning_status(message_time,cancellation_time,now_iso,expiry_iso):
+    
+    if cancellation_time and (cancellation_time <= now_iso):
+        return 'Cancelled'
+    elif message_time and (message_time < expiry_iso):
+        return 'Expired'
+    else:
+        return 'Active'
+    
+## Upsert the formatted table records of this run into the warning store and
+## return the delta as a list of (change,record) pairs; change is Added, 
+## Changed, Cancelled or Expired. Active warnings of the NAV Regions retrieved 
+## in this run that are no longer broadcast are cancelled, and active warnings
+## past the expiry age are expired. Warnings that are not active after the 
+## update are removed from the spatial index, if one is given
+def update_warning_store(conn,records,index = None):
+    
+    global now,sql_datetime,warning_expiry_days
+    
+    now_iso = now.strftime(sql_datetime)
+    expiry = now - timedelta(days = warning_expiry_days)
+    expiry_iso = expiry.strftime(sql_datetime)
+    
+    current = dict()
+    for record in records:
+        if record['NAV Area'] != '---':
+            current[record['NAV Area']] = {k: (None if v is pd.NaT else v)
+                                           for k,v in record.items()}
+            
+    delta = list()
+    with conn:
+        
+        for nav_area,record in current.items():
+            
+            record_json = json.dumps(record, sort_keys = True)
+            content_hash = hashlib.sha1(record_json.encode('utf-8')).hexdigest()
+            
+            message_time = dtg_to_iso(record['Message DTG'])
+            cancellation_time = dtg_to_iso(record['Cancellation DTG'])
+            status = warning_status(message_time,cancellation_time,
+                                    now_iso,expiry_iso)
+            
+            previous = conn.execute('SELECT content_hash,status FROM warnings '
+                                    'WHERE nav_area = ?',(nav_area,)).fetchone()
+            
+            if previous is None:
+                change = 'Added' if status == 'Active' else status
+            elif previous[1] != status:
+                change = 'Changed' if status == 'Active' else status
+            elif previous[0] != content_hash:
+                change = 'Changed'
+            else:
+                change = None
+                
+            conn.execute("""
+                INSERT INTO warnings VALUES (?,?,?,?,?,?,?,?,?,?)
+                ON CONFLICT (nav_area) DO UPDATE SET
+                    nav_region = excluded.nav_region,
+                    message_time = excluded.message_time,
+                    cancellation_time = excluded.cancellation_time,
+                    status = excluded.status,
+                    content_hash = excluded.content_hash,
+                    record = excluded.record,
+                    last_seen = excluded.last_seen,
+                    last_changed = CASE WHEN ? THEN excluded.last_changed
+                                   ELSE warnings.last_changed END""",
+                         (nav_area,record['NAV Region'],message_time,
+                          cancellation_time,status,content_hash,record_json,
+                          now_iso,now_iso,now_iso,change is not None))
+            
+            if change:
+                delta.append((change,record))
+                
+            if (status != 'Active') and (index is not None):
+                index_remove(index,nav_area)
+                
+        ## Cancel active warnings no longer broadcast in the retrieved regions
+        regions = sorted({record['NAV Region'] for record in records})
+        
+        for region in regions:
+            
+            missing = [(nav_area,record_json) for nav_area,record_json in
+                       conn.execute('SELECT nav_area,record FROM warnings '
+                                    'WHERE status = ? AND nav_region = ?',
+                                    ('Active',region))
+                       if nav_area not in current]
+            
+            for nav_area,record_json in missing:
+                
+                conn.execute('UPDATE warnings SET status = ?,last_changed = ? '
+                             'WHERE nav_area = ?',
+                             ('Cancelled',now_iso,nav_area))
+                
+                delta.append(('Cancelled',json.loads(record_json)))
+                
+                if index is not None:
+                    index_remove(index,nav_area)
+                
+        ## Expire active warnings older than the expiry age
+        expired = conn.execute('SELECT nav_area,record FROM warnings '
+                               'WHERE status = ? AND message_time < ?',
+                               ('Active',expiry_iso)).fetchall()
+        
+        for nav_area,record_json in expired:
+            
+            conn.execute('UPDATE warnings SET status = ?,last_changed = ? '
+                         'WHERE nav_area = ?',('Expired',now_iso,nav_area))
+            
+            delta.append(('Expired',json.loads(record_json)))
+            
+            if index is not None:
+                index_remove(index,nav_area)
+            
+    return delta
+
+## Active warnings ordered by message time, optionally limited to a message
+## time window of datetimes; served from the (status,message_time) index
+def query_active_warnings(conn,start = None,end = None):
+    
+    global sql_datetime
+    
+    query = 'SELECT record FROM active_warnings'
+    
+    conditions,parameters = list(),list()
+    if start is not None:
+        conditions.append('message_time >= ?')
+        parameters.append(start.strftime(sql_datetime))
+    if end is not None:
+        conditions.append('message_time < ?')
+        parameters.append(end.strftime(sql_datetime))
+        
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+        
+    query += ' ORDER BY message_time'
+    
+    return [json.loads(record_json) 
+            for record_json, in conn.execute(query,parameters)]
+
 ################################################################################
 ## MODEL DATA
 ################################################################################
 
 iso8601 = '%Y-%m-%dT%H:%M:%S.%fZ'
+sql_datetime = '%Y-%m-%d %H:%M:%S'
 now = datetime.utcnow()
 now_str = now.strftime('%Y-%m-%d %H%MZ')
 
@@ -270,8 +1158,12 @@ hydro_regex = r'(HYDRO[A-Z0-9\/\(\) ]*).'
 ## In Force DTG REGEX patterns with and without the year
 dtg_patterns = r'[\d]{6}Z [A-Z]{3} [\d]{2}|[\d]{6}Z [A-Z]{3}'
 
-## Message DTG REGEX pattern
-message_dtg_regex = r'[\d]{6}Z [A-Z]{3} [\d]{2}\n'
+## Message DTG REGEX pattern; a message DTG is on a line of its own
+message_dtg_regex = r'[\d]{6}Z [A-Z]{3} [\d]{2}$'
+
+## Numbered and lettered paragraph REGEX pattern; splits a report into its
+## body sections
+paragraph_regex = r'\s+[1-9A-Z]{1}[.]{1}\s+'
 
 ## Message Cancel DTG REGEX pattern
 cancel_dtg_pat = r'CANCEL THIS MSG ([\d]{6}Z [A-Z]{3} [\d]{2}).'
@@ -331,11 +1223,67 @@ urls = {'Pacific': pacific_url,
         'HYDROARC': hydroarc_url}
 
 ##------------------------------------------------------------------------------
-## Malformed Report Found Boolean - Send Notification containing malformed
-## reports
+## Geometry Output Format - 'WKT' (default), 'GeoArrow' (flat coordinate and
+## offset arrays) or 'WKB' (hex-encoded); GeoArrow and WKB keep full
+## coordinate precision and add a bounding box for each geometry
+##------------------------------------------------------------------------------
+
+geometry_format = 'WKT'
+
+##------------------------------------------------------------------------------
+## Malformed Report Notifications - addressees, report line template, and
+## the notification aggregator state file and rate limit (emails per 
+## addressee per hour)
+##------------------------------------------------------------------------------
+
+notification_addressees = ['toedfish@yahoo.com']
+malformed_report_template = '<p>%s</p>'
+
+notification_state_filename = 'Notification State.json'
+notification_rate_limit = 10
+
+geometry_columns = {'Points': 'MULTIPOINT',
+                    'Tracklines': 'MULTILINESTRING',
+                    'Polygons': 'MULTIPOLYGON'}
+
+## WKB multi-geometry and part geometry type codes
+wkb_types = {'MULTIPOINT': (4,1),
+             'MULTILINESTRING': (5,2),
+             'MULTIPOLYGON': (6,3)}
+
+##------------------------------------------------------------------------------
+## Spatial Index - persisted uniform grid index of warning geometries; cell 
+## size in degrees
 ##------------------------------------------------------------------------------
 
-malformed_report_found = False
+spatial_index_filename = 'NGA Maritime Safety Spatial Index.pkl'
+spatial_index_cell_size = 1.0
+
+##------------------------------------------------------------------------------
+## Warning Store - persisted SQLite store of warnings; active warnings with a
+## message DTG older than warning_expiry_days are expired
+##------------------------------------------------------------------------------
+
+warning_store_filename = 'NGA Maritime Safety Warnings.sqlite'
+warning_expiry_days = 180
+
+##------------------------------------------------------------------------------
+## Exception Keywords - Non-Regional reports
+##------------------------------------------------------------------------------
+
+exceptions = ['(NAIS)','COVID','PANDEMIC','IRIDIUM','WARNINGS IN FORCE']
+
+##------------------------------------------------------------------------------
+## Parallel Parsing - minimum number of reports before a process pool is used,
+## number of reports per batch, maximum number of worker processes (None
+## defaults to the number of CPUs) and seconds to wait for all batch results
+## before falling back to serial parsing
+##------------------------------------------------------------------------------
+
+parallel_min_reports = 500
+parallel_batch_size = 100
+parallel_max_workers = None
+parallel_timeout = 300
 
 ##------------------------------------------------------------------------------
 ## Colors
@@ -365,79 +1313,80 @@ corrections = {'JOINING\n': 'JOINING ',
 ## BODY
 ################################################################################
 
-malformed_reports = set()
-regions_found = set()
-output = list()
+tagged_reports = list()
 for url_key,url in urls.items():
 
     print()
     print('Retrieving %s...' % url_key)
     print()
     
-    ## Retrieve NGA Pacific/Atlantic Maritime Safety Broadcast
-    r = requests.get(url)
+    ## Retrieve NGA Pacific/Atlantic Maritime Safety Broadcast; the response is
+    ## streamed and segmented line by line
+    r = requests.get(url, stream = True)
 
     ##--------------------------------------------------------------------------
-    ## Extract cleaned text report and segement into individual reports
-    cleaned_text = re.sub(r'\r','',r.text)
-    reports = [r for r in re.sub(r'. \n','.\n',cleaned_text).split('\n\n') 
-               if r not in ['']]
+    ## Segment into individual reports, skipping the broadcast header, and
+    ## build a report record for each report
+    reports = itertools.islice(segment_reports(iter_response_lines(r)),3,None)
 
-    ##--------------------------------------------------------------------------
-    for report in reports[3:]:
+    tagged_reports += [(url_key,build_report_record(report)) 
+                       for report in reports]
+    
+    r.close()
 
-        ## Scrub text for corrections to enable clean regex extraction
-        for key,val in corrections.items():
-            report = report.replace(key,val)
-        
-        ## Find M/V names in reports based on M/V tag
-        vessels = find_vessels(report)
+##------------------------------------------------------------------------------
+## Parse reports; output keeps the original feed order
+start = time.perf_counter()
+output,malformed_reports,regions_found = parse_reports(tagged_reports)
 
-        ## Extract Non-Regional (Exception Reports) and Regions from reports
-        for exception in ['(NAIS)','COVID','PANDEMIC','IRIDIUM','WARNINGS IN FORCE']:
+print('Parsed %d reports in %.2f seconds' % (len(output),
+                                             time.perf_counter() - start))
 
-            parsed = report[:-3].split('.\n')
-            
-            if exception in report:
-                
-                region = exception
-                
-                print('- Exception Found: %s' % exception)
-                
-                break
-                
-            elif (len(parsed) > 2) and ('WARNINGS IN FORCE' not in report):
+## Malformed Report Found Boolean - Send Notification containing malformed
+## reports
+malformed_report_found = len(malformed_reports) > 0
 
-                region = re.sub(r'\n',' ',parsed[1])
+##------------------------------------------------------------------------------
+## Update and persist the spatial index of active warnings
+spatial_index = load_spatial_index(spatial_index_filename,
+                                   spatial_index_cell_size)
 
-                ## Set of regions found in the data
-                regions_found.add(region)
+index_counts = update_spatial_index(spatial_index,output)
 
-            else:
+##------------------------------------------------------------------------------
+## Update the warning store; only the delta (added, changed, cancelled and
+## expired warnings) and the currently active warnings are output. Warnings
+## the store cancels or expires are removed from the spatial index in the same
+## pass
+formatted = [format_geometries(record) for record in output]
 
-                ## Set malformed_report = True to send notification email
-                malformed_report_found = True
+indexed = len(spatial_index['warnings'])
 
-                malformed_reports.add(report)
-                
-        ## Extract geometries from safety reports
-        points,tracklines,polygons = extract_geometries(report)
-                
-        output.append({'NAV Region': url_key,
-                       'NAV Area': get_nav_id(report),
-                       'Message DTG': extract_dtg(report),
-                       'Cancellation DTG': get_cancellation_date(report),
-                       'Region': region,
-                       'Country': ','.join(get_country(report)),
-                       'Chart': ','.join(get_charts(report)),
-                       'Raw Report': report.strip(),
-                       'Vessels': '; '.join(vessels),
-                       'Points': points,
-                       'Tracklines': tracklines,
-                       'Polygons': polygons
-                       })
-    
-odf = pd.DataFrame(output)
+conn = open_warning_store(warning_store_filename)
+delta = update_warning_store(conn,formatted,spatial_index)
+
+save_spatial_index(spatial_index,spatial_index_filename)
+
+print('Spatial Index: %d warnings (%d added, %d updated, %d removed, %d expired)' % 
+      (len(spatial_index['warnings']),index_counts['Added'],
+       index_counts['Updated'],index_counts['Removed'],
+       indexed - len(spatial_index['warnings'])))
+
+delta_df = pd.DataFrame([dict({'Change': change}, **record) 
+                         for change,record in delta])
+active_df = pd.DataFrame(query_active_warnings(conn))
+
+conn.close()
+
+changes = dict()
+for change,record in delta:
+    changes[change] = changes.get(change,0) + 1
+    
+print('Warning Store: %d active warnings' % len(active_df))
+for change,count in changes.items():
+    print('- %s: %d' % (change,count))
+
+emails = list()
 
 if malformed_report_found:
     
@@ -447,30 +1396,43 @@ if malformed_report_found:
     
     subject = 'Malformed/Unhandled NGA Maritime Safety Reports Encountered'
     
-    poc = 'This automated brewlytics Notification was generated on %s.' % now.strftime('%d %B %Y @ %H%MZ')
+    report_bodies = [''.join([malformed_report_template % mr for mr in mal_rep.split('\n')])
+                     for mal_rep in sorted(malformed_reports)]
     
-    stub = '<h2><b>%s</b></h2>' % subject
-    stub += '<hr>'
-    
-    for mal_rep in malformed_reports:
+    if NotificationAggregator is None:
+        
+        poc = 'This automated brewlytics Notification was generated on %s.' % now.strftime('%d %B %Y @ %H%MZ')
+        
+        stub = ''.join(['<h2><b>%s</b></h2><hr>' % subject] +
+                       ['%s<hr>' % body for body in report_bodies] +
+                       ['<hr><p><center>%s</center></p>' % poc])
         
-        for mr in mal_rep.split('\n'):
-            stub += '''<p>%s</p>''' % mr
-        stub += '<hr>'
+        emails.append({'To': ','.join(notification_addressees),
+                       'CC': ','.join(notification_addressees),
+                       'Subject': subject,
+                       'Body': stub})
         
-    stub += '<hr>'
-    stub += '<p><center>%s</center></p>' % poc
+## Each malformed report is one notification; reports already sent within 
+## the deduplication window are dropped
+if NotificationAggregator is not None:
     
-    email = {'To{string}': 'toedfish@yahoo.com',
-             'CC{string}': 'toedfish@yahoo.com',
-             'Subject{string}': subject,
-             'Body{string}': stub}
-
-    notification = pd.DataFrame([email])
+    aggregator = NotificationAggregator(notification_state_filename,
+                                        rate_limit = notification_rate_limit,
+                                        owner = 'NGA Maritime Safety Broadcast')
+    
+    if malformed_report_found:
+        for body in report_bodies:
+            aggregator.add('NGA Maritime Safety Broadcast',notification_addressees,
+                           'Malformed/Unhandled NGA Maritime Safety Report',body)
+        
+    emails = aggregator.flush()
     
-else:
+    print('Notifications: %d malformed reports queued, %d duplicates, %d deferred; %d emails.' %
+          (aggregator.counts['Added'],aggregator.counts['Duplicates'],
+           aggregator.counts['Deferred'],len(emails)))
     
-    notification = pd.DataFrame([], columns = ['To{string}','CC{string}','Subject{string}','Body{string}'])
+notification = pd.DataFrame(emails, columns = email_columns)
+notification.columns = ['%s{string}' % column for column in notification.columns]
 
 ################################################################################
 ## OUTPUTS
@@ -485,7 +1447,13 @@ notification.to_csv(filename, index = False)
 outputs.resource = filename
 
 ##------------------------------------------------------------------------------
-## OUTPUTS.TABLE
+## OUTPUTS.TABLES[0]: Delta of added, changed, cancelled and expired warnings
+##------------------------------------------------------------------------------
+
+outputs.tables.append(delta_df)
+
+##------------------------------------------------------------------------------
+## OUTPUTS.TABLES[1]: Currently active warnings
 ##------------------------------------------------------------------------------
 
-outputs.table = odf
+outputs.tables.append(active_df)
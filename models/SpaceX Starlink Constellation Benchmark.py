@@ -0,0 +1,197 @@
+################################################################################
+################################################################################
+## SpaceX Starlink Catalog - Serialization Benchmark
+##
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; serializes synthetic catalogs with the
+##              SpaceX Starlink Constellation Dataset Python Script JSON
+##              serializer and reports serialization time and peak memory per
+##              layout against the to_dict/json.dumps baseline; the Records
+##              layout is checked byte-for-byte against the baseline
+##
+################################################################################
+################################################################################
+## USAGE
+##
+## Benchmark the default catalog sizes (5k, 50k and 500k satellites):
+##     python "SpaceX Starlink Constellation Benchmark.py"
+##
+## Benchmark other catalog sizes:
+##     python "SpaceX Starlink Constellation Benchmark.py" --rows 1000 20000
+##
+################################################################################
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+import pandas as pd
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Execute the FUNCTIONS section of the model script (everything before the
+## MODEL DATA banner) and return its namespace
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global model_data_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(model_data_banner)]
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace(tables = list())
+    module.outputs = types.SimpleNamespace(tables = list())
+    module.__all__ = ['inputs','outputs']
+    sys.modules['brewlytics'] = module
+
+    namespace = {'__name__': 'starlink_model'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic catalog in output column order; names include non-ASCII and %
+## characters and Status includes missing values so escaping is exercised
+##------------------------------------------------------------------------------
+def synthetic_catalog(rows):
+
+    global column_order
+
+    norad_ids = range(44235,44235 + rows)
+    launch_dates = ['20%02d-%02d-%02d' % (19 + (i // 300) % 8,1 + (i // 25) % 12,
+                                          1 + i % 28) for i in range(rows)]
+
+    tdf = pd.DataFrame({'Name': ['STARLINK-%d' % (1000 + i) if i % 97 else
+                                 'STARLINK-%d (Ünïcode %%s)' % (1000 + i)
+                                 for i in range(rows)],
+                        'COSPAR Id': [d[:4] + '-%03d' % (i % 300)
+                                      for i,d in enumerate(launch_dates)],
+                        'NORAD ID': list(norad_ids),
+                        "Int'l Code": [d[:4] + '-%03d%s' % (i % 300,chr(65 + i % 26))
+                                       for i,d in enumerate(launch_dates)],
+                        'Launch Date': launch_dates,
+                        'Status': [None if i % 501 == 0 else
+                                   ('IN ORBIT' if i % 7 else 'DECAYED')
+                                   for i in range(rows)],
+                        'Operator': 'SpaceX',
+                        'Source': 'N2YO.com',
+                        'Source URL': ['https://www.n2yo.com/database/?m=%s&d=%s&y=%s#results' %
+                                       (d[5:7],d[8:],d[:4]) for d in launch_dates],
+                        'Date Retrieved': '2026-10-19',
+                        'Classification': 'Unclassified'})
+
+    return tdf[column_order]
+
+##------------------------------------------------------------------------------
+## Run a serializer twice: timed without tracing, then under tracemalloc for 
+## peak memory; returns the output, elapsed seconds and peak traced memory (MB)
+##------------------------------------------------------------------------------
+def measure(serializer):
+
+    start = time.perf_counter()
+    output = serializer()
+    elapsed = time.perf_counter() - start
+
+    del output
+
+    tracemalloc.start()
+    output = serializer()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    return output,elapsed,peak
+
+def benchmark(namespace,rows,chunk_size):
+
+    iter_catalog_json = namespace['iter_catalog_json']
+    root = 'SpaceX Starlink Catalog'
+
+    tdf = synthetic_catalog(rows)
+
+    serializers = [('Baseline',lambda: json.dumps({root: tdf.to_dict(orient = 'records')})),
+                   ('Records',lambda: ''.join(iter_catalog_json(tdf,root,'Records',chunk_size))),
+                   ('Columnar',lambda: ''.join(iter_catalog_json(tdf,root,'Columnar',chunk_size))),
+                   ('NDJSON',lambda: ''.join(iter_catalog_json(tdf,root,'NDJSON',chunk_size))),
+                   ('Records (streamed)',lambda: sum(len(chunk) for chunk in
+                                                     iter_catalog_json(tdf,root,'Records',chunk_size)))]
+
+    results = list()
+    for layout,serializer in serializers:
+
+        output,elapsed,peak = measure(serializer)
+        results.append({'Rows': rows,
+                        'Layout': layout,
+                        'Time (s)': round(elapsed,3),
+                        'Peak Memory (MB)': round(peak,1),
+                        'Size (MB)': round((output if isinstance(output,int)
+                                            else len(output)) / 1e6,1)})
+
+        if layout == 'Baseline':
+            baseline = output
+
+        elif layout == 'Records':
+            if output != baseline:
+                raise AssertionError('Records layout differs from baseline at %d rows' % rows)
+
+        elif layout == 'Columnar':
+            decoded = json.loads(output)[root]
+            if len(decoded['data'][0]) != rows:
+                raise AssertionError('Columnar layout row count mismatch at %d rows' % rows)
+
+        elif layout == 'NDJSON':
+            if [json.loads(line) for line in output.splitlines()] != json.loads(baseline)[root]:
+                raise AssertionError('NDJSON layout differs from baseline at %d rows' % rows)
+
+    return results
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+model_data_banner = '################################################################################\n## MODEL DATA'
+
+column_order = ['Name','COSPAR Id','NORAD ID',"Int'l Code",'Launch Date',
+                'Status','Operator','Source','Source URL','Date Retrieved',
+                'Classification']
+
+default_script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'SpaceX Starlink Constellation Dataset.py')
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark the SpaceX Starlink catalog JSON serializer')
+    parser.add_argument('--rows', type = int, nargs = '+', default = [5000,50000,500000],
+                        help = 'catalog sizes to serialize')
+    parser.add_argument('--chunk-size', type = int, default = 10000,
+                        help = 'rows serialized per chunk')
+    parser.add_argument('--script', default = default_script,
+                        help = 'model script to benchmark')
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+
+    results = list()
+    for rows in args.rows:
+        results.extend(benchmark(namespace,rows,args.chunk_size))
+
+    print(pd.DataFrame(results).to_string(index = False))
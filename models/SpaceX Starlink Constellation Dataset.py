@@ -4,7 +4,7 @@
 ## Manage SpaceX Starlink Catalog; Update from N2YO.com API
 ## Author: K. Chadwick/N-ask
 ## Created: 04 April 2020
-## Updated: 26 September 2022
+## Updated: 19 October 2026
 ## 
 ################################################################################
 ################################################################################
@@ -25,16 +25,52 @@
 ## 2022-03-09 - Updated the Python Script to use the new brewlytics Define 
 ##              Python Script functional
 ## 2022-09-26 - Fixed bugs in alternate workflow
+## 2026-10-19 - Launch pages are retrieved concurrently over a pooled session
+##              with a concurrency cap, token-bucket rate limit, per-request
+##              timeout and retries; per-launch latency and failures are
+##              reported instead of silently returning an empty dataset
+## 2026-10-19 - Added an on-disk launch cache keyed by launch date and API URL
+##              with a short TTL for recent launches, a long TTL for older
+##              launches and per-date forced refresh; summary lists cache hits
+##              and misses
+## 2026-10-19 - Catalog indexed by NORAD ID and Launch Date; retrieved launches
+##              are upsert merged into the persisted catalog (inserted, updated
+##              in place, unchanged) instead of concatenated, fixing new launch
+##              dates always being detected as new; a complete refresh drops
+##              launch dates no longer in the model data
+## 2026-10-19 - Replaced pd.read_html with a streaming extractor that locates
+##              the N2YO results table by its header signature and parses only
+##              its rows
+## 2026-10-19 - Catalog persisted as a compressed, dictionary-encoded Parquet
+##              file seeded from the persisted dataset; keyword, operator and 
+##              launch date filters are pushed down to the columnar reader
+## 2026-10-19 - JSON output serialized column-wise in chunks without per-row
+##              dicts, with optional Columnar and NDJSON layouts and streaming
+##              to a file; existing Records output is byte-identical
 ################################################################################
 ################################################################################
 
 from brewlytics import *
 
+import hashlib
 import json
+import os
 import pandas as pd
+import pickle
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import re
+import requests
+import threading
+import time
 
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime,timedelta
+from json.encoder import encode_basestring_ascii
+from lxml import etree
+from requests.adapters import HTTPAdapter
 
 ################################################################################
 ################################################################################
@@ -70,37 +106,500 @@ def remove_group_launches(tdf):
     
     return tdf[~tdf['Name'].str.contains('GROUP')]
 
-def get_dataset(launch):
+##------------------------------------------------------------------------------
+## RESULTS TABLE EXTRACTOR: the launch page is streamed into an incremental 
+## HTML parser that only reports table rows; the results table is located by 
+## its header signature rather than its position on the page and only its rows
+## are kept. Reading stops once the results table is closed
+def table_of(element):
+    
+    return next(element.iterancestors('table'), None)
+
+## Cell text is whitespace-normalised; a cell spanning several columns is
+## repeated for each column, as pd.read_html did
+def row_cells(row):
+    
+    cells = list()
+    for cell in row:
+        if cell.tag in ['td','th']:
+            
+            try:
+                span = max(int(cell.get('colspan',1)),1)
+            except ValueError:
+                span = 1
+                
+            cells += [' '.join(''.join(cell.itertext()).split())] * span
+            
+    return cells
+
+def extract_results_table(response):
+    
+    global results_signature
+    
+    signature = [column_name.lower() for column_name in results_signature]
     
-    global df, api_url, now_str, operator
+    parser = etree.HTMLPullParser(events = ('end',), tag = ('tr','table'))
     
-    ## Read in data from source
-    try:
-        tdf = pd.read_html(api_url % launch)[2]
+    if response.encoding is None:
+        response.encoding = 'utf-8'
         
-        ## Clean up data and column names from source
-        if 'Action' in tdf.columns:
-            tdf.drop(['Action'], axis = 1, inplace = True)
+    target = None
+    rows = list()
+    
+    for chunk in response.iter_content(chunk_size = 16384, decode_unicode = True):
+        
+        parser.feed(chunk)
+        
+        for event,element in parser.read_events():
+            
+            if element.tag == 'table':
+                
+                if element is target:
+                    return rows
+                
+            elif target is None:
+                
+                cells = row_cells(element)
+                
+                if [c.lower() for c in cells[:len(signature)]] == signature:
+                    target = table_of(element)
+                    
+            elif table_of(element) is target:
+                
+                cells = row_cells(element)
+                
+                ## Short (ragged) rows are padded to the signature
+                if cells:
+                    rows.append((cells + [None] * len(signature))[:len(signature)])
+                    
+                element.clear()
+                
+    if target is None:
+        raise ValueError('N2YO results table not found')
+        
+    return rows
 
-        tdf.columns = ['Name','NORAD ID',"Int'l Code",'Launch Date','Status']
+def get_dataset(launch,rows):
+    
+    global api_url, now_str, operator
+    
+    ## Typed dataset from the extracted results table rows
+    tdf = pd.DataFrame(rows, columns = ['Name','NORAD ID',"Int'l Code",
+                                       'Launch Date','Status'])
+    
+    ## Rows without a NORAD ID (e.g. a note spanning the table) are skipped
+    tdf['NORAD ID'] = pd.to_numeric(tdf['NORAD ID'], errors = 'coerce')
+    tdf = tdf.dropna(subset = ['NORAD ID'])
+    tdf['NORAD ID'] = tdf['NORAD ID'].astype('int64')
+
+    tdf['Operator'] = operator
 
-        tdf['Operator'] = operator
+    ## Add Data provenance information
+    tdf['Source'] = 'N2YO.com'
+    tdf['Source URL'] = api_url % launch
+    tdf['Date Retrieved'] = now_str
+    tdf['Classification'] = 'Unclassified'
 
-        ## Add Data provenance information
-        tdf['Source'] = 'N2YO.com'
-        tdf['Source URL'] = api_url % launch
-        tdf['Date Retrieved'] = now_str
-        tdf['Classification'] = 'Unclassified'
+    ## Filter out Grouped launch data
+    return remove_group_launches(tdf).copy()
 
-        ## Filter out Grouped launch data
-        filtered = remove_group_launches(tdf).copy()
+##------------------------------------------------------------------------------
+## CATALOG STORE: the catalog is indexed by NORAD ID (as a string key) with a 
+## secondary index of Launch Date to NORAD IDs, giving O(1) membership checks
+## for satellites and launch dates
+def index_catalog(tdf):
+    
+    catalog = tdf.copy()
+    catalog.index = catalog['NORAD ID'].astype(str)
+    
+    ## Keep the most recent row of any duplicated NORAD ID
+    catalog = catalog[~catalog.index.duplicated(keep = 'last')]
+    
+    return catalog
 
-    except:
+def launch_date_index(catalog):
+    
+    return {launch_date: set(norad_ids) 
+            for launch_date,norad_ids in catalog.groupby('Launch Date').groups.items()}
+
+## Upsert merge of retrieved launch datasets into the catalog; new NORAD IDs
+## are inserted, rows whose catalog values changed (e.g. Status) are updated in
+## place and the remaining rows are left unchanged. Returns the merged catalog
+## and the inserted, updated and unchanged counts of the retrieved rows
+def upsert_catalog(catalog,updates):
+    
+    global merge_columns
+    
+    updates = index_catalog(updates)
+    
+    existing = updates.index.isin(catalog.index)
+    inserted = updates[~existing]
+    candidates = updates[existing]
+    
+    columns = [column for column in catalog.columns if column in updates.columns]
+    
+    current = catalog.loc[candidates.index,merge_columns].astype(str)
+    changed = (candidates[merge_columns].astype(str) != current).any(axis = 1)
+    
+    updated = candidates[changed]
+    catalog.loc[updated.index,columns] = updated[columns]
+    
+    catalog = pd.concat([catalog,inserted])
+    
+    counts = {'Inserted': len(inserted),
+              'Updated': len(updated),
+              'Unchanged': len(candidates) - len(updated),
+              'Removed': 0}
+    
+    return catalog,counts
+
+##------------------------------------------------------------------------------
+## COLUMNAR CATALOG: the catalog is persisted as a compressed Parquet file 
+## sorted by Launch Date, with dictionary-encoded Name, Status, Operator and 
+## Source columns and per row group statistics. Readers project only the 
+## columns they need and push keyword, operator and launch date predicates 
+## down to the scan so row groups outside the launch date range are skipped
+def write_catalog(catalog,filename):
+    
+    global catalog_columns, catalog_compression, catalog_row_group_size
+    global dictionary_columns
+    
+    tdf = catalog.reset_index(drop = True)[catalog_columns].copy()
+    tdf['NORAD ID'] = pd.to_numeric(tdf['NORAD ID'])
+    tdf = tdf.sort_values(['Launch Date','NORAD ID'])
+    
+    table = pa.Table.from_pandas(tdf, preserve_index = False)
+    
+    ## Write then rename so an interrupted write never leaves a partial catalog
+    pq.write_table(table, filename + '.tmp', 
+                   compression = catalog_compression,
+                   use_dictionary = dictionary_columns,
+                   row_group_size = catalog_row_group_size,
+                   write_statistics = True)
+    os.replace(filename + '.tmp',filename)
+
+def catalog_predicate(keywords,operators,launch_window):
+    
+    global null_list
+    
+    ## Filter out Grouped launch data
+    predicate = ~pc.match_substring(ds.field('Name'),'GROUP')
+    
+    if keywords:
+        predicate = predicate & pc.match_substring_regex(ds.field('Name'),
+                                                         '|'.join(keywords))
+        
+    if operators:
+        predicate = predicate & ds.field('Operator').isin(operators)
+        
+    start,end = launch_window
+    
+    if start not in null_list:
+        predicate = predicate & (ds.field('Launch Date') >= start)
+        
+    if end not in null_list:
+        predicate = predicate & (ds.field('Launch Date') <= end)
+        
+    return predicate
+
+def read_catalog(filename, columns = None, predicate = None):
+    
+    dataset = ds.dataset(filename, format = 'parquet')
+    
+    return dataset.to_table(columns = columns, filter = predicate).to_pandas()
+
+##------------------------------------------------------------------------------
+## CATALOG SERIALIZATION: the catalog is serialized column-wise without 
+## building a dict per satellite; each chunk of rows is encoded one column at a
+## time and records are formatted from a template holding the pre-encoded keys.
+## The document is yielded in chunks so it can be streamed to a file. Layouts:
+## - Records: {root: [{column: value, ...}, ...]}, byte-identical to json.dumps
+##   of the to_dict(orient = 'records') catalog
+## - Columnar: {root: {"columns": [...], "data": [[column values], ...]}}
+## - NDJSON: one record per line
+def encode_column(values):
+    
+    return [encode_basestring_ascii(v) if isinstance(v,str) else json.dumps(v) 
+            for v in values]
+
+def record_template(columns):
+    
+    return '{' + ', '.join(encode_basestring_ascii(column).replace('%','%%') + ': %s' 
+                           for column in columns) + '}'
+
+def iter_catalog_json(tdf, root, layout = 'Records', chunk_size = 10000):
+    
+    columns = list(tdf.columns)
+    template = record_template(columns)
+    
+    chunks = range(0,len(tdf),chunk_size)
+    
+    def encoded_rows(start):
+        
+        chunk = tdf.iloc[start:start + chunk_size]
+        encoded = [encode_column(chunk[column].tolist()) for column in columns]
+        
+        return [template % values for values in zip(*encoded)]
+    
+    if layout == 'NDJSON':
+        
+        for start in chunks:
+            yield '\n'.join(encoded_rows(start)) + '\n'
+            
+    elif layout == 'Columnar':
+        
+        yield '{%s: {"columns": %s, "data": [' % (encode_basestring_ascii(root),
+                                                  json.dumps(columns))
+        
+        for i,column in enumerate(columns):
+            
+            yield ', [' if i else '['
+            
+            for start in chunks:
+                values = encode_column(tdf[column].iloc[start:start + chunk_size].tolist())
+                yield (', ' if start else '') + ', '.join(values)
+                
+            yield ']'
+            
+        yield ']}}'
+        
+    else:
+        
+        yield '{%s: [' % encode_basestring_ascii(root)
+        
+        for start in chunks:
+            yield (', ' if start else '') + ', '.join(encoded_rows(start))
+            
+        yield ']}'
+
+##------------------------------------------------------------------------------
+## Token bucket rate limiter shared by the fetch threads; tokens refill at rate
+## per second up to capacity
+class TokenBucket(object):
+    
+    def __init__(self,rate,capacity):
+        
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        
+    def acquire(self):
+        
+        while True:
+            
+            with self.lock:
+                
+                now = time.monotonic()
+                self.tokens = min(self.capacity,
+                                  self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait = (1 - self.tokens) / self.rate
+                
+            time.sleep(wait)
+
+##------------------------------------------------------------------------------
+## Retrieve and parse a single launch page; each attempt waits for a rate limit
+## token and has its own timeout; connection errors, timeouts, 5xx and 429
+## responses are retried with exponential backoff. Returns the launch dataset and a fetch report
+def fetch_launch(session,bucket,launch):
+    
+    global api_url, df, fetch_retries, fetch_timeout
+    
+    url = api_url % launch
+    start = time.perf_counter()
+    
+    error = None
+    for attempt in range(1,fetch_retries + 2):
+        
+        bucket.acquire()
+        
+        try:
+            
+            with session.get(url, timeout = fetch_timeout, stream = True) as r:
+                
+                r.raise_for_status()
+                
+                rows = extract_results_table(r)
+            
+            dataset = get_dataset(launch,rows)
+            error = None
+            
+            break
+            
+        except requests.RequestException as e:
+            
+            error = '%s: %s' % (type(e).__name__,e)
+            
+            ## Client errors other than 429 Too Many Requests are not retried
+            status = getattr(e.response,'status_code',None)
+            if status and (status < 500) and (status != 429):
+                break
+            
+            if attempt <= fetch_retries:
+                time.sleep(2 ** (attempt - 1))
+                
+        ## Page layout/parsing errors are not retried
+        except Exception as e:
+            
+            error = '%s: %s' % (type(e).__name__,e)
+            
+            break
+                
+    if error:
         
         ## Create an empty dataframe
-        filtered = pd.DataFrame([], columns = df.columns)
+        dataset = pd.DataFrame([], columns = df.columns)
         
-    return filtered
+    report = {'Launch': '-'.join(launch),
+              'Status': 'Failed' if error else 'OK',
+              'Attempts': attempt,
+              'Satellites': len(dataset),
+              'Latency (s)': round(time.perf_counter() - start,3),
+              'Error': error or ''}
+    
+    return dataset,report
+
+##------------------------------------------------------------------------------
+## LAUNCH CACHE: on-disk cache of the parsed, GROUP-filtered dataset of each
+## launch keyed by launch date and API URL; recent launches expire after a
+## short TTL while their TLEs are still being assigned, older launches after a
+## long TTL
+def cache_filename(launch):
+    
+    global api_url, cache_directory
+    
+    key = '%s|%s' % (api_url,'-'.join(launch))
+    
+    return os.path.join(cache_directory,
+                        '%s.pkl' % hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+def cache_ttl(launch):
+    
+    global cache_recent_days, cache_recent_ttl, cache_ttl_days, now
+    
+    launch_date = datetime.strptime('-'.join(launch),'%m-%d-%Y')
+    
+    if (now - launch_date) <= timedelta(days = cache_recent_days):
+        return timedelta(hours = cache_recent_ttl)
+    else:
+        return timedelta(days = cache_ttl_days)
+
+## Returns the cached dataset of a launch, or None if it is not cached, has
+## expired or a refresh is forced for the launch date
+def read_cache(launch):
+    
+    global api_url, force_refresh, now
+    
+    filename = cache_filename(launch)
+    
+    if ('-'.join(launch) in force_refresh) or (not os.path.exists(filename)):
+        return None
+    
+    with open(filename,'rb') as f:
+        entry = pickle.load(f)
+        
+    if (entry['API URL'] != api_url) or (now - entry['Cached'] > cache_ttl(launch)):
+        return None
+    
+    return entry['Dataset']
+
+def write_cache(launch,dataset):
+    
+    global api_url, cache_directory, now
+    
+    os.makedirs(cache_directory, exist_ok = True)
+    
+    entry = {'API URL': api_url,
+             'Launch': '-'.join(launch),
+             'Cached': now,
+             'Dataset': dataset}
+    
+    with open(cache_filename(launch),'wb') as f:
+        pickle.dump(entry,f)
+
+##------------------------------------------------------------------------------
+## Retrieve all launches; cached launches are read from the launch cache and
+## the remaining launch pages are retrieved concurrently over a pooled session
+## and cached. Datasets are returned in launch order with a per-launch fetch
+## report
+def fetch_launches(launches):
+    
+    global fetch_concurrency, fetch_rate_limit
+    
+    cached = {launch: read_cache(launch) for launch in launches}
+    misses = [launch for launch in launches if cached[launch] is None]
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections = 1, 
+                          pool_maxsize = fetch_concurrency)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    
+    bucket = TokenBucket(fetch_rate_limit,max(1,fetch_concurrency))
+    
+    with ThreadPoolExecutor(max_workers = fetch_concurrency) as executor:
+        fetched = dict(zip(misses,
+                           executor.map(lambda launch: fetch_launch(session,bucket,launch),
+                                        misses)))
+        
+    session.close()
+    
+    datasets,reports = list(),list()
+    for launch in launches:
+        
+        if launch in fetched:
+            
+            dataset,report = fetched[launch]
+            report['Cache'] = 'Miss'
+            
+            if report['Status'] == 'OK':
+                write_cache(launch,dataset)
+                
+        else:
+            
+            dataset = cached[launch]
+            report = {'Launch': '-'.join(launch),
+                      'Status': 'OK',
+                      'Attempts': 0,
+                      'Satellites': len(dataset),
+                      'Latency (s)': 0.0,
+                      'Error': '',
+                      'Cache': 'Hit'}
+            
+        datasets.append(dataset)
+        reports.append(report)
+        
+    reports = pd.DataFrame(reports, columns = ['Launch','Status','Attempts',
+                                               'Satellites','Latency (s)',
+                                               'Error','Cache'])
+    
+    for idx in reports.index:
+        print('- %s: %s (cache %s), %d satellites in %.2fs' % tuple(reports.loc[idx,['Launch','Status','Cache','Satellites','Latency (s)']]))
+        
+    failed = reports[reports['Status'] == 'Failed']
+    hits = reports[reports['Cache'] == 'Hit']
+    misses = reports[reports['Cache'] == 'Miss']
+    
+    print('Retrieved %d launches (%d cache hits, %d cache misses, %d failed)' % 
+          (len(reports),len(hits),len(misses),len(failed)))
+    
+    if len(misses):
+        print('Fetch latency: median %.2fs, max %.2fs' % 
+              (misses['Latency (s)'].median(),misses['Latency (s)'].max()))
+    
+    for idx in failed.index:
+        print('- FAILED %s after %d attempts: %s' % (failed.loc[idx,'Launch'],
+                                                    failed.loc[idx,'Attempts'],
+                                                    failed.loc[idx,'Error']))
+        
+    return datasets,reports
     
 ################################################################################
 ################################################################################
@@ -135,12 +634,69 @@ launch_dates = [tuple(launch.split('-')) for launch in md['Launch Dates']]
 # api_url = 'https://www.n2yo.com/database/?m=%s&d=%s&y=%s#results'
 api_url = md['API URL']
 
+##------------------------------------------------------------------------------
+## Fetch settings: concurrency cap, rate limit (requests/second), per-request
+## timeout (seconds) and retries per launch
+##------------------------------------------------------------------------------
+
+fetch_concurrency = md.get('Fetch Concurrency',4)
+fetch_rate_limit = md.get('Fetch Rate Limit (Requests/Second)',2.0)
+fetch_timeout = md.get('Fetch Timeout (Seconds)',30)
+fetch_retries = md.get('Fetch Retries',3)
+
+##------------------------------------------------------------------------------
+## Launch cache settings: cache directory, TTL (hours) for launches within the
+## recent launch window (days), TTL (days) for older launches and launch dates
+## (MM-DD-YYYY) to refresh regardless of the cache
+##------------------------------------------------------------------------------
+
+cache_directory = md.get('Cache Directory','N2YO Launch Cache')
+cache_recent_days = md.get('Cache Recent Launch Window (Days)',60)
+cache_recent_ttl = md.get('Cache TTL Recent Launches (Hours)',12)
+cache_ttl_days = md.get('Cache TTL (Days)',90)
+force_refresh = set(md.get('Force Refresh Launch Dates',[]))
+
+##------------------------------------------------------------------------------
+## N2YO results table header signature
+##------------------------------------------------------------------------------
+
+results_signature = ['Name','NORAD ID',"Int'l Code",'Launch Date','Status']
+
+##------------------------------------------------------------------------------
+## Catalog columns compared by the upsert merge to detect updated satellites
+##------------------------------------------------------------------------------
+
+merge_columns = ['Name',"Int'l Code",'Launch Date','Status','Operator']
+
+##------------------------------------------------------------------------------
+## Columnar catalog store: Parquet filename, compression codec, rows per row 
+## group, stored columns and dictionary-encoded columns
+##------------------------------------------------------------------------------
+
+catalog_filename = md.get('Catalog Filename','SpaceX Starlink Catalog.parquet')
+catalog_compression = md.get('Catalog Compression','zstd')
+catalog_row_group_size = md.get('Catalog Row Group Size',5000)
+
+catalog_columns = ['Name','NORAD ID',"Int'l Code",'Launch Date','Status',
+                   'Operator','Source','Source URL','Date Retrieved',
+                   'Classification']
+dictionary_columns = ['Name','Status','Operator','Source']
+
 ##------------------------------------------------------------------------------
 ## NULL List: Null List to compare against Keywords List
 ##------------------------------------------------------------------------------
 
 null_list = ['----','None',None]
 
+##------------------------------------------------------------------------------
+## JSON output: layout (Records, Columnar or NDJSON), rows serialized per chunk
+## and optional filename the catalog is streamed to
+##------------------------------------------------------------------------------
+
+json_layout = md.get('JSON Layout','Records')
+json_chunk_size = md.get('JSON Chunk Size',10000)
+json_filename = md.get('JSON Filename','----')
+
 ##------------------------------------------------------------------------------
 ## Output_Table Column Order
 ##------------------------------------------------------------------------------
@@ -168,10 +724,25 @@ df = inputs.tables[0].copy()
 df.columns,cv_types = extract_cv_types(df)
 
 ##==============================================================================
-## Filter out Grouped launch data
+## Seed the columnar catalog from the persisted dataset on the first run; 
+## Grouped launch data is filtered out
+##==============================================================================
+
+if not os.path.exists(catalog_filename):
+    
+    print('Seeding columnar catalog %s from persisted dataset' % catalog_filename)
+    
+    df = df[~df['Name'].str.contains('GROUP')].copy()
+    write_catalog(index_catalog(df),catalog_filename)
+    
+##==============================================================================
+## Index the columnar catalog by NORAD ID and Launch Date; only these two 
+## columns are read
 ##==============================================================================
 
-df = df[~df['Name'].str.contains('GROUP')].copy()
+launch_index = launch_date_index(index_catalog(read_catalog(catalog_filename, 
+                                                            columns = ['NORAD ID','Launch Date'])))
+catalog_size = sum(len(norad_ids) for norad_ids in launch_index.values())
 
 ##==============================================================================
 ## Determine if there are new launch dates not currently in the persisted 
@@ -184,7 +755,7 @@ md_launch_dates = {datetime.strptime(launch,mdy).strftime(ymd)
 
 ## List comprehension to create a list of launch dates not in the aggregated 
 ## dataset
-new_launch_dates = [ld for ld in md_launch_dates if ld not in df['Launch Date']]
+new_launch_dates = sorted([ld for ld in md_launch_dates if ld not in launch_index])
 
 ##==============================================================================
 ## UPDATE DATASET: A BOOLEAN True or False to force a complete refresh 
@@ -194,17 +765,24 @@ new_launch_dates = [ld for ld in md_launch_dates if ld not in df['Launch Date']]
 if (md['Update Dataset']):
 
     print('Updating dataset ...')
+    print('Retrieving %s launch data for %d launches' % (md['Operator'],
+                                                         len(launch_dates)))
     
-    ## For loop to grab data and create CSV
-    starlink = list()
-    for launch in launch_dates:
-    
-        print('Retrieving %s launch data for %s' % (md['Operator'],launch))
-
-        ## Read in data from API and append to list for contcatenation
-        starlink.append(get_dataset(launch))
+    ## Read in data from API and merge into the catalog; a complete refresh
+    ## also drops the satellites of launch dates no longer in the model data
+    starlink,fetch_reports = fetch_launches(launch_dates)
 
-    constellation = pd.concat(starlink)
+    catalog = index_catalog(read_catalog(catalog_filename))
+    
+    configured = catalog['Launch Date'].isin(md_launch_dates)
+    catalog = catalog[configured]
+    
+    catalog,merge_counts = upsert_catalog(catalog,pd.concat(starlink))
+    merge_counts['Removed'] = int((~configured).sum())
+    
+    write_catalog(catalog,catalog_filename)
+    
+    catalog_size = len(catalog)
 
 ##==============================================================================
 ## Automatically update dataset when a launch date not in the persisted dataset
@@ -215,16 +793,22 @@ elif (md['Auto Update Dataset When New Launch Dates Added']) and (new_launch_dat
         
     print('New Launch Date(s) being added to dataset...')
     
-    starlink = [df]
+    launches = list()
     for launch in new_launch_dates:
         
         print('Retrieving %s launch data for %s' % (md['Operator'],launch))
         
-        ## Read in data from API and append to list for contcatenation
         yyyy,mm,dd = launch.split('-')
-        starlink.append(get_dataset((mm,dd,yyyy)))
+        launches.append((mm,dd,yyyy))
+        
+    ## Read in data from API and merge into the catalog
+    starlink,fetch_reports = fetch_launches(launches)
         
-    constellation = pd.concat(starlink)
+    catalog = index_catalog(read_catalog(catalog_filename))
+    catalog,merge_counts = upsert_catalog(catalog,pd.concat(starlink))
+    write_catalog(catalog,catalog_filename)
+    
+    catalog_size = len(catalog)
 
 ##==============================================================================
 ## Use the persisted dataset
@@ -233,23 +817,32 @@ elif (md['Auto Update Dataset When New Launch Dates Added']) and (new_launch_dat
 else:
     
     print('Using persisted Starlink catalog')
-    constellation = df.copy()
+    merge_counts = {'Inserted': 0,'Updated': 0,'Unchanged': 0,'Removed': 0}
     
 ##------------------------------------------------------------------------------
-## KEYWORD FILTER TERMS: Keyword filter of dataset
+## KEYWORD FILTER TERMS: Keyword filter of dataset; OPERATOR FILTER TERMS and
+## LAUNCH DATE WINDOW (YYYY-MM-DD start and end) optionally restrict the 
+## dataset further. All filters are pushed down to the columnar catalog reader
 ##------------------------------------------------------------------------------
 
 tag = 'Keyword Filter Terms'
 keywords = [keyword for keyword in md[tag] if keyword not in null_list]
 
-constellation = constellation[constellation['Name'].str.contains('|'.join(keywords))]
+tag = 'Operator Filter Terms'
+operators = [op for op in md.get(tag,[]) if op not in null_list]
+
+launch_window = md.get('Launch Date Window',['----','----'])
+
+constellation = read_catalog(catalog_filename, 
+                             predicate = catalog_predicate(keywords,operators,
+                                                           launch_window))
     
 ##------------------------------------------------------------------------------
-## Add COSPAR Id to dataset
+## Add COSPAR Id to dataset; derived for all rows so merged rows retrieved
+## from the source are also populated
 ##------------------------------------------------------------------------------
 
-if 'COSPAR Id' not in constellation.columns:
-    constellation['COSPAR Id'] = constellation["Int'l Code"].apply(lambda t: re.sub(r'[A-Z]*','',t))
+constellation['COSPAR Id'] = constellation["Int'l Code"].apply(lambda t: re.sub(r'[A-Z]*','',t))
     
 ################################################################################
 ################################################################################
@@ -258,24 +851,41 @@ if 'COSPAR Id' not in constellation.columns:
 ##------------------------------------------------------------------------------
 ## OUTPUTS.TABLE[0]: Concatenate dataframes into a single dataframe
 ##------------------------------------------------------------------------------
-outputs.table = constellation[column_order].rename(columns = cv_types)
+outputs.table = constellation[column_order].reset_index(drop = True).rename(columns = cv_types)
 
 ##------------------------------------------------------------------------------
 ## OUTPUTS.LIST[0]: List of NORAD Catalog Ids
 ##------------------------------------------------------------------------------
-outputs.list = sorted([str(norad_id) for norad_id in constellation['NORAD ID']])
+outputs.list = constellation['NORAD ID'].astype(str).sort_values().tolist()
 
 ##------------------------------------------------------------------------------
-## OUTPUTS.STRING[0]: JSON-formatted string of SpaceX Starlink Catalog
+## OUTPUTS.STRING[0]: JSON-formatted string of SpaceX Starlink Catalog; when a
+## JSON Filename is provided the catalog is instead streamed to the file and
+## output as OUTPUTS.RESOURCE
 ##------------------------------------------------------------------------------
-catalog = {'SpaceX Starlink Catalog': constellation[column_order].to_dict(orient = 'records')}
-outputs.string = json.dumps(catalog)
+json_chunks = iter_catalog_json(constellation[column_order],
+                                'SpaceX Starlink Catalog',
+                                layout = json_layout,
+                                chunk_size = json_chunk_size)
+
+if json_filename not in null_list:
+    
+    with open(json_filename,'w') as f:
+        f.writelines(json_chunks)
+        
+    outputs.resource = json_filename
+    
+else:
+    outputs.string = ''.join(json_chunks)
 
 ################################################################################
 ################################################################################
 ## SUMMARY
 
 print('')
+print('Catalog Merge: %d inserted, %d updated, %d unchanged, %d removed; %d in catalog' % 
+      (merge_counts['Inserted'],merge_counts['Updated'],merge_counts['Unchanged'],
+       merge_counts['Removed'],catalog_size))
 print('Dataset Shape: %d rows %d columns' % constellation[column_order].shape)
 print('Column Names:\n\n- ' + '\n- '.join(constellation[column_order].columns))
 
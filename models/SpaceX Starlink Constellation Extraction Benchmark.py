@@ -0,0 +1,215 @@
+################################################################################
+################################################################################
+## SpaceX Starlink Catalog - Results Table Extraction Benchmark
+##
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; extracts the results table from synthetic
+##              N2YO launch pages with the SpaceX Starlink Constellation
+##              Dataset Python Script streaming extractor and reports
+##              extraction time and peak memory against the previous
+##              pd.read_html path; the extracted rows are checked against the
+##              read_html table
+##
+################################################################################
+################################################################################
+## USAGE
+##
+## Benchmark the default page sizes (200, 2,000 and 20,000 result rows):
+##     python "SpaceX Starlink Constellation Extraction Benchmark.py"
+##
+## Benchmark other page sizes:
+##     python "SpaceX Starlink Constellation Extraction Benchmark.py" --rows 500 5000
+##
+################################################################################
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+import types
+
+import pandas as pd
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Execute the FUNCTIONS section of the model script (everything before the
+## MODEL DATA banner) and the results table signature from its MODEL DATA, and
+## return its namespace
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global model_data_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(model_data_banner)]
+    definitions += re.search(r'^results_signature = .*$',source,re.MULTILINE).group(0)
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace(tables = list())
+    module.outputs = types.SimpleNamespace(tables = list())
+    module.__all__ = ['inputs','outputs']
+    sys.modules['brewlytics'] = module
+
+    namespace = {'__name__': 'starlink_model'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic N2YO launch page: navigation and search form tables ahead of the
+## results table (with its Action column), and footer content and scripts
+## after it, as on the live page
+##------------------------------------------------------------------------------
+def synthetic_page(rows):
+
+    cells = list()
+    for i in range(rows):
+
+        name = 'STARLINK-%d' % (1000 + i) if i % 61 else 'STARLINK GROUP %d' % i
+        cells.append('<tr><td><a href="/satellite/?s=%d">%s</a></td><td>%d</td>'
+                     '<td>2026-%03d%s</td><td>2026-10-19</td><td>%s</td>'
+                     '<td><a href="/?s=%d">Track it</a></td></tr>' %
+                     (44235 + i,name,44235 + i,i // 26,chr(65 + i % 26),
+                      'IN ORBIT' if i % 7 else 'DECAYED',44235 + i))
+
+    navigation = ''.join('<tr><td><a href="/section/%d">Section %d</a></td></tr>' % (i,i)
+                         for i in range(40))
+    form = ''.join('<tr><td>Field %d</td><td><input name="f%d"></td></tr>' % (i,i)
+                   for i in range(12))
+    footer = ''.join('<p>Footer paragraph %d with links and notices.</p>' % i
+                     for i in range(400))
+
+    return ('<html><head><title>Satellites launched on 2026-10-19</title>'
+            '<script>var settings = {"table": "<table>"};</script></head><body>'
+            '<table id="navigation">%s</table>'
+            '<form><table id="search">%s</table></form>'
+            '<div id="results"><table class="results">'
+            "<tr><th>Name</th><th>NORAD ID</th><th>Int'l Code</th>"
+            '<th>Launch date</th><th>Status</th><th>Action</th></tr>%s</table></div>'
+            '<div id="footer">%s</div><script>%s</script></body></html>' %
+            (navigation,form,''.join(cells),footer,'var x = 1;' * 2000))
+
+##------------------------------------------------------------------------------
+## Stand-in for a streamed requests response
+##------------------------------------------------------------------------------
+class PageResponse(object):
+
+    def __init__(self,text):
+
+        self.text = text
+        self.encoding = 'utf-8'
+
+    def iter_content(self, chunk_size = 1, decode_unicode = False):
+
+        for i in range(0,len(self.text),chunk_size):
+            yield self.text[i:i + chunk_size]
+
+## Previous approach: parse every table on the page and take the third
+def read_html_table(html):
+
+    tdf = pd.read_html(io.StringIO(html))[2]
+
+    if 'Action' in tdf.columns:
+        tdf.drop(['Action'], axis = 1, inplace = True)
+
+    tdf.columns = ['Name','NORAD ID',"Int'l Code",'Launch Date','Status']
+
+    return tdf
+
+def streamed_table(namespace,html):
+
+    rows = namespace['extract_results_table'](PageResponse(html))
+
+    tdf = pd.DataFrame(rows, columns = ['Name','NORAD ID',"Int'l Code",
+                                       'Launch Date','Status'])
+    tdf['NORAD ID'] = pd.to_numeric(tdf['NORAD ID'])
+
+    return tdf
+
+##------------------------------------------------------------------------------
+## Run an extractor twice: timed without tracing, then under tracemalloc for
+## peak memory; returns the output, elapsed seconds and peak traced memory (MB)
+##------------------------------------------------------------------------------
+def measure(extractor):
+
+    start = time.perf_counter()
+    output = extractor()
+    elapsed = time.perf_counter() - start
+
+    del output
+
+    tracemalloc.start()
+    output = extractor()
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    return output,elapsed,peak
+
+def benchmark(namespace,rows):
+
+    html = synthetic_page(rows)
+
+    extractors = [('pd.read_html',lambda: read_html_table(html)),
+                  ('Streaming extractor',lambda: streamed_table(namespace,html))]
+
+    results = list()
+    for extractor,function in extractors:
+
+        output,elapsed,peak = measure(function)
+        results.append({'Rows': rows,
+                        'Page (MB)': round(len(html) / 1e6,2),
+                        'Extractor': extractor,
+                        'Time (ms)': round(elapsed * 1000,1),
+                        'Peak Memory (MB)': round(peak,1)})
+
+        if extractor == 'pd.read_html':
+            baseline = output
+
+        elif not output.equals(baseline):
+            raise AssertionError('Streaming extractor differs from read_html at %d rows' % rows)
+
+    return results
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+model_data_banner = '################################################################################\n## MODEL DATA'
+
+default_script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'SpaceX Starlink Constellation Dataset.py')
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark the SpaceX Starlink N2YO results table extractor')
+    parser.add_argument('--rows', type = int, nargs = '+', default = [200,2000,20000],
+                        help = 'result rows per synthetic launch page')
+    parser.add_argument('--script', default = default_script,
+                        help = 'model script to benchmark')
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+
+    results = list()
+    for rows in args.rows:
+        results.extend(benchmark(namespace,rows))
+
+    print(pd.DataFrame(results).to_string(index = False))
@@ -0,0 +1,186 @@
+################################################################################
+################################################################################
+## SpaceX Starlink Constellation Propagation - Throughput Benchmark
+##
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; propagates a synthetic LEO constellation with
+##              the SpaceX Starlink Constellation Propagation Python Script and
+##              reports throughput in satellite-epochs/second for a
+##              one-satellite-at-a-time baseline, vectorized batches of each
+##              batch size and the process-parallel window
+##
+################################################################################
+################################################################################
+## USAGE
+##
+## Benchmark 6,000 satellites over a 60 minute window at 60 second steps:
+##     python "SpaceX Starlink Constellation Propagation Benchmark.py"
+##
+## Benchmark a long window across 4 worker processes:
+##     python "SpaceX Starlink Constellation Propagation Benchmark.py" \
+##         --satellites 6000 --minutes 1440 --workers 4
+##
+################################################################################
+
+import argparse
+import os
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pd
+
+from datetime import datetime
+from sgp4.api import Satrec,WGS72
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Execute the FUNCTIONS section of the model script (everything before the
+## MODEL DATA banner) and return its namespace with the WGS-84 constants set
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global model_data_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(model_data_banner)]
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace(tables = list())
+    module.outputs = types.SimpleNamespace(tables = list())
+    module.__all__ = ['inputs','outputs']
+    sys.modules['brewlytics'] = module
+
+    namespace = {'__name__': 'starlink_propagation'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    namespace['wgs84_a'] = 6378.137
+    namespace['wgs84_f'] = 1 / 298.257223563
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic LEO constellation: Starlink-like shells with random node, phase
+## and eccentricity; epoch 2026-10-19 00:00 UTC
+##------------------------------------------------------------------------------
+def synthetic_satrecs(n,seed = 1):
+
+    rng = np.random.default_rng(seed)
+
+    satrecs = list()
+    for i in range(n):
+
+        satrec = Satrec()
+        satrec.sgp4init(WGS72,'i',50000 + i,28051.0,1e-4,0.0,0.0,
+                        rng.uniform(1e-4,2e-3),
+                        np.radians(rng.uniform(0,360)),
+                        np.radians(rng.choice([43.0,53.0,53.2,70.0,97.6])),
+                        np.radians(rng.uniform(0,360)),
+                        rng.normal(15.05,0.05) * 2 * np.pi / 1440,
+                        np.radians(rng.uniform(0,360)))
+        satrecs.append(satrec)
+
+    return satrecs
+
+##------------------------------------------------------------------------------
+## Baseline: propagate and convert one satellite at a time
+##------------------------------------------------------------------------------
+def propagate_one_at_a_time(namespace,satrecs,jd,fr,geometry):
+
+    for satrec in satrecs:
+        namespace['propagate_task']([satrec],jd,fr,geometry)
+
+def timed(function,*args):
+
+    start = time.perf_counter()
+    function(*args)
+
+    return time.perf_counter() - start
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+model_data_banner = '################################################################################\n## MODEL DATA'
+
+regions = {'Washington DC': {'Latitude': 38.8951,'Longitude': -77.0364,
+                             'Minimum Elevation (Degrees)': 25},
+           'London': {'Latitude': 51.5072,'Longitude': -0.1276,
+                      'Minimum Elevation (Degrees)': 25}}
+
+default_script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'SpaceX Starlink Constellation Propagation.py')
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark SpaceX Starlink constellation propagation throughput')
+    parser.add_argument('--satellites', type = int, default = 6000,
+                        help = 'number of synthetic satellites')
+    parser.add_argument('--minutes', type = float, default = 60,
+                        help = 'propagation window (minutes)')
+    parser.add_argument('--step', type = float, default = 60,
+                        help = 'time step (seconds)')
+    parser.add_argument('--batch-sizes', type = int, nargs = '+', default = [250,1000,2000,6000],
+                        help = 'satellite batch sizes to benchmark')
+    parser.add_argument('--workers', type = int, default = os.cpu_count() or 1,
+                        help = 'worker processes for the parallel window')
+    parser.add_argument('--script', default = default_script,
+                        help = 'model script to benchmark')
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+
+    satrecs = synthetic_satrecs(args.satellites)
+    jd,fr,times = namespace['time_grid'](datetime(2026,10,19,12),args.minutes,args.step)
+    geometry = namespace['region_geometry'](regions)
+
+    epochs = len(satrecs) * len(jd)
+
+    results = list()
+
+    elapsed = timed(propagate_one_at_a_time,namespace,satrecs,jd,fr,geometry)
+    results.append({'Mode': 'One satellite at a time','Batch Size': 1,
+                    'Workers': 1,'Time (s)': elapsed})
+
+    namespace['time_chunk_steps'] = len(jd)
+    namespace['parallel_min_epochs'] = float('inf')
+
+    for batch_size in args.batch_sizes:
+
+        namespace['satellite_batch_size'] = batch_size
+
+        elapsed = timed(namespace['propagate'],satrecs,jd,fr,geometry)
+        results.append({'Mode': 'Vectorized','Batch Size': batch_size,
+                        'Workers': 1,'Time (s)': elapsed})
+
+    namespace['satellite_batch_size'] = max(args.batch_sizes)
+    namespace['time_chunk_steps'] = max(1,-(-len(jd) // args.workers))
+    namespace['parallel_min_epochs'] = 0
+    namespace['parallel_max_workers'] = args.workers
+
+    elapsed = timed(namespace['propagate'],satrecs,jd,fr,geometry)
+    results.append({'Mode': 'Vectorized (parallel)','Batch Size': max(args.batch_sizes),
+                    'Workers': args.workers,'Time (s)': elapsed})
+
+    results = pd.DataFrame(results)
+    results['Satellite-Epochs/Second'] = (epochs / results['Time (s)']).round(0)
+    results['Time (s)'] = results['Time (s)'].round(3)
+
+    print('%d satellites x %d time steps = %d satellite-epochs\n' % (len(satrecs),len(jd),epochs))
+    print(results.to_string(index = False))
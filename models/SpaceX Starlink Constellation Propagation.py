@@ -0,0 +1,519 @@
+################################################################################
+################################################################################
+## SpaceX Starlink Constellation Propagation
+## Propagate the SpaceX Starlink Catalog from TLEs; ground tracks and regional
+## visibility counts
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original code; TLEs read from a local file are joined onto the
+##              SpaceX Starlink Catalog by NORAD ID and propagated with SGP4 in
+##              vectorized batches (satellites x time steps); outputs current
+##              positions, ground tracks and per-region visibility counts. Long
+##              windows are split into time chunks propagated across worker
+##              processes
+## 2026-10-19 - Parallel propagation is bounded by a deadline and falls back to
+##              serial propagation when the workers exit or hang with results
+##              missing
+################################################################################
+################################################################################
+
+from brewlytics import *
+
+import json
+import multiprocessing
+import numpy as np
+import os
+import pandas as pd
+import queue
+import time
+
+from datetime import datetime,timedelta
+from sgp4.api import Satrec,SatrecArray,jday
+
+################################################################################
+################################################################################
+## FUNCTIONS
+
+def extract_cv_types(tdf):
+
+    global cv_types
+
+    cleaned = list()
+    for column_name in tdf.columns:
+        key = column_name.split('{')[0]
+
+        cleaned.append(key)
+        cv_types[key] = column_name
+
+    return cleaned,cv_types
+
+##------------------------------------------------------------------------------
+## Read 2-line or 3-line (name line first) element sets from a local TLE file;
+## when a NORAD ID appears more than once the element set with the latest
+## epoch is kept. Returns NORAD ID: (TLE name, epoch, Satrec)
+def read_tles(filename):
+
+    with open(filename) as f:
+        lines = [line.rstrip() for line in f if line.strip()]
+
+    tles = dict()
+    name = '----'
+
+    idx = 0
+    while idx < len(lines):
+
+        line = lines[idx]
+
+        if (line.startswith('1 ') and (idx + 1 < len(lines)) and
+            lines[idx + 1].startswith('2 ')):
+
+            satrec = Satrec.twoline2rv(line,lines[idx + 1])
+
+            norad_id = int(satrec.satnum)
+            epoch = satrec.jdsatepoch + satrec.jdsatepochF
+
+            if (norad_id not in tles) or (epoch > tles[norad_id][1]):
+                tles[norad_id] = (name,epoch,satrec)
+
+            name = '----'
+            idx += 2
+
+        else:
+
+            name = line[2:].strip() if line.startswith('0 ') else line.strip()
+            idx += 1
+
+    return tles
+
+##------------------------------------------------------------------------------
+## Time grid: Julian date whole and fractional parts for each time step from
+## the start time over the window
+def time_grid(start,duration_minutes,step_seconds):
+
+    offsets = np.arange(0,duration_minutes * 60 + 1e-9,step_seconds)
+
+    jd,fr = jday(start.year,start.month,start.day,start.hour,start.minute,
+                 start.second + start.microsecond / 1e6)
+
+    times = [start + timedelta(seconds = float(offset)) for offset in offsets]
+
+    return np.full(len(offsets),jd),fr + offsets / 86400.0,times
+
+##------------------------------------------------------------------------------
+## COORDINATES: vectorized TEME to Earth-fixed rotation by Greenwich mean
+## sidereal time (IAU-82; polar motion and the equation of the equinoxes are
+## ignored) and WGS-84 geodetic conversions
+def gmst(jd,fr):
+
+    tut1 = (jd - 2451545.0 + fr) / 36525.0
+
+    seconds = (-6.2e-6 * tut1 ** 3 + 0.093104 * tut1 ** 2 +
+               (876600.0 * 3600 + 8640184.812866) * tut1 + 67310.54841)
+
+    return np.mod(np.radians(seconds / 240.0),2 * np.pi)
+
+def teme_to_ecef(r,theta):
+
+    cos_t,sin_t = np.cos(theta),np.sin(theta)
+
+    x,y,z = r[...,0],r[...,1],r[...,2]
+
+    return np.stack([cos_t * x + sin_t * y,
+                     -sin_t * x + cos_t * y,
+                     z], axis = -1)
+
+def ecef_to_geodetic(r):
+
+    global wgs84_a, wgs84_f
+
+    a = wgs84_a
+    b = a * (1 - wgs84_f)
+    e2 = wgs84_f * (2 - wgs84_f)
+    ep2 = (a * a - b * b) / (b * b)
+
+    x,y,z = r[...,0],r[...,1],r[...,2]
+    p = np.hypot(x,y)
+
+    ## Bowring's method
+    theta = np.arctan2(z * a,p * b)
+    lat = np.arctan2(z + ep2 * b * np.sin(theta) ** 3,
+                     p - e2 * a * np.cos(theta) ** 3)
+    lon = np.arctan2(y,x)
+
+    sin_lat = np.sin(lat)
+    alt = p * np.cos(lat) + z * sin_lat - a * np.sqrt(1 - e2 * sin_lat ** 2)
+
+    return np.degrees(lat),np.degrees(lon),alt
+
+def geodetic_to_ecef(lat,lon,alt = 0.0):
+
+    global wgs84_a, wgs84_f
+
+    e2 = wgs84_f * (2 - wgs84_f)
+
+    lat,lon = np.radians(lat),np.radians(lon)
+    n = wgs84_a / np.sqrt(1 - e2 * np.sin(lat) ** 2)
+
+    return np.array([(n + alt) * np.cos(lat) * np.cos(lon),
+                     (n + alt) * np.cos(lat) * np.sin(lon),
+                     (n * (1 - e2) + alt) * np.sin(lat)])
+
+##------------------------------------------------------------------------------
+## Visibility regions: observer position and local vertical for each region;
+## a satellite is visible from a region when its elevation is at or above the
+## region's minimum elevation
+def region_geometry(regions):
+
+    geometry = list()
+    for region,values in regions.items():
+
+        lat,lon = values['Latitude'],values['Longitude']
+
+        up = np.array([np.cos(np.radians(lat)) * np.cos(np.radians(lon)),
+                       np.cos(np.radians(lat)) * np.sin(np.radians(lon)),
+                       np.sin(np.radians(lat))])
+
+        geometry.append((region,
+                         geodetic_to_ecef(lat,lon),
+                         up,
+                         np.sin(np.radians(values['Minimum Elevation (Degrees)']))))
+
+    return geometry
+
+##------------------------------------------------------------------------------
+## PROPAGATION: one task propagates a batch of satellites over a chunk of time
+## steps as satellites x time steps arrays. Returns float32 latitude, longitude
+## and altitude arrays (NaN where SGP4 reported an error) and the number of
+## satellites visible from each region at each time step
+def propagate_task(satrecs,jd,fr,geometry):
+
+    e,r,v = SatrecArray(satrecs).sgp4(jd,fr)
+
+    valid = (e == 0)
+
+    ecef = teme_to_ecef(r,gmst(jd,fr)[np.newaxis,:])
+    lat,lon,alt = ecef_to_geodetic(ecef)
+
+    counts = np.zeros((len(geometry),len(jd)), dtype = np.int32)
+    for idx,(region,observer,up,min_sin_el) in enumerate(geometry):
+
+        rho = ecef - observer
+        sin_el = (rho @ up) / np.linalg.norm(rho, axis = -1)
+
+        counts[idx] = ((sin_el >= min_sin_el) & valid).sum(axis = 0)
+
+    positions = [np.where(valid,values,np.nan).astype(np.float32)
+                 for values in [lat,lon,alt]]
+
+    return positions,counts
+
+def task_list(n_satellites,n_steps):
+
+    global satellite_batch_size, time_chunk_steps
+
+    return [(s,t) for s in range(0,n_satellites,satellite_batch_size)
+                  for t in range(0,n_steps,time_chunk_steps)]
+
+def run_task(task,satrecs,jd,fr,geometry):
+
+    global satellite_batch_size, time_chunk_steps
+
+    s,t = task
+
+    return propagate_task(satrecs[s:s + satellite_batch_size],
+                          jd[t:t + time_chunk_steps],
+                          fr[t:t + time_chunk_steps],
+                          geometry)
+
+## Worker process for the parallel propagation stage; satellites, the time grid
+## and regions are inherited from the parent process and only task indices and
+## result arrays are passed between processes
+def propagate_worker(tasks,satrecs,jd,fr,geometry,task_queue,result_queue):
+
+    for idx in iter(task_queue.get,None):
+        result_queue.put((idx,run_task(tasks[idx],satrecs,jd,fr,geometry)))
+
+## Propagate all satellites over the time grid; windows smaller than
+## parallel_min_epochs satellite-epochs are propagated serially, larger windows
+## are split into satellite batches and time chunks spread across a pool of
+## worker processes. The pool relies on the 'fork' start method so workers
+## inherit the satellites; if it is unavailable, a worker fails, the workers 
+## exit without posting every result or the results are not all in by 
+## parallel_timeout seconds the window is propagated serially
+def propagate(satrecs,jd,fr,geometry):
+
+    global parallel_min_epochs, parallel_max_workers, parallel_timeout
+
+    tasks = task_list(len(satrecs),len(jd))
+
+    use_pool = ((len(satrecs) * len(jd) >= parallel_min_epochs) and (len(tasks) > 1) and
+                ('fork' in multiprocessing.get_all_start_methods()))
+
+    if use_pool:
+
+        workers = min(parallel_max_workers or os.cpu_count() or 1,len(tasks))
+
+        print('Propagating %d satellites over %d time steps in %d tasks across %d processes...' %
+              (len(satrecs),len(jd),len(tasks),workers))
+
+        context = multiprocessing.get_context('fork')
+        task_queue = context.Queue()
+        result_queue = context.Queue()
+
+        processes = [context.Process(target = propagate_worker,
+                                     args = (tasks,satrecs,jd,fr,geometry,
+                                             task_queue,result_queue),
+                                     daemon = True)
+                     for _ in range(workers)]
+
+        try:
+
+            for process in processes:
+                process.start()
+
+            for idx in range(len(tasks)):
+                task_queue.put(idx)
+            for process in processes:
+                task_queue.put(None)
+
+            ## Workers that have all exited before an empty wait cannot post
+            ## the missing results; a hung worker is bounded by the deadline
+            results = dict()
+            deadline = time.monotonic() + parallel_timeout
+            while len(results) < len(tasks):
+
+                exited = all(p.exitcode is not None for p in processes)
+
+                try:
+                    idx,result = result_queue.get(timeout = 1)
+                    results[idx] = result
+
+                except queue.Empty:
+                    if any(p.exitcode not in [None,0] for p in processes):
+                        raise RuntimeError('propagation worker exited unexpectedly')
+                    if exited:
+                        raise RuntimeError('propagation workers exited with %d tasks missing' %
+                                           (len(tasks) - len(results)))
+
+                if time.monotonic() > deadline:
+                    raise RuntimeError('propagation timed out after %d seconds with %d tasks missing' %
+                                       (parallel_timeout,len(tasks) - len(results)))
+
+        except Exception as e:
+
+            print('Parallel propagation failed (%s); propagating serially...' % e)
+
+            use_pool = False
+
+        finally:
+
+            for process in [p for p in processes if p.pid is not None]:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+    if not use_pool:
+
+        results = {idx: run_task(task,satrecs,jd,fr,geometry)
+                   for idx,task in enumerate(tasks)}
+
+    ## Assemble the satellites x time steps arrays and sum the regional counts
+    ## over satellite batches
+    positions = [np.empty((len(satrecs),len(jd)), dtype = np.float32)
+                 for _ in range(3)]
+    counts = np.zeros((len(geometry),len(jd)), dtype = np.int32)
+
+    for idx,(s,t) in enumerate(tasks):
+
+        task_positions,task_counts = results[idx]
+
+        for values,task_values in zip(positions,task_positions):
+            values[s:s + task_values.shape[0],t:t + task_values.shape[1]] = task_values
+
+        counts[:,t:t + task_counts.shape[1]] += task_counts
+
+    return positions,counts
+
+################################################################################
+################################################################################
+## MODEL DATA
+
+md = json.loads(inputs.string)
+
+##------------------------------------------------------------------------------
+## Propagation window: start time (UTC; now when not provided), duration
+## (minutes) and time step (seconds)
+##------------------------------------------------------------------------------
+
+time_format = md.get('Time Format','%Y-%m-%dT%H:%M:%SZ')
+
+null_list = ['----','None',None]
+
+if md.get('Start Time') in null_list:
+    start = datetime.utcnow().replace(microsecond = 0)
+else:
+    start = datetime.strptime(md['Start Time'],time_format)
+
+duration_minutes = md.get('Duration (Minutes)',60)
+step_seconds = md.get('Time Step (Seconds)',60)
+
+##------------------------------------------------------------------------------
+## TLE file
+##------------------------------------------------------------------------------
+
+tle_filename = md['TLE Filename']
+
+##------------------------------------------------------------------------------
+## Visibility regions: latitude, longitude and minimum elevation (degrees)
+##------------------------------------------------------------------------------
+
+regions = md['Visibility Regions']
+
+##------------------------------------------------------------------------------
+## Batch settings: satellites per batch, time steps per chunk, satellite-epochs
+## above which the window is propagated across worker processes, the maximum
+## number of workers (all CPUs when not provided) and seconds to wait for all
+## worker results before propagating serially
+##------------------------------------------------------------------------------
+
+satellite_batch_size = md.get('Satellite Batch Size',2000)
+time_chunk_steps = md.get('Time Chunk (Steps)',120)
+parallel_min_epochs = md.get('Parallel Minimum Satellite-Epochs',2000000)
+parallel_max_workers = md.get('Parallel Max Workers',None)
+parallel_timeout = md.get('Parallel Timeout (Seconds)',600)
+
+##------------------------------------------------------------------------------
+## WGS-84 ellipsoid: equatorial radius (km) and flattening
+##------------------------------------------------------------------------------
+
+wgs84_a = 6378.137
+wgs84_f = 1 / 298.257223563
+
+##------------------------------------------------------------------------------
+## Output_Table Column Order
+##------------------------------------------------------------------------------
+
+column_order = ['Name','COSPAR Id','NORAD ID','Status','Time','Latitude',
+                'Longitude','Altitude (km)','TLE Epoch']
+
+track_column_order = ['NORAD ID','Name','Time','Latitude','Longitude',
+                      'Altitude (km)']
+
+##------------------------------------------------------------------------------
+## brewlytics CV Types
+##------------------------------------------------------------------------------
+
+cv_types = {'COSPAR Id': 'COSPAR Id{string}'}
+
+################################################################################
+################################################################################
+## BODY
+
+##==============================================================================
+## INPUTS.TABLE: SpaceX Starlink Catalog; clean column names of CV Types
+##==============================================================================
+
+catalog = inputs.table.copy()
+catalog.columns,cv_types = extract_cv_types(catalog)
+
+catalog['NORAD ID'] = pd.to_numeric(catalog['NORAD ID'])
+catalog = catalog.drop_duplicates('NORAD ID', keep = 'last')
+cataloged = len(catalog)
+
+##==============================================================================
+## Join TLEs onto the catalog by NORAD ID
+##==============================================================================
+
+tles = read_tles(tle_filename)
+
+catalog = catalog[catalog['NORAD ID'].isin(tles)].reset_index(drop = True)
+missing = cataloged - len(catalog)
+
+satrecs = [tles[norad_id][2] for norad_id in catalog['NORAD ID']]
+
+catalog['TLE Epoch'] = [(datetime(2000,1,1,12) +
+                         timedelta(days = tles[norad_id][1] - 2451545.0)).strftime(time_format)
+                        for norad_id in catalog['NORAD ID']]
+
+##==============================================================================
+## Propagate
+##==============================================================================
+
+jd,fr,times = time_grid(start,duration_minutes,step_seconds)
+time_strs = [t.strftime(time_format) for t in times]
+
+geometry = region_geometry(regions)
+
+propagation_start = time.perf_counter()
+
+(lat,lon,alt),counts = propagate(satrecs,jd,fr,geometry)
+
+propagation_time = time.perf_counter() - propagation_start
+satellite_epochs = len(satrecs) * len(jd)
+
+##==============================================================================
+## Ground tracks: one row per satellite and time step
+##==============================================================================
+
+track_df = pd.DataFrame({'NORAD ID': np.repeat(catalog['NORAD ID'].to_numpy(),len(jd)),
+                         'Name': np.repeat(catalog['Name'].to_numpy(),len(jd)),
+                         'Time': np.tile(time_strs,len(satrecs)),
+                         'Latitude': lat.ravel(),
+                         'Longitude': lon.ravel(),
+                         'Altitude (km)': alt.ravel()})
+
+##==============================================================================
+## Current positions: first time step joined onto the catalog
+##==============================================================================
+
+positions_df = catalog.copy()
+positions_df['Time'] = time_strs[0]
+positions_df['Latitude'] = lat[:,0]
+positions_df['Longitude'] = lon[:,0]
+positions_df['Altitude (km)'] = alt[:,0]
+
+##==============================================================================
+## Visibility counts: satellites visible from each region at each time step
+##==============================================================================
+
+visibility_df = pd.DataFrame(counts.T, columns = list(regions))
+visibility_df.insert(0,'Time',time_strs)
+
+################################################################################
+################################################################################
+## OUTPUTS
+
+##------------------------------------------------------------------------------
+## OUTPUTS.TABLE: Current positions of the cataloged satellites
+##------------------------------------------------------------------------------
+outputs.table = positions_df[column_order].rename(columns = cv_types)
+
+##------------------------------------------------------------------------------
+## OUTPUTS.TABLES[0]: Ground tracks
+##------------------------------------------------------------------------------
+outputs.tables.append(track_df[track_column_order])
+
+##------------------------------------------------------------------------------
+## OUTPUTS.TABLES[1]: Visibility counts by region
+##------------------------------------------------------------------------------
+outputs.tables.append(visibility_df)
+
+################################################################################
+################################################################################
+## SUMMARY
+
+print('')
+print('TLEs: %d read, %d cataloged satellites without TLEs' % (len(tles),missing))
+print('Window: %s to %s, %d time steps' % (time_strs[0],time_strs[-1],len(jd)))
+print('Propagated %d satellite-epochs in %.2fs (%.0f satellite-epochs/second)' %
+      (satellite_epochs,propagation_time,
+       satellite_epochs / max(propagation_time,1e-9)))
+print('SGP4 errors: %d satellites' % np.isnan(lat).any(axis = 1).sum())
+print('Peak Visibility:\n\n- ' +
+      '\n- '.join(['%s: %d satellites' % (region,counts[idx].max() if len(jd) else 0)
+                   for idx,region in enumerate(regions)]))
@@ -0,0 +1,522 @@
+################################################################################
+################################################################################
+## US CERT National Cyber Awareness System Alerts - Benchmark
+##
+## Author: outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; parses a large synthetic RSS feed with the
+##              US CERT National Cyber Awareness System Alerts Python Script
+##              streaming item parser and the previous split/regex extraction,
+##              checks the extracted alerts match and reports items/second and
+##              peak memory
+## 2026-10-19 - Added export benchmark; writes synthetic alert histories with
+##              the constant memory Excel export and the previous pandas 
+##              ExcelWriter export and reports time and peak memory
+## 2026-10-19 - Added search benchmark; searches a synthetic alert history 
+##              through the alert index and by regex scanning the history 
+##              text, and matches new alerts against many subscriptions with
+##              the subscription matcher and by evaluating every subscription
+##
+################################################################################
+################################################################################
+## USAGE
+##
+## Parse benchmark on a 20,000 item feed:
+##     python "US CERT National Cyber Awareness System Alerts Benchmark.py" \
+##         parse --items 20000
+##
+## Excel export benchmark at 1k, 10k and 100k alerts:
+##     python "US CERT National Cyber Awareness System Alerts Benchmark.py" \
+##         export --alerts 1000 10000 100000
+##
+## Search and subscription benchmark on a 20,000 alert history with 10,000
+## subscriptions:
+##     python "US CERT National Cyber Awareness System Alerts Benchmark.py" \
+##         search --alerts 20000 --subscriptions 10000
+##
+################################################################################
+
+import argparse
+import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+import warnings
+
+import pandas as pd
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Execute the FUNCTIONS section of the model script (everything before the
+## MODEL DATA banner) and set the model data the functions use
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global model_data_banner, model_data
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(model_data_banner)]
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace(tables = list())
+    module.outputs = types.SimpleNamespace(tables = list())
+    module.__all__ = ['inputs','outputs']
+    sys.modules['brewlytics'] = module
+
+    namespace = {'__name__': 'uscert_model'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    namespace.update(model_data)
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic RSS feed, newest item first; descriptions are entity-escaped HTML
+## with release and revision dates and a Summary section
+##------------------------------------------------------------------------------
+def synthetic_feed(n):
+
+    months = ['January','February','March','April','May','June','July',
+              'August','September','October','November','December']
+
+    items = list()
+    for i in reversed(range(n)):
+
+        alert_id = 'AA%02d-%03dA' % (20 + i // 300,i % 300 + 1)
+        release = '%s %02d, %d' % (months[i % 12],1 + i % 28,2020 + i // 300)
+        revised = ('Last revised: %s %02d, %d<br />' % (months[(i + 1) % 12],1 + i % 28,
+                                                       2020 + i // 300)) if i % 3 == 0 else ''
+
+        description = ('<br />Original release date: %s<br />%s<h3>Summary</h3>'
+                       '<p>Threat actors exploit <a href="https://nvd.nist.gov">CVE-20%02d-%04d</a> '
+                       '&amp; related vulnerabilities.</p>%s' %
+                       (release,revised,20 + i % 5,i,'<p>Mitigations and technical details.</p>' * 20))
+        description = description.replace('&','&amp;').replace('<','&lt;').replace('>','&gt;')
+
+        items.append('<item>\n  <title>%s: Threat Actor %d Targets &amp; Exploits Systems</title>\n'
+                     '  <link>https://www.cisa.gov/uscert/ncas/alerts/%s</link>\n'
+                     '  <description>%s</description>\n'
+                     '  <pubDate>Wed, 04 May 2022 12:00:00 +0000</pubDate>\n'
+                     '</item>\n' % (alert_id,i,alert_id.lower(),description))
+
+    return ('<?xml version="1.0" encoding="utf-8"?>\n<rss version="2.0">\n<channel>\n'
+            ' <title>Alerts</title>\n <link>https://www.cisa.gov/uscert/ncas/alerts</link>\n'
+            '%s</channel>\n</rss>\n' % ''.join(items))
+
+##------------------------------------------------------------------------------
+## Recorded response with the subset of the requests.Response API used by the
+## model script
+##------------------------------------------------------------------------------
+class ReplayResponse(object):
+
+    def __init__(self,content):
+
+        self.content = content
+        self.text = content.decode('utf-8')
+        self.encoding = 'utf-8'
+
+    def iter_content(self,chunk_size = 1,decode_unicode = False):
+
+        for i in range(0,len(self.content),chunk_size):
+            yield self.content[i:i + chunk_size]
+
+##------------------------------------------------------------------------------
+## Previous extraction: split the feed text on <item> and run the id, date and
+## tag regexes over each item's full text
+##------------------------------------------------------------------------------
+def split_regex_alerts(namespace,response):
+
+    weeble = namespace['weeble']
+    find_dates = namespace['find_dates']
+
+    alerts = list()
+    for alert in response.text.split('<item>')[1:]:
+
+        alert_id = re.findall(r'<title>([A-Z0-9\-]*):',alert)
+        alert_data = {'Alert Id': alert_id[0].strip() if alert_id else 'Unidentified'}
+
+        alert_data['Publish Date'] = find_dates(weeble(alert),namespace['publish_pat'])
+        alert_data['Revision Date'] = find_dates(weeble(alert),namespace['revision_pat'])
+
+        for tag in ['title','link','description']:
+
+            scrapped = re.findall('<%s>([\\s\\S]*?)</%s>' % (tag,tag),alert,flags = re.IGNORECASE)
+            alert_data[tag.title()] = scrapped[0].strip() if scrapped else None
+
+        summary = '<h3>Summary</h3>' + alert.split('<h3>Summary</h3>')[-1]
+        alert_data['Summary'] = weeble(summary)
+
+        alert_data['Date/Time Retrieved'] = namespace['now_str']
+        alert_data['USCERT URL'] = namespace['url']
+
+        alerts.append(alert_data)
+
+    return alerts
+
+def streaming_alerts(namespace,response):
+
+    return [namespace['extract_alert'](item,namespace['extract_alert_id'](item))
+            for item in namespace['iter_rss_items'](response)]
+
+##------------------------------------------------------------------------------
+## Run a function timed without tracing, then under tracemalloc for peak
+## memory; returns the output, elapsed seconds and peak traced memory (MB)
+##------------------------------------------------------------------------------
+def measure(function,*args):
+
+    start = time.perf_counter()
+    output = function(*args)
+    elapsed = time.perf_counter() - start
+
+    del output
+
+    tracemalloc.start()
+    output = function(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    return output,elapsed,peak
+
+def parse_benchmark(namespace,n):
+
+    response = ReplayResponse(synthetic_feed(n).encode('utf-8'))
+
+    print('Synthetic feed: %d items, %.1f MB\n' % (n,len(response.content) / 1e6))
+
+    results = list()
+    outputs = dict()
+    for parser,function in [('Split/regex',split_regex_alerts),
+                            ('Streaming',streaming_alerts)]:
+
+        outputs[parser],elapsed,peak = measure(function,namespace,response)
+        results.append({'Parser': parser,
+                        'Items': len(outputs[parser]),
+                        'Time (s)': round(elapsed,3),
+                        'Items/Second': round(len(outputs[parser]) / elapsed,0),
+                        'Peak Memory (MB)': round(peak,1)})
+
+    if outputs['Streaming'] != outputs['Split/regex']:
+        raise AssertionError('Streaming parser output differs from split/regex extraction')
+
+    print(pd.DataFrame(results).to_string(index = False))
+
+##------------------------------------------------------------------------------
+## Synthetic alert history in output column order with a long Summary column
+##------------------------------------------------------------------------------
+def synthetic_history(n):
+
+    global column_order
+
+    alert_ids = ['AA%02d-%03dA' % (20 + i // 300,i % 300 + 1) for i in reversed(range(n))]
+
+    tdf = pd.DataFrame({'Alert Id': alert_ids,
+                        'Publish Date': 'May 04, 2022',
+                        'Revision Date': ['May 05, 2022' if i % 3 else '----' for i in range(n)],
+                        'Title': ['%s: Threat Actor Targets Systems' % a for a in alert_ids],
+                        'Description': '&lt;br /&gt;Original release date: May 04, 2022' * 5,
+                        'Summary': '<h3>Summary</h3>' + '<p>Mitigations and technical details.</p>' * 50,
+                        'Link': ['https://www.cisa.gov/uscert/ncas/alerts/%s' % a.lower() for a in alert_ids],
+                        'Date/Time Retrieved': '2026-10-19T00:00:00.000000Z',
+                        'USCERT URL': 'https://www.cisa.gov/uscert/ncas/alerts.xml'})
+
+    return tdf[column_order]
+
+##------------------------------------------------------------------------------
+## Previous export: the whole workbook built by pandas ExcelWriter in default
+## mode; Link values are written as URLs, so Excel's per-worksheet URL limit 
+## warnings are silenced
+##------------------------------------------------------------------------------
+def excel_writer_export(namespace,df,filename,sheetname):
+
+    writer = pd.ExcelWriter(filename, engine = 'xlsxwriter')
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        df.to_excel(writer, sheet_name = sheetname, index = False)
+
+    worksheet = writer.sheets[sheetname]
+    for column,width in namespace['widths'].items():
+        worksheet.set_column(column, width)
+    worksheet.autofilter(0, 0, len(df), len(df.columns) - 1)
+
+    writer.close()
+
+def export_benchmark(namespace,sizes):
+
+    results = list()
+    with tempfile.TemporaryDirectory() as directory:
+
+        filename = os.path.join(directory,'USCERT_Alerts.xlsx')
+
+        for n in sizes:
+
+            df = synthetic_history(n)
+
+            for export,function in [('ExcelWriter',lambda: excel_writer_export(namespace,df,filename,'US CERT Alerts')),
+                                    ('Constant memory',lambda: namespace['create_web_resource'](df.itertuples(index = False, name = None),
+                                                                                                list(df.columns),filename,'US CERT Alerts'))]:
+
+                output,elapsed,peak = measure(function)
+                results.append({'Alerts': n,
+                                'Export': export,
+                                'Time (s)': round(elapsed,3),
+                                'Peak Memory (MB)': round(peak,1),
+                                'File Size (MB)': round(os.path.getsize(filename) / 1e6,1)})
+
+    print(pd.DataFrame(results).to_string(index = False))
+
+##------------------------------------------------------------------------------
+## Synthetic alert history with varied vocabulary: each alert's summary draws
+## its terms from a shared vocabulary of vendors, products and threat terms
+##------------------------------------------------------------------------------
+def synthetic_vocabulary_history(n,seed = 1):
+
+    global column_order, vocabulary
+
+    rng = random.Random(seed)
+
+    records = list()
+    for i in reversed(range(n)):
+
+        alert_id = 'AA%02d-%03dA' % (20 + i // 300,i % 300 + 1)
+        words = rng.sample(vocabulary,8)
+        cve = 'CVE-20%02d-%04d' % (20 + i % 5,i % 10000)
+
+        records.append({'Alert Id': alert_id,
+                        'Publish Date': 'May 04, 2022',
+                        'Revision Date': '----',
+                        'Title': '%s: %s %s Targets %s' % (alert_id,words[0].title(),words[1],words[2]),
+                        'Description': '&lt;br /&gt;Original release date: May 04, 2022',
+                        'Summary': ('<h3>Summary</h3><p>Threat actors exploit %s in %s.</p>'
+                                    '<p>%s</p>' % (cve,' '.join(words[3:]),
+                                                   'Mitigations and technical details. ' * 20)),
+                        'Link': 'https://www.cisa.gov/uscert/ncas/alerts/%s' % alert_id.lower(),
+                        'Date/Time Retrieved': '2026-10-19T00:00:00.000000Z',
+                        'USCERT URL': 'https://www.cisa.gov/uscert/ncas/alerts.xml'})
+
+    return pd.DataFrame(records)[column_order]
+
+##------------------------------------------------------------------------------
+## Synthetic subscriptions: one or two vocabulary terms, some with an OR or
+## NOT, per subscriber
+##------------------------------------------------------------------------------
+def synthetic_subscriptions(n,seed = 2):
+
+    global vocabulary
+
+    rng = random.Random(seed)
+    forms = ['%s','%s AND %s','%s OR %s','%s NOT %s','"%s %s"']
+
+    subscriptions = dict()
+    for i in range(n):
+
+        form = rng.choice(forms)
+        subscriptions['user%05d@example.mil' % i] = form % tuple(rng.sample(vocabulary,form.count('%s')))
+
+    return subscriptions
+
+##------------------------------------------------------------------------------
+## Previous search: regex scan of the history title, description and summary
+## text for every term of an AND query
+##------------------------------------------------------------------------------
+def regex_search(tdf,terms):
+
+    text = tdf['Title'] + ' ' + tdf['Description'] + ' ' + tdf['Summary']
+
+    matches = pd.Series(True, index = tdf.index)
+    for term in terms:
+        matches &= text.str.contains(r'\b%s\b' % re.escape(term), case = False, regex = True)
+
+    return set(tdf.loc[matches,'Alert Id'])
+
+##------------------------------------------------------------------------------
+## Previous matching: evaluate every subscription's query against each alert
+##------------------------------------------------------------------------------
+def evaluate(node,terms):
+
+    kind = node[0]
+
+    if kind == 'term':
+        return node[1] in terms
+    if kind == 'not':
+        return not evaluate(node[1],terms)
+    if kind == 'and':
+        return all(evaluate(child,terms) for child in node[1])
+
+    return any(evaluate(child,terms) for child in node[1])
+
+def evaluate_all(parsed,alert_terms):
+
+    return [{subscriber for subscriber,node in parsed if evaluate(node,terms)}
+            for terms in alert_terms]
+
+def search_benchmark(namespace,n,subscriber_count,new_alerts):
+
+    global column_order, search_terms
+
+    tdf = synthetic_vocabulary_history(n)
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        conn = sqlite3.connect(os.path.join(directory,'USCERT Alerts.sqlite'))
+        conn.executescript(namespace['alert_store_schema'])
+
+        start = time.perf_counter()
+        namespace['insert_alerts'](conn,tdf.to_dict(orient = 'records'))
+        elapsed = time.perf_counter() - start
+
+        print('Alert history: %d alerts indexed in %.1f s\n' % (n,elapsed))
+
+        ##----------------------------------------------------------------------
+        ## Full history search
+        results = list()
+        for terms in search_terms:
+
+            start = time.perf_counter()
+            expected = regex_search(tdf,terms)
+            scan = time.perf_counter() - start
+
+            start = time.perf_counter()
+            total,found = namespace['search_alerts'](conn,' AND '.join(terms),column_order)
+            indexed = time.perf_counter() - start
+
+            alert_ids = namespace['query_alert_ids'](conn,namespace['parse_query'](' AND '.join(terms)))
+            if alert_ids != expected:
+                raise AssertionError('Index search differs from regex scan for %s' % terms)
+
+            results.append({'Query': ' AND '.join(terms),
+                            'Matches': total,
+                            'Regex Scan (ms)': round(scan * 1000,1),
+                            'Index (ms)': round(indexed * 1000,2)})
+
+        print(pd.DataFrame(results).to_string(index = False))
+
+        ##----------------------------------------------------------------------
+        ## Subscription matching for new alerts
+        subscriptions = synthetic_subscriptions(subscriber_count)
+        alerts = synthetic_vocabulary_history(new_alerts,seed = 3).to_dict(orient = 'records')
+        alert_terms = [namespace['alert_terms'](alert) for alert in alerts]
+
+        parsed = [(subscriber,namespace['parse_query'](query))
+                  for subscriber,query in subscriptions.items()]
+
+        start = time.perf_counter()
+        matcher = namespace['build_subscription_matcher'](conn,subscriptions)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matched = [matcher.match(terms) for terms in alert_terms]
+        matching = time.perf_counter() - start
+
+        start = time.perf_counter()
+        expected = evaluate_all(parsed,alert_terms)
+        evaluating = time.perf_counter() - start
+
+        conn.close()
+
+    if matched != expected:
+        raise AssertionError('Subscription matcher differs from evaluating every subscription')
+
+    print('\n%d subscriptions, %d new alerts (matcher built in %.1f ms)\n' %
+          (subscriber_count,new_alerts,build * 1000))
+    print(pd.DataFrame([{'Matching': 'Every subscription',
+                         'ms/Alert': round(evaluating / new_alerts * 1000,3)},
+                        {'Matching': 'Subscription matcher',
+                         'ms/Alert': round(matching / new_alerts * 1000,3)}]).to_string(index = False))
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+model_data_banner = '################################################################################\n## MODEL DATA'
+
+model_data = {'id_pat': r'([A-Z0-9\-]*):',
+              'publish_pat': r'date: ([a-z0-9 ,]*)[ |<]{1}',
+              'revision_pat': r'revised: ([a-z0-9 ,]*)<br',
+              'replacements': {'&lt;': '<',
+                               '&gt;': '>',
+                               '&amp;amp;': '&',
+                               '&nbsp;': ' '},
+              'widths': {'A:A': 12,'B:B': 20,'C:C': 20,'D:D': 75,'E:E': 30,
+                         'F:F': 30,'H:H': 30,'G:G': 40,'I:I': 40},
+              'token_pat': r'[a-z0-9]+(?:[\-\._][a-z0-9]+)*',
+              'query_pat': r'\(|\)|"[^"]*"|[^\s()"]+',
+              'stop_words': {'a','an','and','are','as','at','be','by','for','from',
+                             'has','have','in','is','it','its','of','on','or','that',
+                             'the','this','to','was','were','which','will','with'},
+              'now_str': '2026-10-19T00:00:00.000000Z',
+              'url': 'https://www.cisa.gov/uscert/ncas/alerts.xml'}
+
+column_order = ['Alert Id','Publish Date','Revision Date','Title','Description',
+                'Summary','Link','Date/Time Retrieved','USCERT URL']
+
+vocabulary = ['microsoft','exchange','cisco','fortinet','vmware','citrix','apache',
+              'log4j','ransomware','phishing','botnet','malware','backdoor','wiper',
+              'espionage','ics','scada','healthcare','energy','water','finance',
+              'firmware','vpn','router','firewall','browser','kernel','credential',
+              'privilege','escalation','injection','deserialization','overflow',
+              'spoofing','ddos','supply-chain','zero-day','lazarus','apt29','apt41',
+              'conti','lockbit','blackcat','emotet','trickbot','qakbot','iot','cloud',
+              'kubernetes','active-directory']
+
+search_terms = [['ransomware'],['log4j','apache'],['lockbit','healthcare'],
+                ['cve-2022-0042'],['threat','mitigations']]
+
+default_script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'US CERT National Cyber Awareness System Alerts.py')
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark the US CERT National Cyber Awareness System Alerts Python Script')
+    parser.add_argument('--script', default = default_script,
+                        help = 'model script to benchmark')
+
+    subparsers = parser.add_subparsers(dest = 'benchmark', required = True)
+
+    parse_parser = subparsers.add_parser('parse', help = 'RSS feed parsing')
+    parse_parser.add_argument('--items', type = int, default = 20000,
+                              help = 'items in the synthetic feed')
+
+    export_parser = subparsers.add_parser('export', help = 'Excel export')
+    export_parser.add_argument('--alerts', type = int, nargs = '+', default = [1000,10000,100000],
+                               help = 'alert history sizes to export')
+
+    search_parser = subparsers.add_parser('search', help = 'alert search and subscription matching')
+    search_parser.add_argument('--alerts', type = int, default = 20000,
+                               help = 'alert history size')
+    search_parser.add_argument('--subscriptions', type = int, default = 10000,
+                               help = 'number of subscriptions')
+    search_parser.add_argument('--new-alerts', type = int, default = 100,
+                               help = 'new alerts matched against the subscriptions')
+
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+
+    if args.benchmark == 'parse':
+        parse_benchmark(namespace,args.items)
+
+    elif args.benchmark == 'export':
+        export_benchmark(namespace,args.alerts)
+
+    elif args.benchmark == 'search':
+        search_benchmark(namespace,args.alerts,args.subscriptions,args.new_alerts)
@@ -4,7 +4,7 @@
 ## RSS Feed
 ## Author: outsideKen
 ## Created: 07 July 2020
-## Updated: 07 May 2022
+## Updated: 19 October 2026
 ##
 ################################################################################
 ## CHANGE LOG
@@ -18,16 +18,60 @@
 ##              formatting for Excel output
 ## 2022-05-07 - Updated script to use the new brewlytics Define Python Script
 ##              functional
+## 2026-10-19 - Incremental updates: conditional GET with the stored ETag and
+##              Last-Modified validators; only the Alert Id is extracted from
+##              each item before the history check and processing stops at the
+##              first known alert in the newest-first feed
+## 2026-10-19 - Replaced the split/regex item extraction with a streaming
+##              expat parser that walks the feed once; entities are decoded
+##              once per field and dates are found in the decoded description
+## 2026-10-19 - Summary table rows rendered column-wise and cached by Alert Id
+##              and Revision Date; only new or revised rows are rendered and
+##              the table is assembled in one join; limited by default to the
+##              200 most recent alerts (null renders the full history)
+## 2026-10-19 - Excel export written row by row in xlsxwriter constant memory
+##              mode (replaces the removed ExcelWriter.save()); autofilter 
+##              sized from the table shape; optional Parquet/CSV sidecars
+## 2026-10-19 - Alert history kept in a local SQLite store indexed on Alert Id
+##              and publish/revision dates; seeded once from the input table,
+##              new alerts appended, sorted and top-N views served from the
+##              indexes and the Excel export streamed from the store when the
+##              store changed; column names normalised only when seeding
+## 2026-10-19 - Inverted index of alert title/description/summary terms kept
+##              in the alert store and updated as alerts are added; keyword/
+##              boolean Subscriptions matched per new alert so emails go only
+##              to matching subscribers; optional Alert Search over the full
+##              history
+## 2026-10-19 - Fixed new alert emails overwriting each other so only the last
+##              new alert was sent; alert emails are collected by the shared
+##              notification aggregator (notifications.py), deduplicated and
+##              sent as one digest per recipient with a rate limit
+## 2026-10-19 - Feed validators stored only after new alerts are committed and
+##              notified, and not at all when the feed was truncated
 ##
 ################################################################################
 
+import html
 import json
+import os
 import pandas as pd
+import pickle
 import re
 import requests
+import sqlite3
+import xlsxwriter
 
 from brewlytics import *
 from datetime import datetime
+from xml.parsers import expat
+
+## Shared notification aggregator; without it one email is output per new
+## alert
+try:
+    from notifications import NotificationAggregator, email_columns
+except ImportError:
+    NotificationAggregator = None
+    email_columns = ['To','CC','Subject','Body']
 
 ################################################################################
 ## FUNCTIONS
@@ -61,33 +105,698 @@ def find_dates(desc,pattern):
     return publish
 
 ##------------------------------------------------------------------------------
-## Add formatting to the output_resource Excel spreadsheet
-def create_web_resource(df,filename,sheetname):
+## Feed state: ETag and Last-Modified validators from the last successful 
+## retrieval of each feed URL, stored locally for conditional requests
+def read_feed_state(filename):
     
-    global widths
+    if os.path.exists(filename):
+        with open(filename) as f:
+            return json.load(f)
         
-    ## Create a Pandas Excel writer using XlsxWriter as the engine.
-    writer = pd.ExcelWriter(filename, engine='xlsxwriter')
+    return dict()
 
-    ## Convert the dataframe to an XlsxWriter Excel object.
-    df.to_excel(writer, sheet_name = sheetname, index = False)
+def write_feed_state(filename,state):
+    
+    with open(filename,'w') as f:
+        json.dump(state,f,indent = 1)
+        
+def conditional_headers(state,url):
+    
+    validators = state.get(url,dict())
+    
+    headers = dict()
+    if validators.get('ETag'):
+        headers['If-None-Match'] = validators['ETag']
+    if validators.get('Last-Modified'):
+        headers['If-Modified-Since'] = validators['Last-Modified']
+        
+    return headers
 
-    ## Get the xlsxwriter workbook and worksheet objects.
-    workbook  = writer.book
-    worksheet = writer.sheets[sheetname]
+##------------------------------------------------------------------------------
+## RSS ITEM PARSER: streaming expat parser that walks the feed once. For each
+## item the first title, link and description are kept both as decoded text 
+## and as the raw text between their tags (the form stored in the alert 
+## history). Byte offsets from expat locate the raw text, so only the current
+## item is buffered. An item's raw span runs to the next <item> tag (or the end
+## of the feed) and it is released once that span is closed
+class RSSItemParser(object):
+    
+    def __init__(self,encoding):
+        
+        self.encoding = encoding
+        
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+        self.parser.CharacterDataHandler = self.character_data
+        
+        self.buffer = b''
+        self.offset = 0
+        self.size = 0
+        self.item = None
+        self.field = None
+        self.items = list()
+        
+    def feed(self,chunk,final = False):
+        
+        self.buffer += chunk
+        self.size += len(chunk)
+        
+        self.parser.Parse(chunk,final)
+        
+        if final:
+            self.close_item(self.size)
+            
+        items,self.items = self.items,list()
+        
+        return items
+    
+    def raw(self,start,end):
+        
+        return self.buffer[start - self.offset:end - self.offset].decode(self.encoding)
+    
+    def close_item(self,end):
+        
+        if self.item is not None:
+            
+            self.item['Text'] = self.raw(self.item['Start'],end)
+            self.items.append(self.item)
+            
+            self.buffer = self.buffer[end - self.offset:]
+            self.offset = end
+            self.item = None
+            
+    def start_element(self,tag,attrs):
+        
+        index = self.parser.CurrentByteIndex
+        
+        if tag == 'item':
+            
+            self.close_item(index)
+            self.item = {'Start': index + len('<item>'),'Raw': dict(),'Decoded': dict()}
+            
+        elif ((self.item is not None) and (self.field is None) and 
+              (tag in ['title','link','description']) and 
+              (tag not in self.item['Raw'])):
+            
+            self.field = (tag,index + len('<%s>' % tag),list())
+            
+    def end_element(self,tag):
+        
+        if (self.field is not None) and (tag == self.field[0]):
+            
+            tag,start,text = self.field
+            
+            self.item['Raw'][tag] = self.raw(start,self.parser.CurrentByteIndex)
+            self.item['Decoded'][tag] = ''.join(text)
+            self.field = None
+            
+    def character_data(self,data):
+        
+        if self.field is not None:
+            self.field[2].append(data)
+
+## Stream the RSS feed into the item parser, yielding items as they complete;
+## closing the generator stops reading the feed. Malformed XML ends the feed at
+## the last complete item and sets 'Truncated' in the optional status dict
+def iter_rss_items(response,status = None):
+    
+    parser = RSSItemParser(response.encoding or 'utf-8')
+    
+    try:
+        
+        for chunk in response.iter_content(chunk_size = 65536):
+            for item in parser.feed(chunk):
+                yield item
+                
+        for item in parser.feed(b'',final = True):
+            yield item
+            
+    except expat.ExpatError as e:
+        
+        print('Malformed RSS feed (%s); stopped at the last complete item.' % e)
+        
+        if status is not None:
+            status['Truncated'] = True
+
+##------------------------------------------------------------------------------
+## Extract the alert id from the item title text
+def extract_alert_id(item):
+    
+    global id_pat
+    
+    alert_id = re.match(id_pat,item['Decoded'].get('title',''))
+    if alert_id:
+        return alert_id.group(1).strip()
+    else:
+        return 'Unidentified'
+    
+##------------------------------------------------------------------------------
+## Extract the alert data from a parsed RSS item
+def extract_alert(item,alert_id):
+    
+    global publish_pat, revision_pat, now_str, url
+    
+    alert_data = {'Alert Id': alert_id}
+
+    ##--------------------------------------------------------------------------
+    ## Extract Publish and Revision Dates from the decoded description
+    description = weeble(item['Decoded'].get('description',''))
+    
+    alert_data['Publish Date'] = find_dates(description,publish_pat)
+    alert_data['Revision Date'] = find_dates(description,revision_pat)
+        
+    ##--------------------------------------------------------------------------
+    ## Title, Link, and Description as stored in the feed
+    for tag in ['title','link','description']:
+
+        if tag in item['Raw']:
+            alert_data[tag.title()] = item['Raw'][tag].strip()
+        else:
+            alert_data[tag.title()] = None
+
+    ##--------------------------------------------------------------------------
+    ## Extract Summary
+    summary = '<h3>Summary</h3>' + item['Text'].split('<h3>Summary</h3>')[-1]
+    alert_data['Summary'] = weeble(summary)
+    
+    ##--------------------------------------------------------------------------
+    ## Add provenance
+    alert_data['Date/Time Retrieved'] = now_str
+    alert_data['USCERT URL'] = url
+    
+    return alert_data
+
+##------------------------------------------------------------------------------
+## ALERT STORE
+##------------------------------------------------------------------------------
+## SQLite store of the alert history keyed by Alert Id. Each alert keeps its 
+## history row as JSON with the publish and revision dates parsed to ISO dates.
+## Existence checks use the primary key index, alerts are only ever appended 
+## and the Alert Id, publish date and revision date indexes serve the sorted 
+## and most recent alert views without scanning the store.
+
+alert_store_schema = """
+CREATE TABLE IF NOT EXISTS alerts (
+    alert_id TEXT PRIMARY KEY,
+    publish_date TEXT,
+    revision_date TEXT,
+    record TEXT,
+    first_seen TEXT);
+CREATE INDEX IF NOT EXISTS idx_alerts_publish_date 
+    ON alerts (publish_date);
+CREATE INDEX IF NOT EXISTS idx_alerts_revision_date 
+    ON alerts (revision_date);
+CREATE TABLE IF NOT EXISTS alert_terms (
+    term TEXT,
+    alert_id TEXT,
+    PRIMARY KEY (term, alert_id)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS indexed_alerts (
+    alert_id TEXT PRIMARY KEY,
+    terms INTEGER);
+"""
+
+def open_alert_store(filename):
+    
+    global alert_store_schema
+    
+    conn = sqlite3.connect(filename)
+    conn.executescript(alert_store_schema)
+    
+    return conn
+
+## Release and revision dates as ISO dates (None when not found)
+def date_to_iso(date):
+    
+    try:
+        return datetime.strptime(date.strip(),'%B %d, %Y').strftime('%Y-%m-%d')
+    except (AttributeError,ValueError):
+        return None
+    
+def alert_count(conn):
+    
+    return conn.execute('SELECT COUNT(*) FROM alerts').fetchone()[0]
+
+def alert_exists(conn,alert_id):
+    
+    return conn.execute('SELECT 1 FROM alerts WHERE alert_id = ?',
+                        (alert_id,)).fetchone() is not None
+
+## Append alert records (history rows) and add them to the alert index; 
+## alerts already in the store are kept unchanged. Returns the number of 
+## alerts added
+def insert_alerts(conn,records):
+    
+    global now_str
+    
+    new_records = dict()
+    for record in records:
+        if (record['Alert Id'] not in new_records) and not alert_exists(conn,record['Alert Id']):
+            new_records[record['Alert Id']] = record
+    
+    with conn:
+        conn.executemany('INSERT INTO alerts VALUES (?,?,?,?,?)',
+                         [(record['Alert Id'],
+                           date_to_iso(record['Publish Date']),
+                           date_to_iso(record['Revision Date']),
+                           json.dumps(record, default = str),
+                           now_str) for record in new_records.values()])
+        index_alerts(conn,new_records.values())
+        
+    return len(new_records)
+
+## History rows sorted by Alert Id (newest first), optionally the first limit
+## rows only, read from the primary key index
+def iter_alert_rows(conn,columns,limit = None):
+    
+    query = 'SELECT record FROM alerts ORDER BY alert_id DESC'
+    if limit:
+        query += ' LIMIT %d' % int(limit)
+        
+    for (record,) in conn.execute(query):
+        
+        record = json.loads(record)
+        yield tuple(record.get(column) for column in columns)
+        
+## Most recently published or revised alerts, read from the date indexes
+def recent_alerts(conn,columns,date_column = 'publish_date',limit = 10):
+    
+    rows = [json.loads(record) for (record,) in 
+            conn.execute('SELECT record FROM alerts WHERE %s IS NOT NULL '
+                         'ORDER BY %s DESC LIMIT ?' % (date_column,date_column),
+                         (limit,))]
+    
+    return pd.DataFrame(rows, columns = columns)
+
+##------------------------------------------------------------------------------
+## ALERT INDEX
+##------------------------------------------------------------------------------
+## Inverted index of the alert history: the terms of each alert's title,
+## description and summary (HTML entities decoded, tags removed, lowercased)
+## are kept in the alert_terms table keyed by term, so the alerts containing a
+## term are read from the index rather than by scanning the history text. New
+## alerts are indexed as they are added to the store.
+
+def tokenize(text):
+    
+    global token_pat, stop_words
+    
+    text = html.unescape(html.unescape(text))
+    text = re.sub(r'<[^>]*>',' ',text).lower()
+    
+    return [term for term in re.findall(token_pat,text) if term not in stop_words]
+
+def alert_terms(record):
+    
+    return set(tokenize(' '.join([str(record.get(column) or '')
+                                  for column in ['Title','Description','Summary']])))
+
+def index_alerts(conn,records):
+    
+    for record in records:
+        
+        terms = alert_terms(record)
+        
+        conn.executemany('INSERT OR IGNORE INTO alert_terms VALUES (?,?)',
+                         [(term,record['Alert Id']) for term in terms])
+        conn.execute('INSERT OR REPLACE INTO indexed_alerts VALUES (?,?)',
+                     (record['Alert Id'],len(terms)))
+
+## Index alerts stored before the alert index existed. Returns the number of
+## alerts indexed
+def index_unindexed_alerts(conn):
+    
+    records = [json.loads(record) for (record,) in
+               conn.execute('SELECT record FROM alerts WHERE alert_id NOT IN '
+                            '(SELECT alert_id FROM indexed_alerts)')]
+    
+    with conn:
+        index_alerts(conn,records)
+    
+    return len(records)
+
+## Number of indexed alerts containing each term
+def term_frequencies(conn,terms):
+    
+    return {term: conn.execute('SELECT COUNT(*) FROM alert_terms WHERE term = ?',
+                               (term,)).fetchone()[0] for term in terms}
+
+##------------------------------------------------------------------------------
+## Keyword/boolean queries: terms, "quoted phrases" (all of the phrase's
+## terms), AND, OR, NOT and parentheses; adjacent terms are ANDed. Queries are
+## parsed to nested tuples - ('term',term), ('and',[nodes]), ('or',[nodes]),
+## ('not',node) - and query words are tokenized like the alert text
+def parse_query(query):
+    
+    global query_pat
+    
+    tokens = re.findall(query_pat,query)
+    node,position = parse_or(tokens,0)
+    
+    if position < len(tokens):
+        raise ValueError('Unexpected %s in query: %s' % (tokens[position],query))
+    
+    return node
+
+def parse_or(tokens,position):
+    
+    nodes = list()
+    node,position = parse_and(tokens,position)
+    nodes.append(node)
+    
+    while (position < len(tokens)) and (tokens[position] == 'OR'):
+        node,position = parse_and(tokens,position + 1)
+        nodes.append(node)
+    
+    return (nodes[0] if len(nodes) == 1 else ('or',nodes)),position
+
+def parse_and(tokens,position):
+    
+    nodes = list()
+    node,position = parse_not(tokens,position)
+    nodes.append(node)
+    
+    while (position < len(tokens)) and (tokens[position] not in ['OR',')']):
+        
+        if tokens[position] == 'AND':
+            position += 1
+        
+        node,position = parse_not(tokens,position)
+        nodes.append(node)
+    
+    return (nodes[0] if len(nodes) == 1 else ('and',nodes)),position
+
+def parse_not(tokens,position):
+    
+    if (position < len(tokens)) and (tokens[position] == 'NOT'):
+        node,position = parse_not(tokens,position + 1)
+        return ('not',node),position
+    
+    return parse_atom(tokens,position)
+
+def parse_atom(tokens,position):
+    
+    if position >= len(tokens):
+        raise ValueError('Incomplete query')
+    
+    token = tokens[position]
+    
+    if token == '(':
+        
+        node,position = parse_or(tokens,position + 1)
+        
+        if (position >= len(tokens)) or (tokens[position] != ')'):
+            raise ValueError('Missing ) in query')
+        
+        return node,position + 1
+    
+    if token in ['AND','OR',')']:
+        raise ValueError('Unexpected %s in query' % token)
+    
+    terms = [('term',term) for term in tokenize(token.strip('"'))]
+    
+    return (terms[0] if len(terms) == 1 else ('and',terms)),position + 1
+
+## Query as a list of (required terms, excluded terms) clauses, any of which
+## matches (disjunctive normal form)
+def query_clauses(node,negate = False):
+    
+    kind = node[0]
+    
+    if kind == 'term':
+        if negate:
+            return [(frozenset(),frozenset([node[1]]))]
+        return [(frozenset([node[1]]),frozenset())]
+    
+    if kind == 'not':
+        return query_clauses(node[1],not negate)
+    
+    children = [query_clauses(child,negate) for child in node[1]]
+    
+    ## OR (or a negated AND): any child clause
+    if (kind == 'or') != negate:
+        return [clause for clauses in children for clause in clauses]
+    
+    ## AND (or a negated OR): every combination of child clauses
+    combined = [(frozenset(),frozenset())]
+    for clauses in children:
+        combined = [(required | r,excluded | e)
+                    for required,excluded in combined
+                    for r,e in clauses
+                    if not ((required | r) & (excluded | e))]
+    
+    return combined
+
+##------------------------------------------------------------------------------
+## Search the full alert history: term postings are read from the alert index
+## and combined as sets of Alert Ids. Returns the number of matching alerts
+## and the first limit matches sorted by Alert Id (newest first)
+def indexed_alert_ids(conn):
+    
+    return {alert_id for (alert_id,) in conn.execute('SELECT alert_id FROM indexed_alerts')}
+
+def query_alert_ids(conn,node):
+    
+    kind = node[0]
+    
+    if kind == 'term':
+        return {alert_id for (alert_id,) in
+                conn.execute('SELECT alert_id FROM alert_terms WHERE term = ?',
+                             (node[1],))}
+    
+    if kind == 'not':
+        return indexed_alert_ids(conn) - query_alert_ids(conn,node[1])
+    
+    if kind == 'or':
+        return set().union(*[query_alert_ids(conn,child) for child in node[1]])
+    
+    ## AND: positive terms first so the candidate set shrinks before NOTs
+    alert_ids = None
+    for child in sorted(node[1], key = lambda child: child[0] == 'not'):
+        
+        if (alert_ids is not None) and (child[0] == 'not'):
+            alert_ids = alert_ids - query_alert_ids(conn,child[1])
+        elif alert_ids is None:
+            alert_ids = query_alert_ids(conn,child)
+        else:
+            alert_ids = alert_ids & query_alert_ids(conn,child)
+        
+        if not alert_ids:
+            break
+    
+    ## An empty AND (a query of stop words only) matches every alert
+    if alert_ids is None:
+        return indexed_alert_ids(conn)
+    
+    return alert_ids
+
+def search_alerts(conn,query,columns,limit = 25):
+    
+    alert_ids = sorted(query_alert_ids(conn,parse_query(query)), reverse = True)
+    
+    records = list()
+    for start in range(0,min(len(alert_ids),limit),500):
+        
+        batch = alert_ids[start:min(start + 500,limit)]
+        records += [json.loads(record) for (record,) in
+                    conn.execute('SELECT record FROM alerts WHERE alert_id IN (%s) '
+                                 'ORDER BY alert_id DESC' % ','.join('?' * len(batch)),
+                                 batch)]
+    
+    return len(alert_ids),pd.DataFrame(records, columns = columns)
+
+##------------------------------------------------------------------------------
+## SUBSCRIPTION MATCHER: every subscription query is reduced to clauses of
+## required and excluded terms. Each clause is filed under one of its required
+## terms (the one found in the fewest indexed alerts), so a new alert only
+## checks the clauses filed under its own terms; the work per alert depends on
+## the alert's terms and the clauses they select, not on the number of
+## subscriptions. Clauses with no required term are checked for every alert
+class SubscriptionMatcher(object):
+    
+    def __init__(self,clauses,frequencies):
+        
+        self.anchored = dict()
+        self.unanchored = list()
+        
+        for subscriber,required,excluded in clauses:
+            
+            if required:
+                anchor = min(required, key = lambda term: (frequencies.get(term,0),term))
+                self.anchored.setdefault(anchor,list()).append((subscriber,required,excluded))
+            else:
+                self.unanchored.append((subscriber,required,excluded))
+    
+    def match(self,terms):
+        
+        matched = set()
+        
+        for term in terms:
+            for subscriber,required,excluded in self.anchored.get(term,[]):
+                if ((subscriber not in matched) and required.issubset(terms) and
+                    excluded.isdisjoint(terms)):
+                    matched.add(subscriber)
+        
+        for subscriber,required,excluded in self.unanchored:
+            if (subscriber not in matched) and excluded.isdisjoint(terms):
+                matched.add(subscriber)
+        
+        return matched
+
+## Subscription clauses as (subscriber, required terms, excluded terms); a
+## subscription is a query or a list of queries (any of which matches).
+## Invalid queries are reported and skipped
+def subscription_clauses(subscriptions):
+    
+    clauses = list()
+    for subscriber,queries in subscriptions.items():
+        
+        if isinstance(queries,str):
+            queries = [queries]
+        
+        for query in queries:
+            
+            try:
+                clauses += [(subscriber,required,excluded) for required,excluded in
+                            query_clauses(parse_query(query))]
+            except ValueError as e:
+                print('Skipped subscription %s for %s: %s' % (query,subscriber,e))
+    
+    return clauses
+
+def build_subscription_matcher(conn,subscriptions):
+    
+    clauses = subscription_clauses(subscriptions)
+    frequencies = term_frequencies(conn,{term for clause in clauses for term in clause[1]})
+    
+    return SubscriptionMatcher(clauses,frequencies)
+
+## Email recipients of a new alert: Addressees without a subscription receive
+## every alert, subscribers only alerts matching one of their queries
+def alert_recipients(alert_data):
+    
+    global to_addressees, subscriptions, matcher
+    
+    matched = matcher.match(alert_terms(alert_data))
+    
+    recipients = [addressee for addressee in to_addressees
+                  if addressee not in subscriptions]
+    recipients += [subscriber for subscriber in subscriptions
+                   if (subscriber in matched) and (subscriber not in recipients)]
+    
+    return recipients
+
+##------------------------------------------------------------------------------
+## SUMMARY TABLE: rows are rendered from whole columns at once and each row's
+## HTML fragment is cached by Alert Id and Revision Date, so only new or 
+## revised alerts are rendered on each run. The table is assembled in a single
+## join
+def read_row_cache(filename):
+    
+    if os.path.exists(filename):
+        with open(filename,'rb') as f:
+            return pickle.load(f)
+        
+    return dict()
+
+def write_row_cache(filename,cache):
+    
+    with open(filename,'wb') as f:
+        pickle.dump(cache,f)
+        
+def render_rows(tdf):
+    
+    global row_template
+    
+    return [row_template % values 
+            for values in zip(tdf['Alert Id'],tdf['Publish Date'],
+                              tdf['Revision Date'],tdf['Link'],tdf['Title'])]
+
+def render_summary_table(tdf):
+    
+    global table_header, row_cache_filename
+    
+    keys = list(zip(tdf['Alert Id'],tdf['Revision Date']))
+    
+    cache = read_row_cache(row_cache_filename)
+    
+    missing = [idx for idx,key in enumerate(keys) if key not in cache]
+    
+    if missing:
+        cache.update(zip([keys[idx] for idx in missing],
+                         render_rows(tdf.iloc[missing])))
+        
+    print('Summary table: %d rows (%d rendered, %d cached)' % 
+          (len(keys),len(missing),len(keys) - len(missing)))
+        
+    ## Keep only the rows still in the table
+    write_row_cache(row_cache_filename,{key: cache[key] for key in keys})
+    
+    return ''.join([table_header] + [cache[key] for key in keys] + ['</table><hr>'])
+
+##------------------------------------------------------------------------------
+## Add formatting to the output_resource Excel spreadsheet; rows (an iterable
+## of value tuples in column order) are streamed to the workbook in 
+## xlsxwriter's constant memory mode, so only the current row is held in 
+## memory while writing
+def create_web_resource(rows,columns,filename,sheetname):
+    
+    global widths
+        
+    workbook = xlsxwriter.Workbook(filename, {'constant_memory': True})
+    worksheet = workbook.add_worksheet(sheetname)
+    
+    header_format = workbook.add_format({'bold': True,
+                                         'border': 1,
+                                         'align': 'center',
+                                         'valign': 'top'})
 
     ## Set the column widths of the output_table
     for column,width in widths.items():
         worksheet.set_column(column, width)
+        
+    ## Header row, then data rows in order
+    for col,column_name in enumerate(columns):
+        worksheet.write_string(0, col, str(column_name), header_format)
+        
+    row = 0
+    for row,values in enumerate(rows, 1):
+        for col,value in enumerate(values):
+            
+            if isinstance(value,str):
+                worksheet.write_string(row, col, value)
+            elif pd.isna(value):
+                worksheet.write_blank(row, col, None)
+            else:
+                worksheet.write(row, col, value)
 
-    ## Set the autofilter.
-    worksheet.autofilter('A1:L%d' % len(df))
+    ## Set the autofilter over the header and data rows
+    worksheet.autofilter(0, 0, row, max(len(columns) - 1,0))
 
-    ## Close the Pandas Excel writer and output the Excel file.
-    writer.save()
+    workbook.close()
 
     return
 
+##------------------------------------------------------------------------------
+## Optional machine-readable copies of the alert history alongside the Excel
+## output_resource
+def write_sidecars(df,filename,sidecars):
+    
+    stub = os.path.splitext(filename)[0]
+    
+    written = list()
+    
+    if 'Parquet' in sidecars:
+        df.to_parquet(stub + '.parquet', index = False)
+        written.append(stub + '.parquet')
+        
+    if 'CSV' in sidecars:
+        df.to_csv(stub + '.csv', index = False)
+        written.append(stub + '.csv')
+        
+    return written
+
 ##------------------------------------------------------------------------------
 ## Unpacks a packed dictionary - creates a new dictionary with swapped
 ## key and value pairs
@@ -127,7 +836,7 @@ column_order = md['Output Table Column Order']
 
 ##------------------------------------------------------------------------------
 ## Regex patterns
-id_pat = r'<title>([A-Z0-9\-]*):'
+id_pat = r'([A-Z0-9\-]*):'
 publish_pat = r'date: ([a-z0-9 ,]*)[ |<]{1}'
 revision_pat = r'revised: ([a-z0-9 ,]*)<br'
 
@@ -136,8 +845,84 @@ revision_pat = r'revised: ([a-z0-9 ,]*)<br'
 cert_logo = 'https://upload.wikimedia.org/wikipedia/commons/7/74/US-CERT_logo.png'
 
 ##------------------------------------------------------------------------------
-## Configurations/Subscriptions
+## Incremental updates: conditional requests using the stored feed validators
+## and early stop at the first known alert (the feed lists newest alerts first)
+incremental = md.get('Incremental Update',True)
+feed_state_filename = md.get('Feed State Filename','USCERT Feed State.json')
+
+##------------------------------------------------------------------------------
+## HTML-formatted summary table header and row template
+headers = ['Alert Id','Publish Date','Revision Date','Title']
+
+table_header = '<img src="%s">' % cert_logo
+table_header += '''
+<h1><font color="#003366">US-CERT National Cyber Awareness System Alerts</font></h1>
+<hr>
+<table style="width:100%">
+  <colgroup>
+    <col span="1" style="width: 10%;">
+    <col span="1" style="width: 15%;">
+    <col span="1" style="width: 15%;">
+    <col span="1" style="width: 60%;">
+  </colgroup>'''
+
+table_header += '''  <tr>%s</tr>''' % ''.join(['<th>%s</th>' % column_name 
+                                               for column_name in headers])
+
+row_template = '<tr><td>%s</td><td>%s</td><td>%s</td><td><a href="%s" target="blank">%s</a></td></tr>'
+
+##------------------------------------------------------------------------------
+## Alert store: SQLite alert history
+alert_store_filename = md.get('Alert Store Filename','USCERT Alerts.sqlite')
+
+##------------------------------------------------------------------------------
+## Export sidecars: Parquet and/or CSV copies of the alert history
+export_sidecars = md.get('Export Sidecars',[])
+
+## Rewrite the Excel export (and sidecars) on every run, not only when the
+## alert store changed
+always_export = md.get('Always Export',False)
+
+##------------------------------------------------------------------------------
+## Summary table: row fragment cache and limit to the most recent alerts
+## (null renders the full alert history)
+row_cache_filename = md.get('Summary Table Cache Filename','USCERT Summary Table Cache.pkl')
+summary_table_limit = md.get('Summary Table Limit',200)
+
+##------------------------------------------------------------------------------
+## Alert index: term pattern (words, CVE and alert ids, version numbers) and
+## words left out of the index and queries
+token_pat = r'[a-z0-9]+(?:[\-\._][a-z0-9]+)*'
+query_pat = r'\(|\)|"[^"]*"|[^\s()"]+'
+
+stop_words = set(md.get('Index Stop Words',
+                        ['a','an','and','are','as','at','be','by','for','from',
+                         'has','have','in','is','it','its','of','on','or','that',
+                         'the','this','to','was','were','which','will','with']))
+
+##------------------------------------------------------------------------------
+## Alert search: optional keyword/boolean queries over the full alert history
+alert_search = md.get('Alert Search',[])
+alert_search_limit = md.get('Alert Search Limit',25)
+
+if isinstance(alert_search,str):
+    alert_search = [alert_search]
+
+##------------------------------------------------------------------------------
+## Configurations/Subscriptions: Addressees receive every new alert; 
+## Subscriptions map an addressee to a keyword/boolean query (or a list of 
+## queries) and the addressee only receives matching alerts
 to_addressees = md['Addressees']
+subscriptions = md.get('Subscriptions',{})
+
+##------------------------------------------------------------------------------
+## Notifications: new alert email template (logo, link, title, summary) and 
+## the notification aggregator state file and rate limit (emails per 
+## recipient per hour)
+alert_email_template = '<img src="%s"><h1><a href="%s" target="blank">%s</a></h1>%s'
+
+notification_state_filename = md.get('Notification State Filename','Notification State.json')
+notification_rate_limit = md.get('Notification Rate Limit',10)
 
 ##------------------------------------------------------------------------------
 ## Set column widths for output_table
@@ -151,156 +936,190 @@ packed_widths = {12: ['A:A'],
 widths = unpack_dictionary(packed_widths)
 
 ##------------------------------------------------------------------------------
-## Create an empty EMAIL DF dataframe
-email_df = pd.DataFrame([], columns = ['To','CC','Subject','Body'])
+## New alert emails
+emails = list()
+
+if NotificationAggregator is not None:
+    aggregator = NotificationAggregator(notification_state_filename,
+                                        rate_limit = notification_rate_limit,
+                                        owner = 'US CERT')
 
 ################################################################################
 ## BODY
 
-## Remove brewlytics CV Type substrings from column names
-df = inputs.table.copy()
-inputs.table.columns = remove_cv_type_substrings(df)
-alert_ids = set(df['Alert Id'].tolist())
+##------------------------------------------------------------------------------
+## Open the alert store; seeded from the input alert history on the first run
+conn = open_alert_store(alert_store_filename)
+
+store_changed = False
+if alert_count(conn) == 0:
+    
+    ## Remove brewlytics CV Type substrings from column names
+    inputs.table.columns = remove_cv_type_substrings(inputs.table)
+    
+    history = inputs.table.reindex(columns = column_order)
+    seeded = insert_alerts(conn,history.to_dict(orient = 'records'))
+    
+    print('Seeded alert store with %d alerts from the alert history.' % seeded)
+    
+    store_changed = True
+    
+## Index alerts stored before the alert index existed
+indexed = index_unindexed_alerts(conn)
+if indexed:
+    print('Indexed %d alerts in the alert store.' % indexed)
+    
+## Subscription matcher for new alerts
+matcher = build_subscription_matcher(conn,subscriptions)
 
 ##------------------------------------------------------------------------------
-## Retrieve US CERT Alerts from RSS feed
+## Retrieve US CERT Alerts from RSS feed; in incremental mode the request is
+## conditional on the stored feed validators
 url = md['US CERT System Alert URL']
-r = requests.get(url)
+
+feed_state = read_feed_state(feed_state_filename)
+
+if incremental:
+    r = requests.get(url, headers = conditional_headers(feed_state,url), 
+                     stream = True)
+else:
+    r = requests.get(url, stream = True)
 
 ## If data returned, parse to extract new alerts
 add_to_repository = list()
-if (r.status_code >= 200) and (r.status_code < 300):
+feed_validators = None
+if r.status_code == 304:
+    
+    print('RSS feed not modified since the last retrieval.')
+    
+elif (r.status_code >= 200) and (r.status_code < 300):
     
-    ## Segment
-    rss_alerts = r.text.split('<item>')
-
     print('Successful retrieval of data!')
-    print('There are %d items in this RSS update.' % (len(rss_alerts) - 1))
     
     ##--------------------------------------------------------------------------
-    ## Extract US CERT Alerts from RSS results
-    new_alerts = list()
-    for alert in rss_alerts[1:]:
+    ## Extract US CERT Alerts from RSS items as the feed is parsed; the alert
+    ## id is extracted first and alerts already in the repository are skipped
+    items = 0
+    known = 0
+    feed_status = {'Truncated': False}
+    for item in iter_rss_items(r,feed_status):
         
-        ##----------------------------------------------------------------------
-        ## Extract alert id from title text
-        id_pat = r'<title>([A-Z0-9\-]*):'
-
-        alert_id = re.findall(id_pat,alert)
-        if alert_id:
-            alert_data = {'Alert Id': alert_id[0].strip()}
-        else:
-            alert_data = {'Alert Id': 'Unidentified'}
-
-        ##----------------------------------------------------------------------
-        ## Extract Publish and Revision Dates
-        publish_pat = r'date: ([a-z0-9 ,]*)[ |<]{1}'
-        revision_pat = r'revised: ([a-z0-9 ,]*)<br'
+        items += 1
+        alert_id = extract_alert_id(item)
         
-        alert_data['Publish Date'] = find_dates(weeble(alert),publish_pat)
-        alert_data['Revision Date'] = find_dates(weeble(alert),revision_pat)
+        if alert_exists(conn,alert_id):
             
-        ##----------------------------------------------------------------------
-        ## Extract Title, Link, and Description
-        for tag in ['title','link','description']:
-
-            pattern = '<%s>([\s\S]*?)</%s>' % (tag,tag)
-            scrapped = re.findall(pattern,alert,flags = re.IGNORECASE)
-
-            if scrapped:
-                alert_data[tag.title()] = scrapped[0].strip()
-            else:
-                alert_data[tag.title()] = None
-
-        ##----------------------------------------------------------------------
-        ## Extract Summary
-        summary = '<h3>Summary</h3>' + alert.split('<h3>Summary</h3>')[-1]
-        alert_data['Summary'] = weeble(summary)
+            known += 1
+            
+            ## Remaining items are older than this known alert
+            if incremental and (alert_id != 'Unidentified'):
+                print('Reached known alert %s; skipping older items.' % alert_id)
+                break
+            
+            continue
         
-        ##----------------------------------------------------------------------
-        ## Add provenance
-        alert_data['Date/Time Retrieved'] = now_str
-        alert_data['USCERT URL'] = url
+        alert_data = extract_alert(item,alert_id)
 
         ########################################################################
         ##----------------------------------------------------------------------
-        ## Check if new alerts are already in the repository; if not, add and 
-        ## send email
-        if alert_data['Alert Id'] not in alert_ids:
-            
-            add_to_repository.append(alert_data)
-            
-            print('New Alert published!! Sending Notification Email')
-            
-            h1 = '<h1><a href="%s" target="blank">%s</a></h1>'
-            stub = '<img src="%s">' % cert_logo
-            stub += h1 % (alert_data['Link'],alert_data['Title'])
-            stub += alert_data['Summary']
-            
-            email = {'To': ','.join(to_addressees),
-                     'CC': '',
-                     'Subject': alert_data['Title'],
-                     'Body': stub}
-            
-            md['Send Email'] = email
+        ## New alert; add to repository and send email to the addressees and
+        ## matching subscribers
+        add_to_repository.append(alert_data)
+        
+        recipients = alert_recipients(alert_data)
+        
+        if not recipients:
+            print('New Alert published; no matching subscriptions for %s' % alert_id)
+            continue
+        
+        print('New Alert published!! Sending Notification Email')
+        
+        values = (cert_logo,alert_data['Link'],alert_data['Title'],alert_data['Summary'])
+        
+        if NotificationAggregator is not None:
+            aggregator.notify('US CERT',recipients,alert_data['Title'],
+                              alert_email_template,values)
+        else:
+            emails.append({'To': ','.join(recipients),
+                           'CC': '',
+                           'Subject': alert_data['Title'],
+                           'Body': alert_email_template % values})
+        
+    r.close()
+    
+    print('There were %d items read from this RSS update.' % items)
+    print('%d new alerts, %d known alerts.' % (len(add_to_repository),known))
+    
+    ##--------------------------------------------------------------------------
+    ## Feed validators for the next conditional request; a truncated feed is
+    ## requested unconditionally on the next run
+    if not feed_status['Truncated']:
+        feed_validators = {'ETag': r.headers.get('ETag'),
+                           'Last-Modified': r.headers.get('Last-Modified'),
+                           'Retrieved': now_str}
 
-            email_df = pd.DataFrame([email])
+## One email per recipient of all new alerts (and alerts deferred by the
+## rate limit on earlier runs)
+if NotificationAggregator is not None:
+    
+    emails = aggregator.flush()
+    
+    print('Notifications: %d alerts queued, %d duplicates, %d deferred; %d emails.' %
+          (aggregator.counts['Added'],aggregator.counts['Duplicates'],
+           aggregator.counts['Deferred'],len(emails)))
 
-## If new alerts returned, add to repository
+md['Send Email'] = emails
+email_df = pd.DataFrame(emails, columns = email_columns)
+
+## If new alerts returned, append to the alert store
 if add_to_repository:
     
     print('Adding new alerts to history ...')
     
     new_alerts = pd.DataFrame(add_to_repository)[column_order]
-    tdf = pd.concat([df,new_alerts])[column_order]
+    added = insert_alerts(conn,new_alerts.to_dict(orient = 'records'))
     
-    tdf.sort_values(by = 'Alert Id', ascending = False, inplace = True)
+    print('%d alerts added; %d alerts in history.' % (added,alert_count(conn)))
     
-    tdf.reset_index(inplace = True)
-    tdf.drop(['index'], axis = 1, inplace = True)
+    store_changed = True
     
-else:
-    tdf = inputs.table.copy()
-
+## Store the feed validators only once the new alerts are committed and their
+## notifications flushed, so a failed run retrieves the same alerts again
+if feed_validators is not None:
     
-## Save as a instance local file for output_resource
+    feed_state[url] = feed_validators
+    write_feed_state(feed_state_filename,feed_state)
+    
+## Save as a instance local file for output_resource; rows are streamed from
+## the alert store sorted by Alert Id. The whole history is exported, so the
+## workbook and sidecars are only rewritten when the store changed on this run
+## or the workbook is missing (or on every run with Always Export)
 filename = 'USCERT_Alerts.xlsx'
 sheetname = 'US CERT Alerts'
-create_web_resource(tdf,filename,sheetname)
-
-##------------------------------------------------------------------------------
-## Create HTML-formatted table of all US-CERT Alerts for Mission Presenter 
-## IFrame
-headers = ['Alert Id','Publish Date','Revision Date','Title']
-
-href = '<a href="%s" target="blank">%s</a>'
-
-stub = '<img src="%s">' % cert_logo
-stub += '''
-<h1><font color="#003366">US-CERT National Cyber Awareness System Alerts</font></h1>
-<hr>
-<table style="width:100%">
-  <colgroup>
-    <col span="1" style="width: 10%;">
-    <col span="1" style="width: 15%;">
-    <col span="1" style="width: 15%;">
-    <col span="1" style="width: 60%;">
-  </colgroup>'''
 
-stub += '''  <tr>%s</tr>''' % ''.join(['<th>%s</th>' % column_name 
-                                       for column_name in headers])
+if always_export or store_changed or not os.path.exists(filename):
+    
+    create_web_resource(iter_alert_rows(conn,column_order),column_order,
+                        filename,sheetname)
+    
+    if export_sidecars:
+        
+        tdf = pd.DataFrame(iter_alert_rows(conn,column_order), columns = column_order)
+        
+        for sidecar in write_sidecars(tdf,filename,export_sidecars):
+            print('Wrote %s' % sidecar)
+            
+else:
+    
+    print('Alert store unchanged; keeping %s.' % filename)
 
-for idx in tdf.index:
-    row = tdf.loc[idx]
-    values = ''.join(['<td>%s</td>' % row[column_name] 
-                      for column_name in headers[:-1]])
-                     
-    values += '<td>%s</td>' % (href % (row['Link'],row['Title']))
-    stub += '''<tr>%s</tr>''' % values
-#     stub += '''<tr><td>%s</td></tr>''' % row['Description']
-stub += '</table><hr>'
+##------------------------------------------------------------------------------
+## Create HTML-formatted table of the most recent US-CERT Alerts for Mission
+## Presenter IFrame
+tdf = pd.DataFrame(iter_alert_rows(conn,column_order,summary_table_limit),
+                   columns = column_order)
 
-md['Summary Table'] = stub
+md['Summary Table'] = render_summary_table(tdf)
 
 ################################################################################
 ## OUTPUTS
@@ -313,3 +1132,22 @@ outputs.string = json.dumps(md['Summary Table'])
 
 ################################################################################
 ## SUMMARY
+
+print('')
+print('Alert history: %d alerts' % alert_count(conn))
+print('Most recently published alerts:\n\n- ' + 
+      '\n- '.join(['%s (%s): %s' % tuple(values) for values in 
+                   recent_alerts(conn,column_order)[['Alert Id','Publish Date','Title']].values]))
+
+for query in alert_search:
+    
+    start = datetime.utcnow()
+    total,results = search_alerts(conn,query,column_order,alert_search_limit)
+    elapsed = (datetime.utcnow() - start).total_seconds() * 1000
+    
+    print('')
+    print('Search "%s": %d alerts (%.1f ms)' % (query,total,elapsed))
+    for values in results[['Alert Id','Publish Date','Title']].values:
+        print('- %s (%s): %s' % tuple(values))
+
+conn.close()
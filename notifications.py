@@ -0,0 +1,411 @@
+################################################################################
+################################################################################
+## brewlytics Notification Aggregator
+##
+## Author: OutsideKen
+## Created: 2026-10-19
+## Updated: 2026-10-19
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+################################################################################
+## 2026-10-19 - Initial module: notification events from the model and
+##              sub-model scripts are deduplicated by content hash, batched
+##              into one digest email per recipient with per-recipient rate
+##              limits, and rendered from %-style templates compiled once;
+##              digests are output as a brewlytics email table or delivered
+##              over SMTP
+## 2026-10-19 - CC addresses are recipients of their own copy; an address CC'd
+##              on events sent to several recipients was sent every digest
+## 2026-10-19 - Deferred events are kept per owner (the calling script) and
+##              only re-added by that owner's aggregator; the state file is
+##              re-read, updated and replaced atomically under a file lock on
+##              flush so scripts sharing it do not overwrite each other;
+##              templates accept the full %-format grammar (%.1f, %r, widths)
+##
+################################################################################
+## USAGE
+##
+##     from notifications import NotificationAggregator
+##
+##     aggregator = NotificationAggregator('Notification State.json',
+##                                         owner = 'US CERT')
+##     aggregator.notify('US CERT',['analyst@example.com'],subject,
+##                       alert_template,{'title': title,'summary': summary})
+##     ...
+##     emails = aggregator.flush()     ## [{'To','CC','Subject','Body'}, ...]
+##     email_df = pd.DataFrame(emails, columns = email_columns)
+##
+################################################################################
+
+import hashlib
+import json
+import os
+import re
+import smtplib
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+
+## File locks on the state file; without fcntl (Windows) the state file is
+## still replaced atomically but not locked
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+iso8601 = '%Y-%m-%dT%H:%M:%S.%fZ'
+
+email_columns = ['To','CC','Subject','Body']
+
+## Conversion specifiers of a template (%s, %(name)s, %.1f, %-8r, ...):
+## optional mapping key, flags, width, precision, length modifier and
+## conversion; %% is a literal %
+placeholder_pat = re.compile(r'%%|%(?:\((\w+)\))?([#0\- +]*\d*(?:\.\d*)?[hlL]?[diouxXeEfFgGcrsa])')
+
+##------------------------------------------------------------------------------
+## Templates: a %-style template is split once into its literal text and
+## placeholders, so rendering is a single join with no parsing. Templates the
+## pattern does not fully account for (* widths, a stray %) are rendered with
+## the % operator. Compiled templates are cached by their text
+class Template(object):
+
+    def __init__(self,text):
+
+        self.text = text
+        self.literals = list()
+        self.placeholders = list()
+        self.fallback = False
+
+        ## Literal text between the placeholders with a % in it has a
+        ## specifier the pattern does not handle
+        literal = list()
+        position = 0
+        for match in placeholder_pat.finditer(text):
+
+            literal.append(text[position:match.start()])
+            self.fallback |= '%' in literal[-1]
+            position = match.end()
+
+            if match.group(0) == '%%':
+                literal.append('%')
+                continue
+
+            self.literals.append(''.join(literal))
+            self.placeholders.append((match.group(1),match.group(2)))
+            literal = list()
+
+        literal.append(text[position:])
+        self.fallback |= '%' in literal[-1]
+        self.literals.append(''.join(literal))
+
+    ## Render with a tuple of values (positional placeholders) or a dict
+    ## (named placeholders)
+    def render(self,values):
+
+        if self.fallback:
+            return self.text % (tuple(values) if isinstance(values,list) else values)
+
+        if isinstance(values,dict):
+            values = [values[name] for name,_ in self.placeholders]
+        elif not isinstance(values,(tuple,list)):
+            values = [values]
+
+        if len(values) != len(self.placeholders):
+            raise ValueError('Template has %d placeholders, %d values given' %
+                             (len(self.placeholders),len(values)))
+
+        parts = [self.literals[0]]
+        for (_,conversion),value,literal in zip(self.placeholders,values,self.literals[1:]):
+            parts.append(str(value) if conversion == 's' else ('%' + conversion) % (value,))
+            parts.append(literal)
+
+        return ''.join(parts)
+
+templates = dict()
+
+def compile_template(text):
+
+    global templates
+
+    if text not in templates:
+        templates[text] = Template(text)
+
+    return templates[text]
+
+## Content hash of a notification: the same subject and body from any source
+## is one notification
+def content_hash(subject,body):
+
+    return hashlib.sha1(('%s\x00%s' % (subject,body)).encode('utf-8')).hexdigest()
+
+def split_addresses(addresses):
+
+    if isinstance(addresses,str):
+        addresses = addresses.split(',')
+
+    return [address.strip() for address in (addresses or []) if address and address.strip()]
+
+##------------------------------------------------------------------------------
+## NOTIFICATION AGGREGATOR: collects notification events, drops events already
+## sent to a recipient within the deduplication window, and on flush builds
+## one email per recipient (the event itself, or a digest of all of the
+## recipient's events). CC addresses are recipients like the To addresses, so
+## an address on several events is sent each event once and digests carry no
+## CC line. A recipient who has been sent rate_limit emails in
+## the rate window has their events deferred to a later flush. Sent content
+## hashes, delivery times and deferred events are kept in a JSON state file
+## that several scripts may share; deferred events are kept under the owner
+## (the calling script) and only re-added by an aggregator of the same owner
+class NotificationAggregator(object):
+
+    def __init__(self,state_filename = None,rate_limit = 10,rate_window_minutes = 60,
+                 dedup_window_minutes = 1440,digest_template = None,section_template = None,
+                 now = None,owner = None):
+
+        global default_digest_template, default_section_template
+
+        self.state_filename = state_filename
+        self.owner = owner or ''
+        self.rate_limit = rate_limit
+        self.rate_window = timedelta(minutes = rate_window_minutes)
+        self.dedup_window = timedelta(minutes = dedup_window_minutes)
+        self.digest_template = compile_template(digest_template or default_digest_template)
+        self.section_template = compile_template(section_template or default_section_template)
+        self.now = now or datetime.utcnow()
+
+        self.state = read_notification_state(state_filename)
+
+        ## Content hash -> event; events keep insertion order
+        self.events = dict()
+        self.counts = {'Added': 0,'Duplicates': 0,'Deferred': 0}
+
+        for event in self.state['Deferred'].get(self.owner,list()):
+            self.add(event['Source'],event['To'],event['Subject'],event['Body'],event.get('CC'))
+
+    ## Recipients (of to) not yet sent this content within the dedup window
+    def unsent(self,key,to):
+
+        sent = self.state['Sent'].get(key)
+
+        if sent is None:
+            return to
+        if self.now - datetime.strptime(sent['Time'],iso8601) > self.dedup_window:
+            return to
+
+        return [recipient for recipient in to if recipient not in sent['To']]
+
+    ## Add a rendered notification for the To and CC addresses. Returns False
+    ## when every recipient has already been sent or queued the same content
+    def add(self,source,to,subject,body,cc = None):
+
+        key = content_hash(subject,body)
+        to = self.unsent(key,list(dict.fromkeys(split_addresses(to) + split_addresses(cc))))
+
+        event = self.events.get(key)
+        if event is not None:
+            to = [recipient for recipient in to if recipient not in event['To']]
+
+        if not to:
+            self.counts['Duplicates'] += 1
+            return False
+
+        if event is None:
+            self.events[key] = {'Source': source,
+                                'To': to,
+                                'Subject': subject,
+                                'Body': body}
+        else:
+            event['To'] += to
+
+        self.counts['Added'] += 1
+
+        return True
+
+    ## Render a notification body from a template and add it
+    def notify(self,source,to,subject,template,values,cc = None):
+
+        return self.add(source,to,subject,compile_template(template).render(values),cc)
+
+    def rate_limited(self,recipient):
+
+        deliveries = [delivery for delivery in self.state['Deliveries'].get(recipient,[])
+                      if self.now - datetime.strptime(delivery,iso8601) <= self.rate_window]
+        self.state['Deliveries'][recipient] = deliveries
+
+        return len(deliveries) >= self.rate_limit
+
+    def digest(self,recipient,events):
+
+        if len(events) == 1:
+            return {'To': recipient,
+                    'CC': '',
+                    'Subject': events[0]['Subject'],
+                    'Body': events[0]['Body']}
+
+        sources = list(dict.fromkeys(event['Source'] for event in events))
+        subject = '%d brewlytics Notifications: %s' % (len(events),', '.join(sources))
+
+        sections = ''.join([self.section_template.render({'source': event['Source'],
+                                                          'subject': event['Subject'],
+                                                          'body': event['Body']})
+                            for event in events])
+
+        return {'To': recipient,
+                'CC': '',
+                'Subject': subject,
+                'Body': self.digest_template.render({'subject': subject,
+                                                     'count': len(events),
+                                                     'sections': sections,
+                                                     'date': self.now.strftime('%d %B %Y at %H%MZ')})}
+
+    ##--------------------------------------------------------------------------
+    ## One email per recipient of the collected events; rate limited
+    ## recipients' events are deferred. The state file is re-read under its
+    ## lock, so content sent and deliveries made by other scripts since this
+    ## aggregator was created are counted, then the sent content hashes,
+    ## deliveries and this owner's deferred events are written back
+    def flush(self):
+
+        with state_lock(self.state_filename):
+
+            self.state = read_notification_state(self.state_filename)
+
+            emails = self.build_emails()
+
+            write_notification_state(self.state_filename,self.state)
+
+        self.events = dict()
+
+        return emails
+
+    def build_emails(self):
+
+        now_str = self.now.strftime(iso8601)
+
+        recipient_events = dict()
+        for key,event in self.events.items():
+            for recipient in self.unsent(key,event['To']):
+                recipient_events.setdefault(recipient,list()).append((key,event))
+
+        emails = list()
+        deferred = list()
+        for recipient,events in recipient_events.items():
+
+            if self.rate_limited(recipient):
+
+                deferred += [dict(event, To = [recipient]) for _,event in events]
+                self.counts['Deferred'] += len(events)
+
+                continue
+
+            emails.append(self.digest(recipient,[event for _,event in events]))
+            self.state['Deliveries'][recipient].append(now_str)
+
+            for key,_ in events:
+                sent = self.state['Sent'].setdefault(key,{'Time': now_str,'To': list()})
+                sent['Time'] = now_str
+                sent['To'].append(recipient)
+
+        ## Expire sent hashes and deliveries outside their windows
+        self.state['Sent'] = {key: sent for key,sent in self.state['Sent'].items()
+                              if self.now - datetime.strptime(sent['Time'],iso8601) <= self.dedup_window}
+        self.state['Deliveries'] = {recipient: deliveries for recipient,deliveries
+                                    in self.state['Deliveries'].items() if deliveries}
+
+        self.state['Deferred'][self.owner] = deferred
+        self.state['Deferred'] = {owner: events for owner,events
+                                  in self.state['Deferred'].items() if events}
+
+        return emails
+
+##------------------------------------------------------------------------------
+## Notification state between runs; deferred events by owner (a state file
+## written before owners were kept has a list of events, each taken as
+## deferred by its source)
+def read_notification_state(filename):
+
+    state = {'Sent': dict(),'Deliveries': dict(),'Deferred': dict()}
+
+    if filename and os.path.exists(filename):
+        with open(filename) as f:
+            state.update(json.load(f))
+
+    if isinstance(state['Deferred'],list):
+
+        deferred = dict()
+        for event in state['Deferred']:
+            deferred.setdefault(event['Source'],list()).append(event)
+
+        state['Deferred'] = deferred
+
+    return state
+
+## Write then rename so a reader never sees a partial state file
+def write_notification_state(filename,state):
+
+    if filename:
+
+        with open(filename + '.tmp','w') as f:
+            json.dump(state,f)
+
+        os.replace(filename + '.tmp',filename)
+
+## Exclusive lock on the state file (held on a separate lock file, as the
+## state file itself is replaced) for a read-modify-write of the state
+@contextmanager
+def state_lock(filename):
+
+    if not (filename and fcntl):
+        yield
+        return
+
+    with open(filename + '.lock','a') as f:
+
+        fcntl.flock(f,fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f,fcntl.LOCK_UN)
+
+##------------------------------------------------------------------------------
+## Deliver emails over one SMTP connection; returns the number sent
+def deliver(emails,host = 'localhost',port = 25,sender = 'brewlytics@localhost'):
+
+    with smtplib.SMTP(host,port) as smtp:
+        for email in emails:
+
+            message = EmailMessage()
+            message['From'] = sender
+            message['To'] = email['To']
+            if email.get('CC'):
+                message['Cc'] = email['CC']
+            message['Subject'] = email['Subject']
+            message.set_content(email['Body'], subtype = 'html')
+
+            smtp.send_message(message)
+
+    return len(emails)
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+## Digest of several notifications to one recipient: one section per
+## notification
+default_digest_template = '''<h2><b>%(subject)s</b></h2>
+<hr>
+%(sections)s
+<p><center>This brewlytics digest of %(count)d notifications was generated on %(date)s.</center></p>
+'''
+
+default_section_template = '''<h3>%(source)s: %(subject)s</h3>
+%(body)s
+<hr>
+'''
@@ -0,0 +1,262 @@
+################################################################################
+################################################################################
+## brewlytics Notification Aggregator - Throughput Benchmark
+##
+## Author: OutsideKen
+## Created: 2026-10-19
+## Updated: 2026-10-19
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+################################################################################
+## 2026-10-19 - Original script; sends bursts of synthetic notification events
+##              from the NGA, US CERT, Auto-MIME Type and persistence scripts
+##              (with repeated events) to a local SMTP stand-in, one email per
+##              event with concatenated bodies as the scripts did before and
+##              through notifications.NotificationAggregator, and reports
+##              events per second and emails delivered
+## 2026-10-19 - Compiled templates are checked against the % operator (%.1f,
+##              %r, widths, %% and named placeholders) before the benchmark
+##
+################################################################################
+## USAGE
+##
+## Bursts of 1,000, 5,000 and 20,000 events to 50 recipients:
+##     python notifications_benchmark.py
+##
+## A burst of 100,000 events to 500 recipients, 50% repeated:
+##     python notifications_benchmark.py --events 100000 --recipients 500 \
+##         --repeated 0.5
+##
+################################################################################
+
+import argparse
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+from notifications import NotificationAggregator, compile_template, deliver
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Local SMTP stand-in: accepts any sender and recipients and counts the
+## messages and recipients delivered; nothing is relayed
+class SMTPHandler(socketserver.StreamRequestHandler):
+
+    def reply(self,line):
+
+        self.wfile.write(('%s\r\n' % line).encode('ascii'))
+
+    def handle(self):
+
+        self.reply('220 localhost SMTP stand-in')
+
+        recipients = 0
+        for line in self.rfile:
+
+            command = line.decode('ascii','replace').strip().upper()
+
+            if command.startswith('EHLO') or command.startswith('HELO'):
+                self.reply('250 localhost')
+            elif command.startswith('RCPT'):
+                recipients += 1
+                self.reply('250 OK')
+            elif command == 'DATA':
+
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                for data in self.rfile:
+                    if data in [b'.\r\n',b'.\n']:
+                        break
+
+                with self.server.lock:
+                    self.server.messages += 1
+                    self.server.recipients += recipients
+                recipients = 0
+
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('250 OK')
+
+def start_smtp_server():
+
+    server = socketserver.ThreadingTCPServer(('127.0.0.1',0),SMTPHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.messages = 0
+    server.recipients = 0
+
+    threading.Thread(target = server.serve_forever, daemon = True).start()
+
+    return server
+
+##------------------------------------------------------------------------------
+## Burst of synthetic notification events: (source, recipients, subject,
+## template, values); a fraction of the events repeat an earlier event, as
+## when the same malformed report or alert is seen on consecutive runs
+def synthetic_events(n,recipients,repeated,seed = 1):
+
+    global source_templates
+
+    rng = random.Random(seed)
+
+    addresses = ['analyst%03d@example.com' % i for i in range(recipients)]
+    sources = list(source_templates)
+
+    events = list()
+    for i in range(n):
+
+        if events and (rng.random() < repeated):
+            events.append(rng.choice(events))
+            continue
+
+        source = rng.choice(sources)
+        subject = '%s notification %d' % (source,i)
+        values = (subject,'19 October 2026 at 1200Z','Demo','Model %d' % (i % 40),
+                  'Resource %d.csv' % i,'uuid-%08d' % i)
+
+        events.append((source,rng.sample(addresses,rng.randint(1,3)),subject,
+                       source_templates[source],values))
+
+    return events
+
+## Previous approach: each event's body concatenated and sent as its own email
+def concatenated_emails(events):
+
+    emails = list()
+    for source,to,subject,_,values in events:
+
+        body = '<h2><b>%s</b></h2>' % values[0]
+        body += '<hr>'
+        body += '<p>The following brewlytics activity occurred on %s.</p>' % values[1]
+        body += '<ul>'
+        body += '<li><b>brew Instance</b>: %s</li>' % values[2]
+        body += '<li><b>Model Name</b>: %s</li>' % values[3]
+        body += '<li><b>Filename</b>: %s</li>' % values[4]
+        body += '<li><b>UUID</b>: %s</li>' % values[5]
+        body += '</ul>'
+
+        emails.append({'To': ','.join(to),'CC': '','Subject': subject,'Body': body})
+
+    return emails
+
+def aggregated_emails(events,state_filename):
+
+    aggregator = NotificationAggregator(state_filename, rate_limit = 10)
+
+    for source,to,subject,template,values in events:
+        aggregator.notify(source,to,subject,template,values)
+
+    return aggregator.flush()
+
+## Compiled templates render as the % operator does
+def check_templates():
+
+    global template_checks
+
+    for text,values in template_checks:
+
+        rendered = compile_template(text).render(values)
+
+        if rendered != text % values:
+            raise AssertionError('Template %r rendered %r, %% gives %r' %
+                                 (text,rendered,text % values))
+
+def timed(function,*args):
+
+    start = time.perf_counter()
+    output = function(*args)
+
+    return output,time.perf_counter() - start
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+body_template = ('<h2><b>%s</b></h2><hr>'
+                 '<p>The following brewlytics activity occurred on %s.</p>'
+                 '<ul><li><b>brew Instance</b>: %s</li>'
+                 '<li><b>Model Name</b>: %s</li>'
+                 '<li><b>Filename</b>: %s</li>'
+                 '<li><b>UUID</b>: %s</li></ul>')
+
+source_templates = {'NGA Maritime Safety Broadcast': body_template,
+                    'US CERT': body_template,
+                    'Auto-MIME Type': body_template,
+                    'Save Resource': body_template}
+
+## Templates and values checked against the % operator
+template_checks = [('<p>Magnitude %.1f at %s</p>',(4.27,'12:00Z')),
+                   ('%(name)s: %(count)5d events, %(rate).2f%% of %(total)d',
+                    {'name': 'US CERT','count': 42,'rate': 12.345,'total': 340}),
+                   ('%-12s|%+d|%x|%r|%i',('left',7,255,'quoted',3.9)),
+                   ('%*d widths from the values',(6,42)),
+                   (body_template,('Subject','19 October 2026 at 1200Z','Demo',
+                                   'Model','Resource.csv','uuid-00000001'))]
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark notification aggregation and delivery')
+    parser.add_argument('--events', type = int, nargs = '+', default = [1000,5000,20000],
+                        help = 'events per burst')
+    parser.add_argument('--recipients', type = int, default = 50,
+                        help = 'distinct recipients')
+    parser.add_argument('--repeated', type = float, default = 0.3,
+                        help = 'fraction of events repeating an earlier event')
+    args = parser.parse_args()
+
+    check_templates()
+
+    server = start_smtp_server()
+    host,port = server.server_address
+
+    results = list()
+    for n in args.events:
+
+        events = synthetic_events(n,args.recipients,args.repeated)
+
+        for method in ['One email per event','Aggregated digests']:
+
+            with tempfile.TemporaryDirectory() as directory:
+
+                if method == 'One email per event':
+                    emails,build = timed(concatenated_emails,events)
+                else:
+                    emails,build = timed(aggregated_emails,events,
+                                         os.path.join(directory,'Notification State.json'))
+
+            messages = server.messages
+            _,send = timed(deliver,emails,host,port)
+
+            if server.messages - messages != len(emails):
+                raise AssertionError('SMTP stand-in received %d of %d emails' %
+                                     (server.messages - messages,len(emails)))
+
+            results.append({'Events': n,
+                            'Method': method,
+                            'Emails': len(emails),
+                            'Build (ms)': round(build * 1000,1),
+                            'Deliver (ms)': round(send * 1000,1),
+                            'Events/s': round(n / (build + send))})
+
+    server.shutdown()
+
+    print(pd.DataFrame(results).to_string(index = False))
@@ -0,0 +1,288 @@
+################################################################################
+################################################################################
+## brewlytics Sub-Model
+## Auto-MIME Type - Batch Resolution Benchmark
+## Author:  outsideKen
+## Created: 19 October 2026
+## Updated: 19 October 2026
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+## 2026-10-19 - Original script; resolves a batch of synthetic filenames with
+##              the Auto-MIME Type Python Script batch resolver, with and
+##              without the compiled lookup cache, and with the previous per-
+##              filename sub-model run (read the MIME Types CSV, build the
+##              dictionary and look up one extension), and reports filenames
+##              per second
+## 2026-10-19 - Added sniff benchmark; sniffs the content of small and large
+##              synthetic resources (PNG, XLSX, KMZ, PDF, gzip and CSV) with
+##              header-only reads and with whole-file reads and reports the
+##              time per resource
+################################################################################
+## USAGE
+##
+## Resolve 100,000 filenames:
+##     python "Auto-MIME Type Benchmark.py" resolve
+##
+## Resolve 1,000,000 filenames, timing 2,000 previous per-filename runs:
+##     python "Auto-MIME Type Benchmark.py" resolve --filenames 1000000 --per-file 2000
+##
+## Sniff 10 resources of each type at 4 KB and 20 MB:
+##     python "Auto-MIME Type Benchmark.py" sniff --sizes 0.004 20 --count 10
+##
+################################################################################
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import types
+import zipfile
+
+import pandas as pd
+
+################################################################################
+## FUNCTIONS
+
+##------------------------------------------------------------------------------
+## Execute the FUNCTIONS and MODEL DATA sections of the sub-model script 
+## (everything before the BODY banner)
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global body_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(body_banner)]
+
+    module = types.ModuleType('brewlytics')
+    module.inputs = types.SimpleNamespace()
+    module.outputs = types.SimpleNamespace()
+    module.__all__ = ['inputs','outputs']
+    sys.modules['brewlytics'] = module
+
+    namespace = {'__name__': 'auto_mime_model'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic resource filenames: known extensions in mixed case, multi-part
+## extensions, unknown extensions and missing extensions
+##------------------------------------------------------------------------------
+def synthetic_filenames(n,extensions,seed = 1):
+
+    rng = random.Random(seed)
+
+    stems = ['NGA Maritime Safety Broadcast','USGS Earthquakes','Starlink Catalog',
+             'report','Alerts History','data.v2','track_%d']
+
+    filenames = list()
+    for i in range(n):
+
+        stem = rng.choice(stems).replace('%d',str(i % 1000))
+        kind = rng.random()
+
+        if kind < 0.70:
+            filenames.append('%s.%s' % (stem,rng.choice(extensions)))
+        elif kind < 0.85:
+            filenames.append('%s.%s' % (stem,rng.choice(extensions).upper()))
+        elif kind < 0.92:
+            filenames.append('%s.%s' % (stem,rng.choice(['tar.gz','TAR.GZ','tar.bz2','tgz'])))
+        elif kind < 0.97:
+            filenames.append('%s.%s' % (stem,rng.choice(['xyz','docm','bak'])))
+        else:
+            filenames.append(stem)
+
+    return filenames
+
+##------------------------------------------------------------------------------
+## Previous sub-model run for one filename: read the MIME Types CSV, build the
+## extension dictionary and look up the last extension
+##------------------------------------------------------------------------------
+def per_file_resolve(csv_filename,filename):
+
+    tdf = pd.read_csv(csv_filename)
+    tdf.columns = [column_names.split('{')[0] for column_names in tdf.columns]
+
+    mime = tdf.set_index('File Extension').to_dict(orient = 'index')
+
+    if '.' in filename:
+        file_extension = filename.split('.')[-1].lower()
+        if file_extension in mime.keys():
+            return filename,mime[file_extension]['MIME Type'],False
+        return filename,'text/plain',True
+
+    return filename + '.txt','text/plain',True
+
+def batch_resolve(namespace,csv_filename,filenames):
+
+    namespace['mime_lookup'] = namespace['load_MIME_lookup'](csv_filename)
+
+    return namespace['resolve_MIME_types'](filenames)
+
+##------------------------------------------------------------------------------
+## Synthetic resource of about size_mb MB of a content type, padded with 
+## random bytes (a stored member of the ZIP-based types, so the ZIP central
+## directory stays at the end of the file)
+##------------------------------------------------------------------------------
+def write_resource(filename,content_type,size_mb):
+
+    padding = os.urandom(int(size_mb * 1e6))
+
+    if content_type in ['xlsx','kmz']:
+
+        members = {'xlsx': ['[Content_Types].xml','_rels/.rels','xl/workbook.xml',
+                            'xl/worksheets/sheet1.xml','xl/media/image1.bin'],
+                   'kmz': ['doc.kml','files/image1.bin']}[content_type]
+
+        with zipfile.ZipFile(filename,'w',zipfile.ZIP_STORED) as z:
+            for name in members[:-1]:
+                z.writestr(name,'<xml/>')
+            z.writestr(members[-1],padding)
+
+        return
+
+    with open(filename,'wb') as f:
+
+        if content_type == 'csv':
+            row = b'2026-10-19T00:00:00Z,35.7,-117.5,8.2,4.1\n'
+            f.write(b'time,latitude,longitude,depth,mag\n' + row * (len(padding) // len(row) + 2))
+        else:
+            f.write({'png': b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR',
+                     'pdf': b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n',
+                     'gz': b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\x03'}[content_type] + padding)
+
+## Previous approach to content detection: read the whole resource
+def whole_file_sniff(namespace,filename):
+
+    with open(filename,'rb') as f:
+        return namespace['sniff_content'](f.read())
+
+def sniff_benchmark(namespace,sizes,count):
+
+    global content_types
+
+    results = list()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size_mb in sizes:
+
+            filenames = list()
+            for content_type in content_types:
+                for i in range(count):
+
+                    filename = os.path.join(directory,'%s_%g_%d' % (content_type,size_mb,i))
+                    write_resource(filename,content_type,size_mb)
+                    filenames.append((filename,content_type))
+
+            for reader,function in [('Header read',namespace['sniff_content']),
+                                    ('Whole-file read',lambda filename: whole_file_sniff(namespace,filename))]:
+
+                detected,elapsed = timed(lambda: [function(filename) for filename,_ in filenames])
+
+                if detected != [content_type for _,content_type in filenames]:
+                    raise AssertionError('Content sniffing failed: %s' % reader)
+
+                results.append({'Resource Size (MB)': size_mb,
+                                'Resources': len(filenames),
+                                'Reader': reader,
+                                'Time per Resource (ms)': round(elapsed * 1000 / len(filenames),3)})
+
+    print(pd.DataFrame(results).to_string(index = False))
+
+def timed(function,*args):
+
+    start = time.perf_counter()
+    output = function(*args)
+
+    return output,time.perf_counter() - start
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+body_banner = '################################################################################\n## BODY'
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+default_script = os.path.join(script_directory,'Auto-MIME Type.py')
+default_csv = os.path.join(script_directory,'Auto-MIME Types (2022-04-28).csv')
+
+content_types = ['png','xlsx','kmz','pdf','gz','csv']
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark Auto-MIME Type batch resolution and content sniffing')
+    parser.add_argument('--script', default = default_script,
+                        help = 'Auto-MIME Type Python Script to benchmark')
+    parser.add_argument('--csv', default = default_csv,
+                        help = 'MIME Types CSV')
+    subparsers = parser.add_subparsers(dest = 'benchmark', required = True)
+
+    resolve_parser = subparsers.add_parser('resolve', help = 'batch filename resolution')
+    resolve_parser.add_argument('--filenames', type = int, default = 100000,
+                                help = 'filenames in the batch')
+    resolve_parser.add_argument('--per-file', type = int, default = 1000,
+                                help = 'previous per-filename runs to time (extrapolated to the batch)')
+
+    sniff_parser = subparsers.add_parser('sniff', help = 'content sniffing')
+    sniff_parser.add_argument('--sizes', type = float, nargs = '+', default = [0.004,20],
+                              help = 'resource sizes (MB)')
+    sniff_parser.add_argument('--count', type = int, default = 10,
+                              help = 'resources of each content type and size')
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+
+    if args.benchmark == 'sniff':
+
+        namespace['mime_lookup'] = namespace['compile_MIME_lookup'](open(args.csv,'rb').read())
+        sniff_benchmark(namespace,args.sizes,args.count)
+
+        sys.exit()
+
+    extensions = list(namespace['compile_MIME_lookup'](open(args.csv,'rb').read())['Lookup'])
+    filenames = synthetic_filenames(args.filenames,[extension for extension in extensions
+                                                    if '.' not in extension])
+
+    results = list()
+
+    ## Previous sub-model: one run per filename
+    sample = filenames[:args.per_file]
+    previous,elapsed = timed(lambda: [per_file_resolve(args.csv,filename) for filename in sample])
+    results.append({'Resolver': 'Per-filename sub-model run (extrapolated)',
+                    'Filenames': len(filenames),
+                    'Time (s)': round(elapsed * len(filenames) / len(sample),2),
+                    'Filenames/s': round(len(sample) / elapsed)})
+
+    with tempfile.TemporaryDirectory() as directory:
+
+        namespace['lookup_cache_filename'] = os.path.join(directory,'Auto-MIME Types.pkl')
+
+        for resolver in ['Batch (lookup compiled)','Batch (lookup cached)']:
+
+            resolved,elapsed = timed(batch_resolve,namespace,args.csv,filenames)
+            results.append({'Resolver': resolver,
+                            'Filenames': len(filenames),
+                            'Time (s)': round(elapsed,3),
+                            'Filenames/s': round(len(filenames) / elapsed)})
+
+    ## Batch results agree with the previous resolver apart from the extension
+    ## case correction and multi-part (tar.*) extensions
+    for previous_result,(_,row) in zip(previous,resolved.iterrows()):
+        if '.tar.' not in row['Filename'].lower():
+            if ((previous_result[0].lower(),previous_result[1],previous_result[2]) !=
+                (row['Corrected Filename'].lower(),row['MIME Type'],row['MIME Error'])):
+                raise AssertionError('Batch result differs for %s' % row['Filename'])
+
+    print('%d filenames, %d MIME errors\n' % (len(resolved),resolved['MIME Error'].sum()))
+    print(pd.DataFrame(results).to_string(index = False))
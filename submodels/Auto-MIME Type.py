@@ -4,7 +4,7 @@
 ## Auto-MIME Type with Error Notification
 ## Author:  outsideKen
 ## Created: 27 June 2020
-## Updated: 28 April 2022
+## Updated: 19 October 2026
 ##
 ################################################################################
 ################################################################################
@@ -31,14 +31,48 @@
 ## 2022-04-28 - Cleaned up Python Script and removed code no longer required;
 ##              - Improved functionality of Error Notification
 ##              - Updated model to use Github-hosted Python Script
+## 2026-10-19 - Added batch mode; a table of filenames is resolved in one run
+##              against a MIME lookup compiled from the MIME Types CSV and 
+##              cached between runs; multi-part file extensions (tar.gz) and
+##              upper/mixed case extensions are recognized and corrected
+## 2026-10-19 - Added content sniffing; the MIME type is detected from the
+##              first bytes of the resource (and the ZIP central directory of
+##              Office and KMZ files) with a compiled signature table and 
+##              reconciled with the filename extension
+## 2026-10-19 - MIME Error Notifications go through the shared notification
+##              aggregator (notifications.py); one notification per filename,
+##              deduplicated and sent in one digest per addressee with a rate
+##              limit
+## 2026-10-19 - A ZIP archive is only taken for a KMZ when its first member is
+##              a KML file or it has a doc.kml at the root, and a .zip file
+##              extension is kept for any ZIP-based content; sniffed text no
+##              longer replaces a recognized file extension (plain text is
+##              treated as not recognized); batch resources that are missing
+##              or cannot be read are reported and left unsniffed
 ################################################################################
 
+import csv
+import hashlib
+import io
 import json
+import os
 import pandas as pd
+import pickle
+import re
+import struct
+import zlib
 
 from brewlytics import *
 from datetime import datetime
 
+## Shared notification aggregator; without it one MIME Error Notification 
+## listing every filename is output
+try:
+    from notifications import NotificationAggregator, email_columns
+except ImportError:
+    NotificationAggregator = None
+    email_columns = ['To','CC','Subject','Body']
+
 ################################################################################
 ## FUNCTIONS
 
@@ -47,39 +81,338 @@ def remove_cv_type_substrings(df):
     return [column_names.split('{')[0] for column_names in df.columns]
 
 ##------------------------------------------------------------------------------
-## get_MIME_type: Checks filename for a '.' and splits on the '.' to extract the
-## file extension. The file extension is checked in the MIME Types dictionary
-## - if the file extension is in the MIME Types dictionary the mime_type is set
-##   and mime_error is set to False
-## - if the file extension is NOT in the MIME Types dictionary the mime_type is
-##   set and mime_error is set to True
+## MIME LOOKUP: the MIME Types CSV compiled to a dictionary of lowercase file
+## extension -> MIME type and the largest number of parts in an extension (2
+## for 'tar.gz'). The compiled lookup is pickled with the SHA-1 of the CSV, so
+## the CSV is only parsed again when it changes
+##------------------------------------------------------------------------------
+def read_resource(resource):
+
+    if isinstance(resource,(str,os.PathLike)):
+        with open(resource,'rb') as f:
+            return f.read()
+
+    content = resource.read()
+    if hasattr(resource,'seek'):
+        resource.seek(0)
+
+    return content.encode('utf-8') if isinstance(content,str) else content
+
+def compile_MIME_lookup(content):
+
+    rows = csv.reader(io.StringIO(content.decode('utf-8-sig')))
+
+    ## Remove brewlytics CV Type substrings from column names
+    header = [column_name.split('{')[0] for column_name in next(rows)]
+    extension_idx = header.index('File Extension')
+    mime_idx = header.index('MIME Type')
+
+    lookup = dict()
+    for row in rows:
+        if row and row[extension_idx].strip():
+            lookup[row[extension_idx].strip().lstrip('.').lower()] = row[mime_idx].strip()
+
+    return {'Lookup': lookup,
+            'Max Parts': max([extension.count('.') + 1 for extension in lookup], default = 1)}
+
+def load_MIME_lookup(resource):
+
+    global lookup_cache_filename
+
+    content = read_resource(resource)
+    key = hashlib.sha1(content).hexdigest()
+
+    if lookup_cache_filename and os.path.exists(lookup_cache_filename):
+
+        with open(lookup_cache_filename,'rb') as f:
+            compiled = pickle.load(f)
+
+        if compiled.get('Key') == key:
+            return compiled
+
+    compiled = compile_MIME_lookup(content)
+    compiled['Key'] = key
+
+    if lookup_cache_filename:
+        with open(lookup_cache_filename,'wb') as f:
+            pickle.dump(compiled,f)
+
+    return compiled
+
+##------------------------------------------------------------------------------
+## get_MIME_type: Strips surrounding whitespace and trailing '.'s from the
+## filename and checks the last parts of the filename, longest first (so
+## 'tar.gz' is found before 'gz'), against the MIME lookup, ignoring case
+## - if the file extension is in the MIME lookup the mime_type is set, the
+##   extension in the filename is lowercased and mime_error is set to False
+## - if the file extension is NOT in the MIME lookup the mime_type is set to
+##   'text/plain' and mime_error is set to True
 ## - if no file extension is found in the user-defined filename, a '.txt' will 
 ##   be appended to the filename, the mime_type will be set to 'text/plain' and
 ##   the mime_error is set to True  
 ##------------------------------------------------------------------------------
 def get_MIME_type(filename):
-    
-    # Extract file extension from filename input
-    if '.' in filename:
-        file_extension = filename.split('.')[-1].lower()
-        
-        ## Check for file_extension in mime.keys
-        if file_extension in mime.keys():
-            mime_type = mime[file_extension]['MIME Type']
-            mime_error = False
-        else:
-            
-            ## Default MIME type if file extension not recognized
-            mime_type = 'text/plain'
-            mime_error = True
-            
+
+    global mime_lookup
+
+    stem,file_extension = split_extension(filename)
+
+    if file_extension:
+        return stem + '.' + file_extension,mime_lookup['Lookup'][file_extension],False
+
+    if '.' not in stem.rsplit('/',1)[-1]:
+        return stem + '.txt','text/plain',True
+
+    ## Default MIME type if file extension not recognized
+    return stem,'text/plain',True
+
+## Filename without its recognized file extension and the lowercased file
+## extension (None if not recognized)
+def split_extension(filename):
+
+    global mime_lookup
+
+    filename = filename.strip().rstrip('.')
+    parts = filename.rsplit('/',1)[-1].split('.')
+
+    for n in range(min(mime_lookup['Max Parts'],len(parts) - 1),0,-1):
+
+        file_extension = '.'.join(parts[-n:]).lower()
+
+        if file_extension in mime_lookup['Lookup']:
+            return filename.rsplit('.',n)[0],file_extension
+
+    return filename,None
+
+##------------------------------------------------------------------------------
+## CONTENT SNIFFING: the file extension of the resource content is detected
+## from the first header_bytes of the resource; only ZIP archives are read
+## further, at most zip_tail_bytes from the end of the file for the names in
+## the central directory that tell Office documents from plain ZIP.
+## The cost is the same whatever the size of the resource
+##------------------------------------------------------------------------------
+
+## One regular expression of all of the content signatures, each an anchored
+## alternative; the matching alternative's group number gives the extension
+def compile_signatures(signatures):
+
+    pattern = b'|'.join([b'(' + signature + b')' for _,signature in signatures])
+
+    return re.compile(pattern, re.DOTALL),[extension for extension,_ in signatures]
+
+## Bytes from the start (or end) of a resource given as a path, an open
+## binary file or bytes; an open file is left at its current position
+def read_bytes(resource,size,from_end = False):
+
+    if isinstance(resource,(bytes,bytearray,memoryview)):
+        return bytes(resource[-size:] if from_end else resource[:size])
+
+    if isinstance(resource,(str,os.PathLike)):
+        with open(resource,'rb') as f:
+            return read_bytes(f,size,from_end)
+
+    position = resource.tell()
+
+    if from_end:
+        resource.seek(max(resource.seek(0,os.SEEK_END) - size,0))
     else:
-        ## Default MIME type if file extension not recognized
-        filename += '.txt'
-        mime_type = 'text/plain'
-        mime_error = True
-        
-    return filename,mime_type,mime_error
+        resource.seek(0)
+    data = resource.read(size)
+
+    resource.seek(position)
+
+    return data
+
+## Member names of a ZIP archive from the local file headers (in the header)
+## or central directory entries (in the tail)
+def zip_member_names(data,central_directory = False):
+
+    signature,offset,length_offset = ((b'PK\x01\x02',46,28) if central_directory else
+                                      (b'PK\x03\x04',30,26))
+
+    names = list()
+
+    idx = data.find(signature)
+    while idx >= 0 and idx + offset <= len(data):
+
+        length = struct.unpack('<H',data[idx + length_offset:idx + length_offset + 2])[0]
+        names.append(data[idx + offset:idx + offset + length].decode('utf-8','replace'))
+
+        idx = data.find(signature,idx + offset + length)
+
+    return names
+
+## Office document or KMZ file extension from ZIP member names (in archive
+## order); a KMZ has a KML file as its first member or doc.kml at the root
+def zip_content(names):
+
+    global zip_members
+
+    for name in names:
+        for member,extension in zip_members:
+            if name.startswith(member):
+                return extension
+
+    if names and (names[0].lower().endswith('.kml') or ('doc.kml' in names)):
+        return 'kmz'
+
+    return None
+
+## Text formats: KML, HTML, JSON or CSV (two or more complete lines with the
+## same number of comma-separated fields); None for binary or plain text
+def sniff_text(header):
+
+    if b'\x00' in header:
+        return None
+
+    try:
+        text = header.decode('utf-8')
+    except UnicodeDecodeError as e:
+        ## A multi-byte character may be cut off at the end of the header
+        if e.start < len(header) - 3:
+            return None
+        text = header[:e.start].decode('utf-8')
+
+    text = text.lstrip('\ufeff \t\r\n')
+    start = text[:256].lower()
+
+    if '<kml' in text:
+        return 'kml'
+    if start.startswith('<!doctype html') or start.startswith('<html'):
+        return 'html'
+    if text[:1] in ['{','[']:
+        return 'json'
+
+    lines = text.splitlines()[:-1]
+    if len(lines) >= 2:
+        fields = [len(row) for row in csv.reader(lines)]
+        if fields[0] > 1 and len(set(fields)) == 1:
+            return 'csv'
+
+    return None
+
+## File extension of the resource content; None when not recognized
+def sniff_content(resource):
+
+    global content_signatures, header_bytes, zip_tail_bytes
+
+    header = read_bytes(resource,header_bytes)
+    if not header:
+        return None
+
+    match = content_signatures[0].match(header)
+    if match is None:
+        return sniff_text(header)
+
+    content_extension = content_signatures[1][match.lastindex - 1]
+
+    ## The central directory is only read when the members in the header do
+    ## not tell the ZIP-based type (Office documents list [Content_Types].xml
+    ## first)
+    if content_extension == 'zip':
+        zip_extension = (zip_content(zip_member_names(header)) or
+                         zip_content(zip_member_names(read_bytes(resource,zip_tail_bytes,True),True)))
+        return zip_extension or content_extension
+
+    ## A tar archive inside gzip has the tar magic in its first decompressed
+    ## block
+    if content_extension == 'gz':
+        try:
+            block = zlib.decompressobj(31).decompress(header,512)
+            if block[257:262] == b'ustar':
+                return 'tar.gz'
+        except zlib.error:
+            pass
+
+    return content_extension
+
+## sniff_content for a resource that may be missing (None) or unreadable; an
+## unreadable resource is reported and left unsniffed
+def sniff_resource(resource):
+
+    if resource is None:
+        return None
+
+    try:
+        return sniff_content(resource)
+    except OSError as e:
+        print('Resource not sniffed: %s' % e)
+        return None
+
+##------------------------------------------------------------------------------
+## reconcile_MIME_type: get_MIME_type checked against the content file 
+## extension
+## - if the content was not recognized, or has the same MIME type as the file
+##   extension or is in the same family as the file extension (a ZIP archive
+##   named .xlsx, an Office document named .zip), the file extension is kept
+## - text content (detected without a signature) never replaces a recognized
+##   file extension
+## - if the file extension is recognized but does not match the binary
+##   content, it is replaced with the content file extension
+## - if the file extension is missing the content file extension is appended;
+##   an unrecognized file extension is kept but the MIME type is set from the
+##   content
+## - mime_error is only set when neither the file extension nor the content
+##   were recognized
+##------------------------------------------------------------------------------
+def reconcile_MIME_type(filename,content_extension):
+
+    global mime_lookup, content_families, text_extensions
+
+    corrected_filename,mime_type,mime_error = get_MIME_type(filename)
+
+    if content_extension is None:
+        return corrected_filename,mime_type,mime_error
+
+    content_mime_type = mime_lookup['Lookup'][content_extension]
+    stem,file_extension = split_extension(filename)
+
+    if file_extension and ((mime_type == content_mime_type) or
+                           (content_extension in text_extensions) or
+                           (file_extension in content_families.get(content_extension,[])) or
+                           (content_extension in content_families.get(file_extension,[]))):
+        return corrected_filename,mime_type,mime_error
+
+    if (not file_extension) and ('.' in stem.rsplit('/',1)[-1]):
+        return stem,content_mime_type,False
+
+    return stem + '.' + content_extension,content_mime_type,False
+
+##------------------------------------------------------------------------------
+## resolve_MIME_types: get_MIME_type for a list of filenames in one call; each
+## distinct filename is resolved once. With resources (paths, open files or 
+## bytes; None where there is no resource) the content of each resource is
+## sniffed and reconciled with its filename; a resource that cannot be read is
+## reported and resolved from its filename alone. Returns a table of the filenames
+## with their corrected filenames, MIME types and MIME errors (and content
+## file extensions)
+##------------------------------------------------------------------------------
+def resolve_MIME_types(filenames,resources = None):
+
+    filenames = ['' if pd.isna(filename) else str(filename) for filename in filenames]
+
+    if resources is not None:
+
+        content_extensions = [sniff_resource(resource) for resource in resources]
+
+        df = pd.DataFrame([reconcile_MIME_type(filename,content_extension)
+                           for filename,content_extension in zip(filenames,content_extensions)],
+                          columns = ['Corrected Filename','MIME Type','MIME Error'])
+        df['Content Extension'] = content_extensions
+
+    else:
+
+        resolved = dict()
+        for filename in filenames:
+            if filename not in resolved:
+                resolved[filename] = get_MIME_type(filename)
+
+        df = pd.DataFrame([resolved[filename] for filename in filenames],
+                          columns = ['Corrected Filename','MIME Type','MIME Error'])
+
+    df.insert(0,'Filename',filenames)
+
+    return df
 
 ################################################################################
 ## MODEL DATA
@@ -89,6 +422,49 @@ iso8601 = '%Y-%m-%dT%H:%M:%S.%fZ'
 now = datetime.utcnow()
 now_str = now.strftime('%d %B %Y at %H%MZ')
 
+## Compiled MIME lookup cache
+lookup_cache_filename = 'Auto-MIME Types.pkl'
+
+##------------------------------------------------------------------------------
+## Content sniffing: bytes read from the start of each resource and, for ZIP
+## archives, from the end; content signatures (file extension, pattern at the
+## start of the file) in the order they are tried; ZIP member name prefixes
+## of Office documents (KMZ is told by its first member); file extensions of
+## text content, which is detected without a signature; and file extensions
+## that agree with a detected content type with a different MIME type
+##------------------------------------------------------------------------------
+
+content_sniffing = True
+header_bytes = 512
+zip_tail_bytes = 65536
+
+content_signatures = compile_signatures([('png',rb'\x89PNG\r\n\x1a\n'),
+                                         ('jpg',rb'\xff\xd8\xff'),
+                                         ('gif',rb'GIF8[79]a'),
+                                         ('tif',rb'II\*\x00|MM\x00\*'),
+                                         ('bmp',rb'BM.{4}\x00\x00\x00\x00'),
+                                         ('ico',rb'\x00\x00\x01\x00'),
+                                         ('pdf',rb'%PDF-'),
+                                         ('zip',rb'PK\x03\x04|PK\x05\x06'),
+                                         ('gz',rb'\x1f\x8b\x08'),
+                                         ('bz2',rb'BZh[1-9]'),
+                                         ('z',rb'\x1f\x9d'),
+                                         ('tar',rb'.{257}ustar'),
+                                         ('rtf',rb'\{\\rtf'),
+                                         ('shp',rb'\x00\x00\x27\x0a'),
+                                         ('pkl',rb'\x80[\x02-\x05]')])
+
+zip_members = [('word/','docx'),
+               ('xl/','xlsx'),
+               ('ppt/','pptx')]
+
+text_extensions = ['csv','htm','html','json','kml','py','txt']
+content_families = {'zip': ['docx','kmz','pptx','xlsx'],
+                    'gz': ['gtz','tar.gz','tgz'],
+                    'bz2': ['bz','tar.bz2'],
+                    'tar': ['gtar'],
+                    'shp': ['shx']}
+
 ##------------------------------------------------------------------------------
 ## Create brewlytics Instance from the 'Get Brew Host' functional
 ##------------------------------------------------------------------------------
@@ -131,31 +507,27 @@ email_template = '''
 <p><center>This brewlytics email was generated on %s.</center></p>
 '''
 
+## Notification aggregator state file and rate limit (emails per addressee
+## per hour)
+notification_state_filename = 'Notification State.json'
+notification_rate_limit = 10
+
 ################################################################################
 ## BODY
 ################################################################################
 
 ##--------------------------------------------------------------------------
-## INPUTS.RESOURCES[0]: MIME Types CSV
+## INPUTS.RESOURCES[0]: MIME Types CSV, compiled to the MIME lookup (read
+## from the lookup cache when the CSV is unchanged)
 ##--------------------------------------------------------------------------
 
-tdf = pd.read_csv(inputs.resources[0])
-
-## Remove brewlytics CV Type substrings from column names
-tdf.columns = remove_cv_type_substrings(tdf)
+mime_lookup = load_MIME_lookup(inputs.resources[0])
 
 print()
-print('Number of File Extensions: %d' % len((tdf['File Extension'].unique())))
-print('Number of Unique MIME Types: %d' % len((tdf['MIME Type'].unique())))
+print('Number of File Extensions: %d' % len(mime_lookup['Lookup']))
+print('Number of Unique MIME Types: %d' % len(set(mime_lookup['Lookup'].values())))
 print()
 
-##--------------------------------------------------------------------------
-## Convert the tdf dataframe to a dictionary with 'File Extension' as the 
-## key
-##--------------------------------------------------------------------------
-
-mime = tdf.set_index('File Extension').to_dict(orient = 'index')
-
 ##--------------------------------------------------------------------------
 ## INPUTS.STRING: Filename with File Type Extension
 ##--------------------------------------------------------------------------
@@ -168,40 +540,101 @@ instance = instances[host]['Instance']
 model_url = instances[host]['Root URL'] + parent_uuid
 parent_model_html = '<a href="%s" target="blank">%s</a>' % (model_url,parent_model_name)
 
+##--------------------------------------------------------------------------
+## INPUTS.TABLE (optional): Batch of filenames in a 'Filename' column; when
+## given, all of the filenames are resolved in this run
+##--------------------------------------------------------------------------
+
+batch = getattr(inputs,'table',None)
+batch_mode = (batch is not None) and (len(batch) > 0)
+
+##--------------------------------------------------------------------------
+## INPUTS.RESOURCES[1] (optional): Resource content to sniff; in batch mode
+## a 'Resource' column of resource paths
+##--------------------------------------------------------------------------
+
+resource = inputs.resources[1] if len(inputs.resources) > 1 else None
+
 ## Auto-Generate MIME type based on filename
 ## - Validates the file extension type against the list of accepted MIME types
 ## - Sets MIME ERROR as True is there is a MIME type error
 ## - Appends a '.txt' file extension to the filename if one is missing
 
-corrected_filename,mime_type,mime_error = get_MIME_type(filename)
+if batch_mode:
+
+    batch.columns = remove_cv_type_substrings(batch)
+
+    if content_sniffing and ('Resource' in batch.columns):
+        resources = [None if pd.isna(path) else path for path in batch['Resource']]
+    else:
+        resources = None
+
+    resolved = resolve_MIME_types(batch['Filename'],resources)
+
+    mime_error = resolved['MIME Error'].any()
+    error_filenames = resolved.loc[resolved['MIME Error'],'Filename'].tolist()
+
+    print('Resolved %d filenames (%d MIME errors)' % (len(resolved),resolved['MIME Error'].sum()))
+
+else:
+
+    if content_sniffing and (resource is not None):
+        content_extension = sniff_resource(resource)
+        print('Content File Extension: %s' % content_extension)
+    else:
+        content_extension = None
+
+    corrected_filename,mime_type,mime_error = reconcile_MIME_type(filename,content_extension)
+    error_filenames = [filename]
 
 ##--------------------------------------------------------------------------
 ## MIME Error Notification
 ##--------------------------------------------------------------------------
 
+emails = list()
+
+if NotificationAggregator is not None:
+    aggregator = NotificationAggregator(notification_state_filename,
+                                        rate_limit = notification_rate_limit,
+                                        owner = 'Auto-MIME Type')
+
 if mime_error:
     
     subject = 'Filename Missing Extension or Contains MIME Type Not Identified'
     
-    ## Values to insert into the email body
-    values = (subject,now_str,instance,parent_model_html,filename,uuid,now.strftime('%d %B %Y'))
-    email_body = email_template % values
-    
-    email = {'To': email_address,
-             'CC': 'outsideken@gmail.com',
-             'Subject': subject,
-             'Body': email_body}
+    ## Values to insert into the email body; with the aggregator there is one
+    ## notification per filename
+    if NotificationAggregator is not None:
+        
+        for error_filename in error_filenames:
+            values = (subject,now_str,instance,parent_model_html,error_filename,file_uuid,now.strftime('%d %B %Y'))
+            aggregator.notify('Auto-MIME Type',email_address,subject,email_template,values,
+                              cc = 'outsideken@gmail.com')
+        
+    else:
+        
+        values = (subject,now_str,instance,parent_model_html,', '.join(error_filenames),file_uuid,now.strftime('%d %B %Y'))
+        
+        emails.append({'To': email_address,
+                       'CC': 'outsideken@gmail.com',
+                       'Subject': subject,
+                       'Body': email_template % values})
+        
+if NotificationAggregator is not None:
+    emails = aggregator.flush()
     
-    email_df = pd.DataFrame([email])
+email_df = pd.DataFrame(emails, columns = email_columns)
 
-else:
-
-    email_df = pd.DataFrame([], columns = ['To','CC','Subject','Body'])
-    
 ################################################################################
 ## OUTPUT
 ################################################################################
 
 outputs.table = email_df.copy()
 
-outputs.list = [corrected_filename,mime_type]
+## Batch mode: resolved filenames as a second table; the list holds the
+## corrected filenames
+if batch_mode:
+    outputs.tables = [email_df.copy(),resolved]
+    outputs.list = resolved['Corrected Filename'].tolist()
+else:
+    outputs.list = [corrected_filename,mime_type]
@@ -4,21 +4,36 @@
 ## Generic Error Notification
 ## Author:  outsideKen
 ## Created: 19 February 2022
-## Updated: 07 May 2022
+## Updated: 19 October 2026
 ##
 ################################################################################
 ## CHANGE LOG
 ## 2022-02-19 - Original Code and Github hosting of Python script
 ## 2022-05-07 - Update script to better implement md JSON functionality
+## 2026-10-19 - Email body rendered from the template compiled by the shared
+##              notification aggregator (notifications.py); with To Addressees
+##              the notification is also deduplicated, rate limited and output
+##              as an email table
+## 2026-10-19 - Every notification goes through the aggregator; the template
+##              is compiled once with the model data
 ##
 ################################################################################
 ################################################################################
 
 import json
+import pandas as pd
 
 from brewlytics import *
 from datetime import datetime
 
+## Shared notification aggregator; without it the body is rendered with % and
+## no email table is output
+try:
+    from notifications import NotificationAggregator, compile_template, email_columns
+except ImportError:
+    NotificationAggregator = None
+    email_columns = ['To','CC','Subject','Body']
+
 ################################################################################
 ## FUNCTIONS
 ################################################################################
@@ -44,14 +59,45 @@ root_urls = {'Demo': 'https://demo.brewlytics.com/app/#/build/'}
 
 url = root_urls[instance] + model_uuid
 
+## Optional addressees and subject for the notification aggregator, its state
+## file and rate limit (emails per addressee per hour)
+to_addressees = md.get('To Addressees',[])
+cc_addressees = md.get('CC Addressees',[])
+subject = md.get('Email Subject','brewlytics Notification')
+
+notification_state_filename = md.get('Notification State Filename','Notification State.json')
+notification_rate_limit = md.get('Notification Rate Limit',10)
+
+if NotificationAggregator is not None:
+    compiled_template = compile_template(email_body)
+
 ################################################################################
 ## BODY
 ################################################################################
 
-result = email_body % (message,instance,url,model_name,model_uuid,utcnow_str,utcnow.strftime('%d %B %Y'))
+values = (message,instance,url,model_name,model_uuid,utcnow_str,utcnow.strftime('%d %B %Y'))
+
+emails = list()
+
+if NotificationAggregator is not None:
+    
+    result = compiled_template.render(values)
+    
+    aggregator = NotificationAggregator(notification_state_filename,
+                                        rate_limit = notification_rate_limit,
+                                        owner = model_name)
+    aggregator.add(model_name,to_addressees,subject,result,cc_addressees)
+    emails = aggregator.flush()
+    
+else:
+    result = email_body % values
 
 ################################################################################
 ## OUTPUTS
 ################################################################################
 
 outputs.string = result
+
+## Deduplicated, rate limited notification emails (empty without To 
+## Addressees)
+outputs.table = pd.DataFrame(emails, columns = email_columns)
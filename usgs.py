@@ -4,48 +4,432 @@
 ##
 ## Author: OutsideKen
 ## Created: 2021-12-30
-## Updated: 2021-12-30
-## 
+## Updated: 2026-10-19
+##
 ################################################################################
 ################################################################################
 ## CHANGE LOG
 ################################################################################
 ## 2021-12-30 - Initial script and documentation
-## 
+## 2026-10-19 - Incremental ingest: polls the smallest USGS summary feed that
+##              covers the time since the last run (all_hour between frequent
+##              runs) with conditional requests and merges it into a local
+##              rolling-window event store deduplicated by event id and
+##              updated time; events outside the window are expired and the
+##              full window feed is re-read periodically for late revisions
+## 2026-10-19 - Typed feed parsing with an explicit schema: UTC timestamps,
+##              float32 measurements and categorical codes, optional column
+##              projection, pyarrow CSV reader when installed; retrieval
+##              provenance kept as table metadata rather than a per-row column
+## 2026-10-19 - Spatio-temporal event index (usgs_index.py) kept alongside the
+##              event store; rolling event counts and maximum magnitude per
+##              grid cell and hour output as a second table
+## 2026-10-19 - A 304 response keeps the stored feed validators; the full
+##              window refresh replaces the store rather than merging into it
+##              so events the USGS has deleted are dropped from the store and
+##              the event index
+##
 ################################################################################
 
+import io
+import json
+import os
 import pandas as pd
+import requests
+import time
 
 from datetime import datetime
 
+## pyarrow's CSV reader converts the feed straight to the schema types; 
+## without it the pandas C reader is used and timestamps are converted after
+## reading
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+## The event index module sits next to this script; without it only the
+## event table is output
+try:
+    from usgs_index import EventIndex, read_event_index, write_event_index
+except ImportError:
+    EventIndex = None
+
 ################################################################################
 ## FUNCTIONS
 ################################################################################
 
+##------------------------------------------------------------------------------
+## Feed state: ETag and Last-Modified validators of each feed URL and the
+## times of the last retrieval and last full window refresh
+def read_feed_state(filename):
+
+    if os.path.exists(filename):
+        with open(filename) as f:
+            return json.load(f)
+
+    return dict()
+
+def write_feed_state(filename,state):
+
+    with open(filename,'w') as f:
+        json.dump(state,f,indent = 1)
+
+def conditional_headers(state,url):
+
+    validators = state.get('Validators',dict()).get(url,dict())
+
+    headers = dict()
+    if validators.get('ETag'):
+        headers['If-None-Match'] = validators['ETag']
+    if validators.get('Last-Modified'):
+        headers['If-Modified-Since'] = validators['Last-Modified']
+
+    return headers
+
+## Store a response's validators: a 304 keeps the stored validators and
+## updates only those it returns, a full response replaces them
+def update_validators(state,url,response):
+
+    validators = state.setdefault('Validators',dict())
+
+    if response.status_code == 304:
+        stored = validators.setdefault(url,dict())
+    else:
+        stored = validators[url] = dict()
+
+    for header in ['ETag','Last-Modified']:
+        if response.headers.get(header):
+            stored[header] = response.headers[header]
+
+## Minutes since a stored timestamp (infinite when never recorded)
+def minutes_since(timestamp):
+
+    global now, iso8601
+
+    if not timestamp:
+        return float('inf')
+
+    return (now - datetime.strptime(timestamp,iso8601)).total_seconds() / 60
+
+##------------------------------------------------------------------------------
+## Smallest summary feed covering the given number of minutes
+def covering_feed(minutes):
+
+    global feed_spans
+
+    for feed,span in feed_spans:
+        if minutes <= span:
+            return feed
+
+    return feed_spans[-1][0]
+
+## Retrieve a summary feed, conditional on the given headers
+def retrieve_feed(url,headers):
+
+    r = requests.get(url, headers = headers, timeout = 60)
+    r.raise_for_status()
+
+    return r
+
+## Parse a feed with the USGS schema; columns not in the schema are inferred.
+## With columns given only those columns are read, in feed order
+def parse_feed(content,columns = None):
+
+    global usgs_schema
+
+    if columns:
+        header = content[:content.find(b'\n')].decode('utf-8').strip().split(',')
+        columns = [column for column in header if column in columns]
+
+    if pa is not None:
+
+        arrow_types = {'datetime': pa.timestamp('ms', tz = 'UTC'),
+                       'float32': pa.float32(),
+                       'category': pa.dictionary(pa.int32(),pa.string()),
+                       'str': pa.string()}
+
+        options = pa_csv.ConvertOptions(column_types = {column: arrow_types[dtype] for column,dtype
+                                                        in usgs_schema.items()},
+                                        include_columns = columns)
+
+        return pa_csv.read_csv(io.BytesIO(content), convert_options = options).to_pandas()
+
+    dtypes = {column: dtype for column,dtype in usgs_schema.items()
+              if dtype != 'datetime'}
+
+    events = pd.read_csv(io.BytesIO(content),
+                         usecols = columns,
+                         dtype = dtypes)
+
+    return parse_timestamps(events)
+
+## Timestamps as UTC datetimes in milliseconds (the feed precision), whichever
+## reader parsed them
+def parse_timestamps(events):
+
+    global usgs_schema
+
+    for column,dtype in usgs_schema.items():
+        if (dtype == 'datetime') and (column in events.columns):
+
+            if not pd.api.types.is_datetime64_any_dtype(events[column]):
+                events[column] = pd.to_datetime(events[column], format = 'ISO8601', utc = True)
+
+            events[column] = events[column].dt.as_unit('ms')
+
+    return events
+
+## Restore the schema dtypes after combining tables (concatenated categoricals
+## with different categories fall back to object) or reading an event store
+## written before typed parsing
+def apply_schema(events):
+
+    global usgs_schema
+
+    events = events.astype({column: dtype for column,dtype in usgs_schema.items()
+                            if (dtype != 'datetime') and (column in events.columns)})
+
+    return parse_timestamps(events)
+
+##------------------------------------------------------------------------------
+## EVENT STORE: rolling window of USGS events kept as a pickled DataFrame with
+## the feed's columns
+def read_event_store(filename):
+
+    if os.path.exists(filename):
+        return apply_schema(pd.read_pickle(filename))
+
+    return None
+
+def write_event_store(filename,events):
+
+    events.to_pickle(filename)
+
+## Retrieved events not in the store and events with a new updated time
+def count_changes(store,events):
+
+    if store is None:
+        return len(events),0
+
+    known = events['id'].isin(store['id'])
+    unchanged = pd.MultiIndex.from_frame(events[['id','updated']]).isin(
+                pd.MultiIndex.from_frame(store[['id','updated']]))
+
+    return (~known).sum(),(known & ~unchanged).sum()
+
+## Merge retrieved events into the store keeping the latest update of each
+## event id
+def merge_events(store,events):
+
+    if (store is None) or store.empty:
+        merged = events
+    else:
+        merged = apply_schema(pd.concat([store,events], ignore_index = True))
+
+    merged = merged.sort_values('updated', kind = 'stable')
+
+    return merged.drop_duplicates('id', keep = 'last')
+
+## Ids of stored events that a feed covering the whole window no longer lists
+## (deleted by the USGS)
+def dropped_events(store,events):
+
+    if store is None:
+        return list()
+
+    return store.loc[~store['id'].isin(events['id']),'id'].tolist()
+
+## Events inside the rolling window, newest first as in the USGS feeds
+def window_events(events,minutes):
+
+    global now
+
+    start = pd.Timestamp(now, tz = 'UTC') - pd.Timedelta(minutes = minutes)
+    in_window = events['time'] >= start
+
+    return (events[in_window]
+            .sort_values('time', ascending = False, kind = 'stable')
+            .reset_index(drop = True))
+
 ################################################################################
 ## MODEL DATA
 ################################################################################
 
 ## Model Execution Time
+iso8601 = '%Y-%m-%dT%H:%M:%S.%fZ'
 now = datetime.utcnow()
-now_str = now.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+now_str = now.strftime(iso8601)
+
+## USGS summary feed schema: timestamps parsed to UTC datetimes, measurements
+## as float32 (station counts include missing values) and repeated codes as
+## categoricals
+usgs_schema = {'time': 'datetime',
+               'latitude': 'float32',
+               'longitude': 'float32',
+               'depth': 'float32',
+               'mag': 'float32',
+               'magType': 'category',
+               'nst': 'float32',
+               'gap': 'float32',
+               'dmin': 'float32',
+               'rms': 'float32',
+               'net': 'category',
+               'id': 'str',
+               'updated': 'datetime',
+               'place': 'str',
+               'type': 'category',
+               'horizontalError': 'float32',
+               'depthError': 'float32',
+               'magError': 'float32',
+               'magNst': 'float32',
+               'status': 'category',
+               'locationSource': 'category',
+               'magSource': 'category'}
+
+## Columns read from the feed (all columns when None); id, time and updated
+## are always read for the event store
+columns = None
 
-## USGS Earthquake Hazards URL
-url = 'https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/all_day.csv'
+## Retrieval provenance is kept in the output table's attrs metadata; set
+## provenance_columns to also add it as per-row columns
+provenance_columns = False
+
+## USGS Earthquake Hazards summary feeds and the minutes each covers
+url_template = 'https://earthquake.usgs.gov/earthquakes/feed/v1.0/summary/%s.csv'
+
+feed_spans = [('all_hour',60),
+              ('all_day',1440),
+              ('all_week',10080),
+              ('all_month',43200)]
+
+## Incremental ingest: rolling window (minutes) of the output, margin added to
+## the time since the last run when choosing the poll feed, and interval
+## (minutes) between full window refreshes that pick up revisions of events
+## no longer in the poll feed
+incremental = True
+window_minutes = 1440
+poll_margin_minutes = 5
+refresh_minutes = 360
+
+store_filename = 'USGS Event Store.pkl'
+feed_state_filename = 'USGS Feed State.json'
+
+## Event index of the rolling window: grid cell size (degrees) of the spatial
+## index and the cell-hour aggregates
+index_filename = 'USGS Event Index.pkl'
+index_cell_degrees = 1.0
 
 ################################################################################
 ## BODY
 ################################################################################
 
+feed_state = read_feed_state(feed_state_filename)
+store = read_event_store(store_filename) if incremental else None
+
+## Full window feed on the first run, when not incremental or when a refresh
+## is due; otherwise the smallest feed covering the time since the last run
+if ((store is None) or
+    (minutes_since(feed_state.get('Refreshed')) >= refresh_minutes)):
+    feed = covering_feed(window_minutes)
+else:
+    feed = covering_feed(minutes_since(feed_state.get('Retrieved')) + poll_margin_minutes)
+
+## A feed covering the whole window replaces the store rather than being
+## merged into it
+refresh = dict(feed_spans)[feed] >= window_minutes
+
+url = url_template % feed
+
 ## Retrieve USGS Data
-df = pd.read_csv(url)
+if incremental and (store is not None):
+    r = retrieve_feed(url,conditional_headers(feed_state,url))
+else:
+    r = retrieve_feed(url,dict())
+
+if r.status_code == 304:
+
+    events = None
+    print('%s not modified since the last retrieval.' % feed)
+
+else:
+
+    start = time.perf_counter()
+    events = parse_feed(r.content,
+                        columns and list(dict.fromkeys(['id','time','updated'] + columns)))
+    elapsed = time.perf_counter() - start
+
+    print('%s: %d bytes, %d events parsed in %.3f s' % (feed,len(r.content),len(events),elapsed))
+
+if incremental:
+
+    ## Merge into the rolling window store (or replace it with a full window
+    ## feed) and expire events outside the window
+    dropped = list()
+    if events is not None:
+
+        print('%d new events, %d updated events.' % count_changes(store,events))
+
+        if refresh:
+            dropped = dropped_events(store,events)
+            store = merge_events(None,events)
+
+            print('%d events no longer in the feed removed.' % len(dropped))
+
+        else:
+            store = merge_events(store,events)
+
+    store = window_events(store,window_minutes)
+    write_event_store(store_filename,store)
+
+    ## Index the retrieved events and expire the index to the window; the
+    ## index is rebuilt from the store when missing or the grid has changed
+    if EventIndex is not None:
+
+        index = read_event_index(index_filename)
+
+        if (index is None) or (index.cell_degrees != index_cell_degrees):
+            index = EventIndex(cell_degrees = index_cell_degrees)
+            index.update(store)
+        elif events is not None:
+            for event_id in dropped:
+                if event_id in index.positions:
+                    index.remove(event_id)
+            index.update(events)
+
+        index.expire(pd.Timestamp(now, tz = 'UTC') - pd.Timedelta(minutes = window_minutes))
+        write_event_index(index_filename,index)
+
+        aggregates = index.aggregate_table()
+
+    ## Store the feed validators and retrieval times for the next run
+    update_validators(feed_state,url,r)
+    feed_state['Retrieved'] = now_str
+    if refresh:
+        feed_state['Refreshed'] = now_str
+    write_feed_state(feed_state_filename,feed_state)
+
+    df = store.copy()
+
+else:
+    df = events
+
+if not (incremental and (EventIndex is not None)):
+    aggregates = None
+
+## Add Date/Time USGS data retrieved and the source feed as metadata
+df.attrs = {'Date/Time Retrieved': now,
+            'USGS URL': url}
 
-## Add Date/Time USGS data retrieved
-df['Date/Time Retrieved'] = now
+if provenance_columns:
+    for key,val in df.attrs.items():
+        df[key] = val
 
 ################################################################################
 ## BODY
 ################################################################################
 
-## Output USGS Earthquake data
+## Output USGS Earthquake data and the cell-hour event aggregates
 output_table = df
+output_aggregates = aggregates
@@ -0,0 +1,207 @@
+################################################################################
+################################################################################
+## USGS Earthquake Feed - Parse Benchmark
+##
+## Author: OutsideKen
+## Created: 2026-10-19
+## Updated: 2026-10-19
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+################################################################################
+## 2026-10-19 - Original script; parses synthetic USGS summary feeds the size
+##              of all_day, all_week and all_month with the previous inferred
+##              read (plus the per-row Date/Time Retrieved column) and with
+##              the usgs.py typed reader, with and without column projection,
+##              and reports parse time, table memory and peak memory
+##
+################################################################################
+## USAGE
+##
+## Benchmark the day, week and month feed sizes:
+##     python usgs_benchmark.py
+##
+## Benchmark a 100,000 event feed projected to location and magnitude:
+##     python usgs_benchmark.py --events 100000 \
+##         --columns time latitude longitude depth mag
+##
+################################################################################
+
+import argparse
+import io
+import os
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from datetime import datetime, timedelta
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Execute the imports, FUNCTIONS and MODEL DATA sections of usgs.py (everything
+## before the BODY banner)
+##------------------------------------------------------------------------------
+def load_functions(filename):
+
+    global body_banner
+
+    with open(filename) as f:
+        source = f.read()
+
+    definitions = source[:source.index(body_banner)]
+
+    namespace = {'__name__': 'usgs_model'}
+    exec(compile(definitions,filename,'exec'),namespace)
+
+    return namespace
+
+##------------------------------------------------------------------------------
+## Synthetic summary feed with the USGS columns, newest event first
+##------------------------------------------------------------------------------
+def synthetic_feed(n,seed = 1):
+
+    rng = np.random.default_rng(seed)
+
+    end = datetime(2026,10,19)
+    times = pd.Series(sorted(end - timedelta(days = 30) * rng.random(n), reverse = True))
+    updated = times + pd.to_timedelta(rng.integers(60,86400,n), unit = 's')
+
+    def iso(values):
+        return values.dt.strftime('%Y-%m-%dT%H:%M:%S.%f').str[:-3] + 'Z'
+
+    def maybe(values,fraction):
+        return np.where(rng.random(n) < fraction,np.nan,values)
+
+    networks = np.array(['ak','ci','hv','nc','nn','pr','tx','us','uu','uw'])
+
+    feed = pd.DataFrame({'time': iso(times),
+                         'latitude': rng.uniform(-60,70,n).round(4),
+                         'longitude': rng.uniform(-180,180,n).round(4),
+                         'depth': rng.uniform(0,300,n).round(2),
+                         'mag': rng.uniform(-1,7,n).round(2),
+                         'magType': rng.choice(['ml','md','mb','mww','mwr','mb_lg'],n),
+                         'nst': maybe(rng.integers(3,150,n),0.3),
+                         'gap': maybe(rng.uniform(20,300,n).round(0),0.1),
+                         'dmin': maybe(rng.uniform(0,5,n).round(5),0.1),
+                         'rms': rng.uniform(0,1.5,n).round(4),
+                         'net': rng.choice(networks,n),
+                         'id': ['%s%08d' % (networks[i % 10],i) for i in range(n)],
+                         'updated': iso(updated),
+                         'place': ['%d km %s of %s' % (rng.integers(1,200),rng.choice(['N','SSE','WNW']),
+                                                       rng.choice(['Anza, CA','Pahala, Hawaii','Tanaga Volcano, Alaska',
+                                                                   'Ridgecrest, CA','Stanley, Idaho']))
+                                   for i in range(n)],
+                         'type': rng.choice(['earthquake','earthquake','earthquake','quarry blast','explosion'],n),
+                         'horizontalError': maybe(rng.uniform(0,10,n).round(2),0.2),
+                         'depthError': rng.uniform(0,30,n).round(3),
+                         'magError': maybe(rng.uniform(0,0.5,n).round(3),0.3),
+                         'magNst': maybe(rng.integers(1,80,n),0.3),
+                         'status': rng.choice(['automatic','reviewed'],n),
+                         'locationSource': rng.choice(networks,n),
+                         'magSource': rng.choice(networks,n)})
+
+    return feed.to_csv(index = False).encode('utf-8')
+
+##------------------------------------------------------------------------------
+## Previous parse: every column inferred and the retrieval time added to every
+## row
+##------------------------------------------------------------------------------
+def inferred_parse(namespace,content,columns):
+
+    df = pd.read_csv(io.BytesIO(content))
+    df['Date/Time Retrieved'] = datetime(2026,10,19)
+
+    return df
+
+def typed_parse(namespace,content,columns):
+
+    df = namespace['parse_feed'](content,columns)
+    df.attrs = {'Date/Time Retrieved': datetime(2026,10,19)}
+
+    return df
+
+##------------------------------------------------------------------------------
+## Run a function timed without tracing, then under tracemalloc for peak
+## memory; returns the output, elapsed seconds and peak traced memory (MB).
+## tracemalloc only sees Python allocations, not pyarrow's memory pool, so
+## the table memory of the result is reported as well
+##------------------------------------------------------------------------------
+def measure(function,*args):
+
+    start = time.perf_counter()
+    output = function(*args)
+    elapsed = time.perf_counter() - start
+
+    del output
+
+    tracemalloc.start()
+    output = function(*args)
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    return output,elapsed,peak
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+body_banner = '################################################################################\n## BODY'
+
+## Typical event counts of the USGS summary feeds
+feed_sizes = {'all_day': 350,
+              'all_week': 2500,
+              'all_month': 11000}
+
+default_script = os.path.join(os.path.dirname(os.path.abspath(__file__)),'usgs.py')
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark USGS summary feed parsing')
+    parser.add_argument('--events', type = int, nargs = '+', default = None,
+                        help = 'feed sizes (default: the all_day, all_week and all_month sizes)')
+    parser.add_argument('--columns', nargs = '+', default = ['time','latitude','longitude','depth','mag','id','updated'],
+                        help = 'columns for the projected read')
+    parser.add_argument('--script', default = default_script,
+                        help = 'usgs.py script to benchmark')
+    args = parser.parse_args()
+
+    namespace = load_functions(args.script)
+
+    if args.events:
+        sizes = {'%d events' % n: n for n in args.events}
+    else:
+        sizes = feed_sizes
+
+    results = list()
+    for feed,n in sizes.items():
+
+        content = synthetic_feed(n)
+
+        ## Warm up the readers before timing
+        for function in [inferred_parse,typed_parse]:
+            function(namespace,content,None)
+
+        for reader,function,columns in [('Inferred',inferred_parse,None),
+                                        ('Typed',typed_parse,None),
+                                        ('Typed (projected)',typed_parse,args.columns)]:
+
+            df,elapsed,peak = measure(function,namespace,content,columns)
+            results.append({'Feed': feed,
+                            'Events': len(df),
+                            'Size (MB)': round(len(content) / 1e6,2),
+                            'Reader': reader,
+                            'Parse (ms)': round(elapsed * 1000,1),
+                            'Table Memory (MB)': round(df.memory_usage(deep = True).sum() / 1e6,2),
+                            'Peak Memory (MB)': round(peak,1)})
+
+    print(pd.DataFrame(results).to_string(index = False))
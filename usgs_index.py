@@ -0,0 +1,470 @@
+################################################################################
+################################################################################
+## USGS Earthquake Event Index
+##
+## Author: OutsideKen
+## Created: 2026-10-19
+## Updated: 2026-10-19
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+################################################################################
+## 2026-10-19 - Initial module: spatial grid and time index over USGS events
+##              with bounding box, radius, time window and magnitude queries
+##              and rolling event counts and maximum magnitudes per grid cell
+##              and hour, updated as events arrive
+##
+################################################################################
+## USAGE
+##
+##     from usgs_index import EventIndex
+##
+##     index = EventIndex(cell_degrees = 1.0)
+##     index.update(events)        ## USGS feed table (id, time, updated,
+##                                 ## latitude, longitude, mag)
+##     index.expire(start)         ## drop events before the rolling window
+##
+##     ## M4+ within 200 km of a point in the last 6 hours
+##     index.query(center = (35.7,-117.5), radius_km = 200,
+##                 start = now - pd.Timedelta(hours = 6), min_mag = 4)
+##
+##     ## Event counts and maximum magnitude per cell and hour
+##     index.aggregate_table()
+##
+################################################################################
+
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+earth_radius_km = 6371.0088
+hour_ms = 3600000
+
+## Index keys combine the grid cell and the event time (ms since the epoch):
+## key = cell * 2**42 + time, so events sort by cell then time
+time_bits = 42
+max_time_ms = 2 ** time_bits - 1
+
+fields = ['id','time','updated','latitude','longitude','mag']
+
+##------------------------------------------------------------------------------
+## Times (datetimes, ISO 8601 strings or ms since the epoch) as int64 ms since
+## the epoch (naive times are taken as UTC)
+def to_epoch_ms(values):
+
+    if isinstance(values,(int,np.integer)):
+        return int(values)
+
+    if np.ndim(values) == 0:
+        return pd.Timestamp(values).value // 1000000
+
+    times = pd.to_datetime(pd.Series(values), utc = True, format = 'ISO8601')
+
+    return times.dt.as_unit('ms').astype('int64').to_numpy()
+
+## Great-circle distance (km) from a point to arrays of points
+def haversine_km(lat,lon,lats,lons):
+
+    lat,lon = np.radians(lat),np.radians(lon)
+    lats,lons = np.radians(lats),np.radians(lons)
+
+    a = (np.sin((lats - lat) / 2) ** 2 +
+         np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2)
+
+    return 2 * earth_radius_km * np.arcsin(np.sqrt(np.minimum(a,1)))
+
+## Bounding box (south, west, north, east) enclosing a circle; the box wraps
+## the antimeridian when west > east and spans all longitudes near the poles
+def radius_bbox(lat,lon,radius_km):
+
+    dlat = np.degrees(radius_km / earth_radius_km)
+    south,north = max(lat - dlat,-90),min(lat + dlat,90)
+
+    if (south <= -90) or (north >= 90):
+        return (south,-180,north,180)
+
+    dlon = np.degrees(np.arcsin(min(np.sin(radius_km / earth_radius_km) /
+                                    np.cos(np.radians(lat)),1)))
+    west = (lon - dlon + 180) % 360 - 180
+    east = (lon + dlon + 180) % 360 - 180
+
+    return (south,west,north,east)
+
+##------------------------------------------------------------------------------
+## EVENT INDEX: events are kept in columnar arrays sorted by (grid cell, time)
+## key, so a bounding box query is one binary search per grid cell in the box
+## for the start and end of the time window, and a time window without a box
+## is a binary search over a time-sorted order. New and updated events go to a
+## small pending buffer that is searched directly and merged into the sorted
+## arrays in batches. Replaced and expired events are marked dead and removed
+## at the next merge.
+##
+## Event counts and maximum magnitude per (cell, hour) are kept in a dict and
+## updated per event as events are added, replaced or expired; a maximum is
+## only recomputed when the event holding it is removed.
+class EventIndex(object):
+
+    def __init__(self,cell_degrees = 1.0,merge_size = 4096):
+
+        self.cell_degrees = cell_degrees
+        self.rows = int(np.ceil(180 / cell_degrees))
+        self.cols = int(np.ceil(360 / cell_degrees))
+        self.merge_size = merge_size
+
+        self.main = {field: np.empty(0, dtype = dtype) for field,dtype in
+                     [('id',object),('time',np.int64),('updated',np.int64),
+                      ('latitude',np.float64),('longitude',np.float64),
+                      ('mag',np.float64),('cell',np.int64),('key',np.int64)]}
+        self.live = np.empty(0, dtype = bool)
+        self.time_order = np.empty(0, dtype = np.int64)
+        self.sorted_times = np.empty(0, dtype = np.int64)
+
+        self.pending = list()
+        self.pending_arrays = None
+
+        ## id -> position in the main arrays (int) or the pending buffer
+        ## (('pending', position))
+        self.positions = dict()
+
+        ## (cell, hour) -> [count, max magnitude]
+        self.aggregates = dict()
+
+    def __len__(self):
+
+        return len(self.positions)
+
+    ##--------------------------------------------------------------------------
+    ## Grid cells
+    def cells(self,lats,lons):
+
+        rows = np.clip(((np.asarray(lats) + 90) // self.cell_degrees).astype(np.int64),0,self.rows - 1)
+        cols = np.clip(((np.asarray(lons) + 180) // self.cell_degrees).astype(np.int64),0,self.cols - 1)
+
+        return rows * self.cols + cols
+
+    def cell_row(self,lat):
+
+        return min(max(int((lat + 90) // self.cell_degrees),0),self.rows - 1)
+
+    def cell_col(self,lon):
+
+        return min(max(int((lon + 180) // self.cell_degrees),0),self.cols - 1)
+
+    def bbox_cells(self,bbox):
+
+        south,west,north,east = bbox
+
+        rows = np.arange(self.cell_row(south),self.cell_row(north) + 1)
+
+        first_col = self.cell_col(west)
+        last_col = self.cell_col(east)
+
+        if west <= east:
+            cols = np.arange(first_col,last_col + 1)
+        else:
+            cols = np.concatenate([np.arange(first_col,self.cols),np.arange(0,last_col + 1)])
+
+        return (rows[:,None] * self.cols + cols[None,:]).ravel()
+
+    def cell_center(self,cells):
+
+        cells = np.asarray(cells)
+
+        return ((cells // self.cols + 0.5) * self.cell_degrees - 90,
+                (cells % self.cols + 0.5) * self.cell_degrees - 180)
+
+    ##--------------------------------------------------------------------------
+    ## Updates
+    def update(self,events):
+
+        ## Add new events and newer versions of indexed events (by id and
+        ## updated time). Returns the number of events added or replaced
+
+        times = to_epoch_ms(events['time'])
+        updated = to_epoch_ms(events['updated']) if 'updated' in events else times
+        lats = events['latitude'].to_numpy(dtype = np.float64)
+        lons = events['longitude'].to_numpy(dtype = np.float64)
+        mags = events['mag'].to_numpy(dtype = np.float64)
+        cells = self.cells(lats,lons)
+
+        changed = 0
+        for i,event_id in enumerate(events['id'].to_numpy()):
+
+            if event_id in self.positions:
+                if self.event(event_id)['updated'] >= updated[i]:
+                    continue
+                self.remove(event_id)
+
+            self.pending.append((event_id,int(times[i]),int(updated[i]),
+                                 lats[i],lons[i],mags[i],int(cells[i])))
+            self.pending_arrays = None
+            self.positions[event_id] = ('pending',len(self.pending) - 1)
+            self.add_aggregate(int(cells[i]),int(times[i]) // hour_ms,mags[i])
+
+            changed += 1
+
+        ## Merge once per batch so bulk loads sort the arrays once
+        if len(self.pending) >= self.merge_size:
+            self.merge()
+
+        return changed
+
+    ## Drop events before start. Returns the number of events expired
+    def expire(self,start):
+
+        start = to_epoch_ms(start)
+
+        expired = list()
+
+        for position in self.time_order[:np.searchsorted(self.sorted_times,start,'left')]:
+            if self.live[position]:
+                expired.append(self.main['id'][position])
+
+        expired += [event[0] for event in self.pending
+                    if (event[1] < start) and (self.positions.get(event[0]) is not None)]
+
+        for event_id in expired:
+            self.remove(event_id)
+
+        return len(expired)
+
+    def event(self,event_id):
+
+        position = self.positions[event_id]
+
+        if isinstance(position,tuple):
+            return dict(zip(fields + ['cell'],self.pending[position[1]]))
+
+        return {field: self.main[field][position] for field in fields + ['cell']}
+
+    def remove(self,event_id):
+
+        event = self.event(event_id)
+        position = self.positions.pop(event_id)
+
+        if isinstance(position,tuple):
+            self.pending[position[1]] = (None,) + self.pending[position[1]][1:]
+            self.pending_arrays = None
+        else:
+            self.live[position] = False
+
+        self.remove_aggregate(event['cell'],event['time'] // hour_ms,event['mag'])
+
+    ## Merge the pending buffer into the sorted arrays, dropping dead events
+    def merge(self):
+
+        pending = [event for event in self.pending if event[0] is not None]
+
+        columns = dict()
+        for field,values in zip(fields + ['cell'],zip(*pending) if pending else [[]] * 7):
+            columns[field] = np.asarray(values, dtype = self.main[field].dtype)
+        columns['key'] = (columns['cell'] << time_bits) + np.clip(columns['time'],0,max_time_ms)
+
+        merged = {field: np.concatenate([self.main[field][self.live],columns[field]])
+                  for field in self.main}
+
+        order = np.argsort(merged['key'], kind = 'stable')
+
+        self.main = {field: values[order] for field,values in merged.items()}
+        self.live = np.ones(len(order), dtype = bool)
+        self.time_order = np.argsort(self.main['time'], kind = 'stable')
+        self.sorted_times = self.main['time'][self.time_order]
+
+        self.positions = dict(zip(self.main['id'],range(len(order))))
+
+        self.pending = list()
+        self.pending_arrays = None
+
+    ##--------------------------------------------------------------------------
+    ## Rolling aggregates
+    def add_aggregate(self,cell,hour,mag):
+
+        aggregate = self.aggregates.setdefault((cell,hour),[0,np.nan])
+        aggregate[0] += 1
+
+        if (not np.isnan(mag)) and not (mag <= aggregate[1]):
+            aggregate[1] = mag
+
+    def remove_aggregate(self,cell,hour,mag):
+
+        aggregate = self.aggregates[(cell,hour)]
+        aggregate[0] -= 1
+
+        if aggregate[0] == 0:
+            del self.aggregates[(cell,hour)]
+
+        elif mag == aggregate[1]:
+            mags = self.query(cells = [cell], start = hour * hour_ms,
+                              end = (hour + 1) * hour_ms - 1, frame = False)['mag']
+            aggregate[1] = np.nanmax(mags) if np.isfinite(mags).any() else np.nan
+
+    def aggregate_table(self,start = None,end = None):
+
+        start = to_epoch_ms(start) // hour_ms if start is not None else None
+        end = to_epoch_ms(end) // hour_ms if end is not None else None
+
+        keys = [key for key in self.aggregates
+                if ((start is None) or (key[1] >= start)) and ((end is None) or (key[1] <= end))]
+
+        cells = np.array([key[0] for key in keys], dtype = np.int64)
+        lats,lons = self.cell_center(cells)
+
+        table = pd.DataFrame({'Cell': cells,
+                              'Latitude': lats,
+                              'Longitude': lons,
+                              'Hour': pd.to_datetime(np.array([key[1] for key in keys], dtype = np.int64) * hour_ms,
+                                                     unit = 'ms', utc = True),
+                              'Count': [self.aggregates[key][0] for key in keys],
+                              'Max Magnitude': [self.aggregates[key][1] for key in keys]})
+
+        return table.sort_values(['Hour','Cell']).reset_index(drop = True)
+
+    ##--------------------------------------------------------------------------
+    ## Queries
+    def pending_columns(self):
+
+        if self.pending_arrays is None:
+
+            pending = [event for event in self.pending if event[0] is not None]
+
+            self.pending_arrays = {field: np.asarray(values, dtype = self.main[field].dtype)
+                                   for field,values in zip(fields + ['cell'],
+                                                           zip(*pending) if pending else [[]] * 7)}
+
+        return self.pending_arrays
+
+    ## Positions of live indexed events in the given cells (all cells when
+    ## None) and time window
+    def main_positions(self,cells,start,end):
+
+        if cells is None:
+
+            first = np.searchsorted(self.sorted_times,start,'left')
+            last = np.searchsorted(self.sorted_times,end,'right')
+
+            ## Windows covering most events are cheaper as a mask over the
+            ## arrays than as a gather through the time order
+            if last - first > len(self.sorted_times) // 4:
+                return np.flatnonzero(self.live & (self.main['time'] >= start) &
+                                      (self.main['time'] <= end))
+
+            positions = self.time_order[first:last]
+
+        else:
+
+            cells = np.asarray(cells, dtype = np.int64)
+            first = np.searchsorted(self.main['key'],(cells << time_bits) + max(start,0),'left')
+            last = np.searchsorted(self.main['key'],(cells << time_bits) + min(end,max_time_ms),'right')
+
+            ## Concatenate the position ranges [first, last) of every cell
+            lengths = last - first
+            offsets = np.repeat(first - np.concatenate([[0],np.cumsum(lengths)[:-1]]),lengths)
+            positions = offsets + np.arange(lengths.sum())
+
+        return positions[self.live[positions]]
+
+    ## Apply the magnitude and location filters to positions in a table of
+    ## event columns, reading only the columns each filter needs
+    def filter_positions(self,table,positions,bbox,center,radius_km,min_mag,max_mag):
+
+        if min_mag is not None:
+            positions = positions[table['mag'][positions] >= min_mag]
+        if max_mag is not None:
+            positions = positions[table['mag'][positions] <= max_mag]
+
+        if bbox is not None:
+
+            south,west,north,east = bbox
+            lats = table['latitude'][positions]
+            lons = table['longitude'][positions]
+
+            selected = (lats >= south) & (lats <= north)
+            if west <= east:
+                selected &= (lons >= west) & (lons <= east)
+            else:
+                selected &= (lons >= west) | (lons <= east)
+
+            positions = positions[selected]
+
+        if (center is not None) and (radius_km is not None):
+            positions = positions[haversine_km(center[0],center[1],table['latitude'][positions],
+                                               table['longitude'][positions]) <= radius_km]
+
+        return positions
+
+    def query(self,bbox = None,center = None,radius_km = None,start = None,end = None,
+              min_mag = None,max_mag = None,cells = None,frame = True):
+
+        ## Events inside a bounding box (south, west, north, east) and/or
+        ## within radius_km of center (latitude, longitude), between start and
+        ## end (inclusive) and with magnitude in [min_mag, max_mag], newest
+        ## first; as a DataFrame or, with frame False, a dict of columns
+
+        start = to_epoch_ms(start) if start is not None else 0
+        end = to_epoch_ms(end) if end is not None else max_time_ms
+
+        if cells is None:
+
+            if (center is not None) and (radius_km is not None):
+                search_bbox = radius_bbox(center[0],center[1],radius_km)
+            else:
+                search_bbox = bbox
+
+            if search_bbox is not None:
+                cells = self.bbox_cells(search_bbox)
+
+        filters = (bbox,center,radius_km,min_mag,max_mag)
+
+        positions = self.filter_positions(self.main,self.main_positions(cells,start,end),*filters)
+        columns = {field: self.main[field][positions] for field in fields}
+
+        pending = self.pending_columns()
+        if len(pending['id']):
+
+            selected = (pending['time'] >= start) & (pending['time'] <= end)
+            if cells is not None:
+                selected &= np.isin(pending['cell'],cells)
+
+            positions = self.filter_positions(pending,np.flatnonzero(selected),*filters)
+            columns = {field: np.concatenate([columns[field],pending[field][positions]])
+                       for field in fields}
+
+        order = np.argsort(-columns['time'], kind = 'stable')
+        columns = {field: values[order] for field,values in columns.items()}
+
+        if not frame:
+            return columns
+
+        for field in ['time','updated']:
+            columns[field] = pd.DatetimeIndex(columns[field].view('datetime64[ms]')).tz_localize('UTC')
+
+        return pd.DataFrame(columns)
+
+    ## Event counts per hour of a query
+    def hourly_counts(self,**query):
+
+        results = self.query(**query)
+
+        return results.groupby(results['time'].dt.floor('h')).size().rename('Count')
+
+##------------------------------------------------------------------------------
+## Persist the index between runs
+def read_event_index(filename):
+
+    if os.path.exists(filename):
+        with open(filename,'rb') as f:
+            return pickle.load(f)
+
+    return None
+
+def write_event_index(filename,index):
+
+    with open(filename,'wb') as f:
+        pickle.dump(index,f)
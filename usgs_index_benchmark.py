@@ -0,0 +1,214 @@
+################################################################################
+################################################################################
+## USGS Earthquake Event Index - Query Benchmark
+##
+## Author: OutsideKen
+## Created: 2026-10-19
+## Updated: 2026-10-19
+##
+################################################################################
+################################################################################
+## CHANGE LOG
+################################################################################
+## 2026-10-19 - Original script; indexes a year of synthetic USGS events with
+##              usgs_index.EventIndex and reports query latency for bounding
+##              box, radius, time window and magnitude queries against a full
+##              table scan, and the cost of an hourly aggregate update against
+##              recomputing the cell-hour aggregates
+##
+################################################################################
+## USAGE
+##
+## Benchmark a year of 200,000 events on a 1 degree grid:
+##     python usgs_index_benchmark.py
+##
+## Benchmark a million events on a half degree grid:
+##     python usgs_index_benchmark.py --events 1000000 --cell-degrees 0.5
+##
+################################################################################
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0,os.path.dirname(os.path.abspath(__file__)))
+
+from usgs_index import EventIndex, haversine_km
+
+################################################################################
+## FUNCTIONS
+################################################################################
+
+##------------------------------------------------------------------------------
+## Synthetic year of events: most events clustered around seismic regions, the
+## rest spread worldwide; magnitudes follow a Gutenberg-Richter distribution
+##------------------------------------------------------------------------------
+def synthetic_events(n,end,seed = 1):
+
+    global hotspots
+
+    rng = np.random.default_rng(seed)
+
+    centers = np.array([hotspot[:2] for hotspot in hotspots])
+    spreads = np.array([hotspot[2] for hotspot in hotspots])
+
+    clustered = rng.random(n) < 0.85
+    choice = rng.integers(0,len(hotspots),n)
+
+    lats = np.where(clustered,centers[choice,0] + rng.normal(0,1,n) * spreads[choice],
+                    rng.uniform(-70,75,n))
+    lons = np.where(clustered,centers[choice,1] + rng.normal(0,1,n) * spreads[choice],
+                    rng.uniform(-180,180,n))
+
+    times = end - pd.to_timedelta(np.sort(rng.uniform(0,365 * 86400,n))[::-1], unit = 's')
+
+    return pd.DataFrame({'id': ['ev%08d' % i for i in range(n)],
+                         'time': times.as_unit('ms'),
+                         'updated': (times + pd.Timedelta(minutes = 10)).as_unit('ms'),
+                         'latitude': np.clip(lats,-89.9,89.9),
+                         'longitude': (lons + 180) % 360 - 180,
+                         'mag': (-0.5 + rng.exponential(1.0,n)).round(2)})
+
+##------------------------------------------------------------------------------
+## Full table scan with the same query semantics as EventIndex.query
+##------------------------------------------------------------------------------
+def scan(events,bbox = None,center = None,radius_km = None,
+         start = None,end = None,min_mag = None):
+
+    selected = np.ones(len(events), dtype = bool)
+
+    if bbox is not None:
+        south,west,north,east = bbox
+        selected &= (events['latitude'] >= south) & (events['latitude'] <= north)
+        selected &= (events['longitude'] >= west) & (events['longitude'] <= east)
+
+    if center is not None:
+        selected &= haversine_km(center[0],center[1],events['latitude'].to_numpy(),
+                                 events['longitude'].to_numpy()) <= radius_km
+
+    if start is not None:
+        selected &= events['time'] >= start
+    if end is not None:
+        selected &= events['time'] <= end
+    if min_mag is not None:
+        selected &= events['mag'] >= min_mag
+
+    return events[selected].sort_values('time', ascending = False)
+
+def cell_hour_aggregates(index,events):
+
+    return (events.assign(Cell = index.cells(events['latitude'],events['longitude']),
+                          Hour = events['time'].dt.floor('h'))
+            .groupby(['Cell','Hour'])
+            .agg(Count = ('id','size'),Max = ('mag','max')))
+
+## Median run time (ms) of a function over repeats
+def timed(function,repeats,*args,**kwargs):
+
+    times = list()
+    for _ in range(repeats):
+
+        start = time.perf_counter()
+        output = function(*args,**kwargs)
+        times.append(time.perf_counter() - start)
+
+    return output,np.median(times) * 1000
+
+################################################################################
+## MODEL DATA
+################################################################################
+
+## Seismic regions: latitude, longitude and spread (degrees)
+hotspots = [(36.0,-118.0,2.0),     ## California
+            (61.0,-150.0,3.0),     ## Alaska
+            (19.4,-155.3,0.5),     ## Hawaii
+            (44.5,-111.0,1.0),     ## Yellowstone
+            (36.0,140.0,3.0),      ## Japan
+            (-30.0,-71.0,4.0),     ## Chile
+            (-2.0,120.0,6.0),      ## Indonesia
+            (38.0,23.0,3.0),       ## Mediterranean
+            (52.0,178.0,2.0)]      ## Aleutians (antimeridian)
+
+end = pd.Timestamp('2026-10-19', tz = 'UTC')
+
+queries = {'M2.5+ within 200 km of Ridgecrest, last 24 h':
+               {'center': (35.77,-117.60),'radius_km': 200,
+                'start': end - pd.Timedelta(hours = 24),'min_mag': 2.5},
+           'California box, last 24 h':
+               {'bbox': (32.0,-125.0,42.0,-114.0),'start': end - pd.Timedelta(hours = 24)},
+           'Alaska box M2.5+, last 7 days':
+               {'bbox': (51.0,-170.0,72.0,-130.0),'start': end - pd.Timedelta(days = 7),
+                'min_mag': 2.5},
+           'Within 500 km of Tokyo, last 30 days':
+               {'center': (35.68,139.65),'radius_km': 500,
+                'start': end - pd.Timedelta(days = 30)},
+           'Worldwide, last hour':
+               {'start': end - pd.Timedelta(hours = 1)},
+           'Worldwide M5+, last year':
+               {'min_mag': 5},
+           'Yellowstone 100 km, full year':
+               {'center': (44.43,-110.59),'radius_km': 100}}
+
+################################################################################
+## BODY
+################################################################################
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'Benchmark USGS event index queries')
+    parser.add_argument('--events', type = int, default = 200000,
+                        help = 'events in the synthetic year')
+    parser.add_argument('--cell-degrees', type = float, default = 1.0,
+                        help = 'grid cell size (degrees)')
+    parser.add_argument('--repeats', type = int, default = 20,
+                        help = 'query repeats (median reported)')
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events,end)
+
+    ## Index all but the last hour, which is added as the incremental update
+    last_hour = events['time'] > end - pd.Timedelta(hours = 1)
+
+    index = EventIndex(cell_degrees = args.cell_degrees)
+
+    start = time.perf_counter()
+    index.update(events[~last_hour])
+    index.merge()
+    build = time.perf_counter() - start
+
+    print('%d events over a year; index built in %.2f s\n' % (args.events,build))
+
+    ##--------------------------------------------------------------------------
+    ## Incremental aggregate update vs recomputing the aggregates
+    _,update_ms = timed(index.update,1,events[last_hour])
+    aggregates,recompute_ms = timed(cell_hour_aggregates,3,index,events)
+
+    if len(aggregates) != len(index.aggregates):
+        raise AssertionError('Incremental aggregates differ from the recomputed aggregates')
+
+    print('Last hour: %d events added with aggregates in %.2f ms; recomputing '
+          'the %d cell-hour aggregates takes %.1f ms\n' %
+          (last_hour.sum(),update_ms,len(aggregates),recompute_ms))
+
+    ##--------------------------------------------------------------------------
+    ## Query latency
+    results = list()
+    for name,query in queries.items():
+
+        indexed,index_ms = timed(index.query,args.repeats,**query)
+        scanned,scan_ms = timed(scan,args.repeats,events,**query)
+
+        if set(indexed['id']) != set(scanned['id']):
+            raise AssertionError('Index query differs from table scan: %s' % name)
+
+        results.append({'Query': name,
+                        'Matches': len(indexed),
+                        'Scan (ms)': round(scan_ms,2),
+                        'Index (ms)': round(index_ms,2),
+                        'Speedup': round(scan_ms / index_ms,1)})
+
+    print(pd.DataFrame(results).to_string(index = False))